@@ -0,0 +1,18 @@
+import os
+import pytest
+
+# Sizes stop at 10^5 rows / 10^3 book levels by default; set
+# CRYPTO_MONITOR_BENCH_FULL=1 to include 10^6 rows and 10^4 levels
+FULL = os.environ.get('CRYPTO_MONITOR_BENCH_FULL') == '1'
+
+ROWS = [100, 10_000, 100_000] + ([1_000_000] if FULL else [])
+BOOK_LEVELS = [10, 100, 1_000] + ([10_000] if FULL else [])
+HISTORY_SIZES = [100, 1_000, 10_000] + ([100_000] if FULL else [])
+
+def pytest_generate_tests(metafunc):
+    if 'rows' in metafunc.fixturenames:
+        metafunc.parametrize('rows', ROWS)
+    if 'levels' in metafunc.fixturenames:
+        metafunc.parametrize('levels', BOOK_LEVELS)
+    if 'history_size' in metafunc.fixturenames:
+        metafunc.parametrize('history_size', HISTORY_SIZES)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from crypto_monitor.analysis.heikin_ashi import HeikinAshi
+from crypto_monitor.analysis.panel import cross_section, panel_from_prices
+from crypto_monitor.analysis.spread_analyzer import SpreadAnalyzer
+from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer
+from crypto_monitor.market_data.synthetic import synthetic_history, synthetic_ohlc, synthetic_order_book
+
+def test_heikin_ashi_calculate(benchmark, rows):
+    df = synthetic_ohlc(rows)
+    result = benchmark(HeikinAshi().calculate, df)
+    assert len(result) == rows
+
+def test_heikin_ashi_trend_signals(benchmark, rows):
+    ha = HeikinAshi()
+    ha_df = ha.calculate(synthetic_ohlc(rows))
+    result = benchmark(ha.get_trend_signals, ha_df)
+    assert 'trend' in result
+
+@pytest.mark.parametrize('allocation', ['midpoint', 'proportional'])
+def test_calculate_vbp(benchmark, rows, allocation):
+    df = synthetic_ohlc(rows)
+    analyzer = VolumeAnalyzer(price_levels=1_000)
+    result = benchmark(analyzer.calculate_vbp, df, allocation)
+    assert sum(result['volume_profile']) == pytest.approx(df['volume'].sum())
+
+def test_analyze_spread(benchmark, rows):
+    df = synthetic_history(rows)
+    result = benchmark(SpreadAnalyzer().analyze_spread, df, 'BTC')
+    assert result['condition'] in ('TIGHT', 'NORMAL', 'WIDE')
+
+def test_analyze_order_book(benchmark, levels):
+    book = synthetic_order_book(100.0, depth=levels, rng=np.random.default_rng(0))
+    analyzer = VolumeAnalyzer()
+    result = benchmark(analyzer.analyze_order_book, book['buyorders'], book['sellorders'])
+    assert result['buy_volume'] > 0
+
+def test_analyze_depth(benchmark, levels):
+    book = synthetic_order_book(100.0, depth=levels, rng=np.random.default_rng(0))
+    analyzer = VolumeAnalyzer()
+    result = benchmark(analyzer.analyze_depth, book['buyorders'], book['sellorders'], notional=5_000)
+    assert result['mid'] is not None
+
+@pytest.mark.parametrize('coins', [10, 100, 1_000])
+def test_cross_section(benchmark, coins):
+    # One vectorized pass over a coin x 100-tick panel
+    rng = np.random.default_rng(0)
+    last = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (coins, 100)), axis=1))
+    panel = panel_from_prices([f"C{i}" for i in range(coins)], last * 0.999, last * 1.001, last)
+    result = benchmark(cross_section, panel)
+    assert len(result) == coins
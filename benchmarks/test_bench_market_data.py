@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.synthetic import synthetic_ticks
+from crypto_monitor.market_data.transport import FakeTransport
+
+def _filled_client(history_size):
+    client = CoinspotClient(max_history=history_size, transport=FakeTransport())
+    for coin, timestamp, response, _ in synthetic_ticks(['BTC'], history_size):
+        client.add_price_to_history(coin, response, timestamp=timestamp)
+    return client
+
+def test_add_price_to_history(benchmark, history_size):
+    client = _filled_client(history_size)
+    response = {'status': 'ok', 'message': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+    benchmark(client.add_price_to_history, 'BTC', response)
+    assert len(client.get_price_history('BTC')) == history_size
+
+def test_get_price_history_after_tick(benchmark, history_size):
+    # The realistic case: one new point, then the frame is rebuilt
+    client = _filled_client(history_size)
+    response = {'status': 'ok', 'message': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+
+    def tick():
+        client.add_price_to_history('BTC', response)
+        return client.get_price_history('BTC')
+
+    assert len(benchmark(tick)) == history_size
+
+def test_get_price_history_cached(benchmark, history_size):
+    client = _filled_client(history_size)
+    assert len(benchmark(client.get_price_history, 'BTC')) == history_size
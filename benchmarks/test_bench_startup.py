@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _python(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+
+def test_cli_cold_import(benchmark):
+    # Interpreter start plus importing the CLI, as a cron job would pay it
+    benchmark.pedantic(_python, args=('import crypto_monitor.cli.main',), rounds=10, iterations=1)
+
+def test_cli_help(benchmark):
+    benchmark.pedantic(_python, args=('from crypto_monitor.cli.main import cli; cli(["--help"])',),
+                       rounds=10, iterations=1)
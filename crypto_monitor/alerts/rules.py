@@ -0,0 +1,307 @@
+import json
+import math
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _timeframe_trend(timeframe: str) -> Callable[[Dict], Optional[str]]:
+    def extract(analysis: Dict) -> Optional[str]:
+        result = analysis.get('timeframes', {}).get(timeframe)
+        return result['latest_ha']['trend'] if result else None
+    return extract
+
+
+# Values rules can test, read from a TickPipeline analysis. 'trend@5m' reads
+# the Heikin Ashi trend of the last closed 5m bar.
+METRICS: Dict[str, Callable[[Dict], object]] = {
+    'price': lambda a: a['latest']['close'],
+    'spread_percentage': lambda a: a['spread_analysis']['current_spread_percentage'],
+    'spread_zscore': lambda a: a['spread_analysis'].get('spread_zscore'),
+    'spread_condition': lambda a: a['spread_analysis']['condition'],
+    'trend': lambda a: a['latest_ha']['trend'],
+    'imbalance': lambda a: a['order_book_analysis']['imbalance_ratio'],
+    'dominant_side': lambda a: a['order_book_analysis']['dominant_side'],
+    'volume_signal': lambda a: a['volume_signals']
+}
+
+THRESHOLD_OPS = ('>', '>=', '<', '<=')
+EQUALITY_OPS = ('==', '!=')
+# Fires every time the value changes, e.g. a trend flip
+CHANGE_OP = 'changed'
+
+
+def metric_getter(metric: str) -> Callable[[Dict], object]:
+    if metric in METRICS:
+        return METRICS[metric]
+    if metric.startswith('trend@'):
+        return _timeframe_trend(metric.split('@', 1)[1])
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+class Rule:
+    ## One alert condition, e.g. Rule('wide', 'spread_condition', '==', 'WIDE').
+    ##
+    ## A rule fires when its condition turns true for a coin and has stayed
+    ## true for `debounce` consecutive ticks, and not again for that coin
+    ## within `cooldown` seconds (tick time). 'changed' rules fire on every
+    ## change of the value instead.
+
+    def __init__(self, name: str, metric: str, op: str, value=None, coins: Optional[Iterable[str]] = None,
+                 debounce: int = 1, cooldown: float = 0.0, message: Optional[str] = None):
+        if op not in THRESHOLD_OPS + EQUALITY_OPS + (CHANGE_OP,):
+            raise ValueError(f"Invalid operator: {op}")
+        if op in THRESHOLD_OPS:
+            value = float(value)
+        elif op in EQUALITY_OPS and value is None:
+            raise ValueError(f"Rule {name} needs a value to compare with")
+
+        self.name = name
+        self.metric = metric
+        self.getter = metric_getter(metric)
+        self.op = op
+        self.value = value
+        self.coins = frozenset(coin.upper() for coin in coins) if coins else None
+        self.debounce = max(1, int(debounce))
+        self.cooldown = cooldown
+        self.message = message
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> 'Rule':
+        return cls(
+            spec['name'], spec['metric'], spec['op'], spec.get('value'), spec.get('coins'),
+            spec.get('debounce', 1), spec.get('cooldown', 0.0), spec.get('message')
+        )
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, {self.metric!r}, {self.op!r}, {self.value!r})"
+
+
+def load_rules(path: str) -> List[Rule]:
+    # JSON list of rule objects: name, metric, op, value and optionally
+    # coins, debounce, cooldown and message
+    with open(path) as f:
+        return [Rule.from_dict(spec) for spec in json.load(f)]
+
+
+class _ThresholdGroup:
+    ## Rules sharing a metric and operator, sorted by threshold. For a value
+    ## v the true rules are a prefix ('>', '>=') or suffix ('<', '<=') of
+    ## the sorted list, so one bisect gives the cut, and only the rules
+    ## between the previous and the new cut changed state.
+
+    def __init__(self, op: str, rules: List[Rule]):
+        self.op = op
+        self.rules = sorted(rules, key=lambda rule: rule.value)
+        self.thresholds = [rule.value for rule in self.rules]
+        self.upper = op in ('>', '>=')
+        # Cut when there is no value: nothing is true
+        self.empty = 0 if self.upper else len(self.rules)
+
+    def cut(self, value) -> int:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return self.empty
+        if self.op == '>':
+            return bisect_left(self.thresholds, value) # thresholds < v
+        if self.op == '>=':
+            return bisect_right(self.thresholds, value) # thresholds <= v
+        if self.op == '<':
+            return bisect_right(self.thresholds, value) # thresholds > v from here
+        return bisect_left(self.thresholds, value) # thresholds >= v from here
+
+    def transition(self, old: int, new: int) -> Tuple[List[Rule], List[Rule]]:
+        # (rules that became true, rules that became false)
+        if old == new:
+            return [], []
+        low, high = min(old, new), max(old, new)
+        changed = self.rules[low:high]
+        if (new > old) == self.upper:
+            return changed, []
+        return [], changed
+
+
+class _EqualityGroup:
+    ## '==' / '!=' rules on one metric, keyed by the value they compare with
+
+    def __init__(self, rules: List[Rule]):
+        self.equal: Dict[object, List[Rule]] = {}
+        self.not_equal: Dict[object, List[Rule]] = {}
+        self.not_equal_all: List[Rule] = []
+        for rule in rules:
+            target = self.equal if rule.op == '==' else self.not_equal
+            target.setdefault(rule.value, []).append(rule)
+            if rule.op == '!=':
+                self.not_equal_all.append(rule)
+
+    def _true_for(self, value) -> List[Rule]:
+        # Every rule true for value; only needed when going to or from None
+        return self.equal.get(value, []) + [rule for rule in self.not_equal_all if rule.value != value]
+
+    def transition(self, old, new) -> Tuple[List[Rule], List[Rule]]:
+        # (rules that became true, rules that became false). None means no
+        # value, for which nothing is true.
+        if old == new:
+            return [], []
+        if old is None:
+            return self._true_for(new), []
+        if new is None:
+            return [], self._true_for(old)
+        became_true = self.equal.get(new, []) + self.not_equal.get(old, [])
+        became_false = self.equal.get(old, []) + self.not_equal.get(new, [])
+        return became_true, became_false
+
+
+class AlertEngine:
+    ## Evaluates rules incrementally against each coin's newest analysis and
+    ## dispatches alerts to sinks when a rule fires.
+    ##
+    ## Per tick the work is one metric read per metric in use, a bisect per
+    ## threshold group and a dict lookup per equality group, plus the rules
+    ## that actually changed state, so thousands of rules stay cheap.
+
+    def __init__(self, rules: Iterable[Rule] = (), sinks: Iterable = (), clock: Callable[[], float] = time.time):
+        self.sinks = list(sinks)
+        self._clock = clock
+        self.fired = 0
+        self._rules: List[Rule] = []
+        # Per coin: threshold cuts, last metric values, debounce counters
+        # and last firing time per rule
+        self._cuts: Dict[Tuple[str, int], int] = {}
+        self._values: Dict[Tuple[str, str, Optional[str]], object] = {}
+        self._pending: Dict[str, Dict[Rule, int]] = {}
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self.add_rules(rules)
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def add_rules(self, rules: Iterable[Rule]):
+        self._rules.extend(rules)
+        self._build()
+        # Cut positions refer to the old group layout
+        self._cuts.clear()
+        self._values.clear()
+        self._pending.clear()
+
+    def _build(self):
+        # Index rules by coin scope (None = every coin), then metric
+        scoped: Dict[Optional[str], Dict[str, List[Rule]]] = {}
+        for rule in self._rules:
+            for scope in (rule.coins or [None]):
+                scoped.setdefault(scope, {}).setdefault(rule.metric, []).append(rule)
+
+        self._groups: Dict[Optional[str], List[Tuple[str, Callable, List]]] = {}
+        group_id = 0
+        for scope, by_metric in scoped.items():
+            entries = []
+            for metric, rules in by_metric.items():
+                thresholds = []
+                for op in THRESHOLD_OPS:
+                    matching = [rule for rule in rules if rule.op == op]
+                    if matching:
+                        thresholds.append((group_id, _ThresholdGroup(op, matching)))
+                        group_id += 1
+                equality = [rule for rule in rules if rule.op in EQUALITY_OPS]
+                changes = [rule for rule in rules if rule.op == CHANGE_OP]
+                entries.append((
+                    metric, rules[0].getter,
+                    [thresholds, _EqualityGroup(equality) if equality else None, changes]
+                ))
+            self._groups[scope] = entries
+
+    def evaluate(self, coin: str, analysis: Dict, timestamp: Optional[float] = None) -> List[Dict]:
+        # Fold one tick's analysis into the rule states; returns the alerts
+        # fired (already sent to the sinks)
+        if not analysis or not self._rules:
+            return []
+        coin = coin.upper()
+        now = timestamp if timestamp is not None else self._clock()
+
+        became_true: List[Tuple[Rule, object]] = []
+        became_false: List[Rule] = []
+        changed: List[Tuple[Rule, object, object]] = []
+
+        for scope in (None, coin):
+            for metric, getter, (thresholds, equality, changes) in self._groups.get(scope, ()):
+                value = getter(analysis)
+                value_key = (coin, metric, scope)
+                previous = self._values.get(value_key)
+                self._values[value_key] = value
+
+                for group_id, group in thresholds:
+                    key = (coin, group_id)
+                    old = self._cuts.get(key, group.empty)
+                    new = group.cut(value)
+                    if old != new:
+                        self._cuts[key] = new
+                        rising, falling = group.transition(old, new)
+                        became_true.extend((rule, value) for rule in rising)
+                        became_false.extend(falling)
+
+                if equality is not None:
+                    rising, falling = equality.transition(previous, value)
+                    became_true.extend((rule, value) for rule in rising)
+                    became_false.extend(falling)
+
+                if changes and previous is not None and value != previous:
+                    changed.extend((rule, previous, value) for rule in changes)
+
+        pending = self._pending.setdefault(coin, {})
+        for rule in became_false:
+            pending.pop(rule, None)
+
+        alerts = []
+        # Rules still waiting out their debounce count this tick too
+        for rule, count in list(pending.items()):
+            if count > 0:
+                pending[rule] = count + 1
+                if pending[rule] >= rule.debounce:
+                    pending[rule] = 0 # Fired (or suppressed) until it turns false
+                    self._fire(alerts, rule, coin, now, rule.getter(analysis))
+
+        for rule, value in became_true:
+            if rule.debounce <= 1:
+                pending[rule] = 0
+                self._fire(alerts, rule, coin, now, value)
+            else:
+                pending[rule] = 1
+
+        for rule, previous, value in changed:
+            self._fire(alerts, rule, coin, now, value, previous)
+
+        return alerts
+
+    def _fire(self, alerts: List[Dict], rule: Rule, coin: str, now: float, value, previous=None):
+        key = (coin, rule.name)
+        last = self._last_fired.get(key)
+        if last is not None and now - last < rule.cooldown:
+            return
+        self._last_fired[key] = now
+
+        if rule.message:
+            message = rule.message.format(coin=coin, value=value, previous=previous, threshold=rule.value)
+        elif rule.op == CHANGE_OP:
+            message = f"{coin} {rule.metric} changed from {previous} to {value}"
+        else:
+            message = f"{coin} {rule.metric} {rule.op} {rule.value} (now {value})"
+
+        alert = {
+            'rule': rule.name,
+            'coin': coin,
+            'timestamp': now,
+            'metric': rule.metric,
+            'op': rule.op,
+            'threshold': rule.value,
+            'value': value,
+            'previous': previous,
+            'message': message
+        }
+        alerts.append(alert)
+        self.fired += 1
+        for sink in self.sinks:
+            sink.send(alert)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
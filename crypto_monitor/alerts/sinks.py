@@ -0,0 +1,98 @@
+import json
+import logging
+import queue
+import sys
+import threading
+from typing import Dict, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSink:
+    ## Receives alerts fired by AlertEngine. send() is called on the
+    ## monitor's thread, so sinks must not block it.
+
+    def send(self, alert: Dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StdoutSink(AlertSink):
+    ## One line per alert, or the full alert as JSON. Without a stream,
+    ## sys.stdout is looked up per alert so output redirected by the rich
+    ## dashboard still lands above it.
+
+    def __init__(self, stream: Optional[TextIO] = None, as_json: bool = False):
+        self.stream = stream
+        self.as_json = as_json
+
+    def send(self, alert: Dict):
+        stream = self.stream if self.stream is not None else sys.stdout
+        if self.as_json:
+            stream.write(json.dumps(alert, default=str) + '\n')
+        else:
+            stream.write(f"[ALERT] {alert['rule']}: {alert['message']}\n")
+        stream.flush()
+
+
+class FileSink(AlertSink):
+    ## Alerts appended to a file as JSON lines
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def send(self, alert: Dict):
+        self._file.write(json.dumps(alert, default=str) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink(AlertSink):
+    ## POSTs each alert as JSON from a background thread. Alerts queue up
+    ## to `max_queue` while the endpoint is slow; beyond that they are
+    ## dropped (counted in `dropped`) rather than stalling the monitor.
+
+    def __init__(self, url: str, timeout: float = 5.0, max_queue: int = 1000, session=None):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.session = session if session is not None else requests.Session()
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='alert-webhook', daemon=True)
+        self._thread.start()
+
+    def send(self, alert: Dict):
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                return
+            try:
+                response = self.session.post(
+                    self.url, data=json.dumps(alert, default=str),
+                    headers={'Content-Type': 'application/json'}, timeout=self.timeout
+                )
+                response.raise_for_status()
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Alert webhook failed: %s", e)
+
+    def close(self):
+        # Deliver what is queued, then stop the thread
+        self._queue.put(None)
+        self._thread.join()
@@ -2,6 +2,59 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List
 
+# Block length for the vectorized HA open recurrence (see ha_open_recurrence).
+# Each block is solved exactly in closed form from the carry out of the
+# previous block, so the length only trades matrix size against the number
+# of sequential steps; 64 keeps every power-of-two weight (down to 2**-63) a
+# normal float64.
+_HA_BLOCK = 64
+_HA_LAG = np.subtract.outer(np.arange(_HA_BLOCK), np.arange(_HA_BLOCK))
+_HA_WEIGHTS = np.where(_HA_LAG > 0, np.power(0.5, _HA_LAG.clip(min=0)), 0.0)
+_HA_DECAY = np.power(0.5, np.arange(_HA_BLOCK))
+
+
+def ha_open_recurrence(first_open, ha_close: np.ndarray) -> np.ndarray:
+    # Solve ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2 along the last axis.
+    # Within a block of length B the solution is closed form:
+    #   ha_open[k] = a0 * 2**-k + sum_{j<k} ha_close[j] * 2**-(k-j)
+    # so each block is one matrix product and only the carry between blocks
+    # is sequential (n / B Python steps instead of n). Works on 1-D series
+    # and on 2-D (coin x time) panels alike.
+    ha_close = np.asarray(ha_close, dtype=float)
+    carry = np.asarray(first_open, dtype=float)
+    n = ha_close.shape[-1]
+    ha_open = np.empty_like(ha_close)
+
+    for start in range(0, n, _HA_BLOCK):
+        stop = min(start + _HA_BLOCK, n)
+        length = stop - start
+        weights = _HA_WEIGHTS[:length, :length]
+        ha_open[..., start:stop] = (
+            ha_close[..., start:stop] @ weights.T + carry[..., None] * _HA_DECAY[:length]
+        )
+        carry = (ha_open[..., stop - 1] + ha_close[..., stop - 1]) / 2
+
+    return ha_open
+
+
+def classify_trend(ha_open: float, ha_high: float, ha_low: float, ha_close: float) -> str:
+    # Scalar version of the rules in HeikinAshi.get_trend_signals
+    if ha_close > ha_open and ha_low == ha_open:  # No lower shadow
+        return 'bullish'
+    if ha_close < ha_open and ha_high == ha_open:  # No upper shadow
+        return 'bearish'
+    return 'neutral'
+
+
+def classify_trends(ha_open: np.ndarray, ha_high: np.ndarray, ha_low: np.ndarray,
+                    ha_close: np.ndarray) -> np.ndarray:
+    # Array version of classify_trend
+    return np.select(
+        [(ha_close > ha_open) & (ha_low == ha_open), (ha_close < ha_open) & (ha_high == ha_open)],
+        ['bullish', 'bearish'], 'neutral'
+    ).astype(object)
+
+
 class HeikinAshi:
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -11,18 +64,46 @@ class HeikinAshi:
         ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
 
         # Calculate HA open - first row uses original opening price
-        ha_df['ha_open'] = df['open'].copy()
-        for i in range(1, len(df)):
-            ha_df.loc[df.index[i], 'ha_open'] = (
-                ha_df.loc[df.index[i-1], 'ha_open'] + ha_df.loc[df.index[i-1], 'ha_close']
-            )/2
+        if len(df):
+            ha_df['ha_open'] = ha_open_recurrence(
+                float(df['open'].iloc[0]), ha_df['ha_close'].to_numpy(dtype=float)
+            )
+        else:
+            ha_df['ha_open'] = df['open'].astype(float)
 
         # Calculate HA high and low
         ha_df['ha_high'] = ha_df[['high', 'ha_open', 'ha_close']].max(axis=1)
         ha_df['ha_low'] = ha_df[['low', 'ha_open', 'ha_close']].min(axis=1)
 
         return ha_df
-    
+
+    def calculate_panel(self, panel: Dict) -> Dict[str, np.ndarray]:
+        ## calculate and get_trend_signals for every coin of a panel (see
+        ## analysis/panel.py) at once: ha_open/high/low/close and trend as
+        ## coin x time arrays, NaN (None for trend) where a row is padded.
+        open_, high, low, close = (np.asarray(panel[name], dtype=float) for name in ('open', 'high', 'low', 'close'))
+        ha_close = (open_ + high + low + close) / 4
+        if not ha_close.size:
+            empty = np.empty(ha_close.shape)
+            return {'ha_open': empty, 'ha_high': empty, 'ha_low': empty, 'ha_close': ha_close,
+                    'trend': np.empty(ha_close.shape, dtype=object)}
+
+        # Rows are right-aligned. Padding each row with its first open makes
+        # the recurrence hold that open until the row's first point, where
+        # the single-coin calculation starts from it too.
+        padded = np.isnan(ha_close)
+        first = ha_close.shape[1] - np.asarray(panel['lengths'])
+        first_open = open_[np.arange(len(open_)), np.minimum(first, ha_close.shape[1] - 1)]
+        ha_open = ha_open_recurrence(first_open, np.where(padded, first_open[:, None], ha_close))
+        ha_open[padded] = np.nan
+
+        ha_high = np.maximum(np.maximum(high, ha_open), ha_close)
+        ha_low = np.minimum(np.minimum(low, ha_open), ha_close)
+        trend = classify_trends(ha_open, ha_high, ha_low, ha_close)
+        trend[padded] = None
+
+        return {'ha_open': ha_open, 'ha_high': ha_high, 'ha_low': ha_low, 'ha_close': ha_close, 'trend': trend}
+
     def get_trend_signals(self, ha_df: pd.DataFrame) -> pd.DataFrame:
         df = ha_df.copy()
 
@@ -41,4 +122,54 @@ class HeikinAshi:
         )
         df.loc[bearish_mask, 'trend'] = 'bearish'
 
-        return df
\ No newline at end of file
+        return df
+
+
+class StreamingHeikinAshi:
+    ## Incremental Heikin Ashi: keeps the previous HA open/close per coin so
+    ## each new candle costs O(1) instead of recomputing the whole history
+
+    def __init__(self):
+        self._state: Dict[str, tuple] = {}
+
+    def reset(self, coin: str = None):
+        if coin is None:
+            self._state.clear()
+        else:
+            self._state.pop(coin, None)
+
+    def seed(self, coin: str, ha_df: pd.DataFrame):
+        # Continue from the last row of a batch result (e.g. after a backfill)
+        if ha_df.empty:
+            self.reset(coin)
+            return
+        last = ha_df.iloc[-1]
+        self._state[coin] = (float(last['ha_open']), float(last['ha_close']))
+
+    def update(self, coin: str, open_: float, high: float, low: float, close: float) -> Dict:
+        ha_close = (open_ + high + low + close) / 4
+
+        prev = self._state.get(coin)
+        if prev is None:
+            ha_open = float(open_)
+        else:
+            ha_open = (prev[0] + prev[1]) / 2
+
+        ha_high = max(high, ha_open, ha_close)
+        ha_low = min(low, ha_open, ha_close)
+        self._state[coin] = (ha_open, ha_close)
+
+        return {
+            'ha_open': ha_open,
+            'ha_high': ha_high,
+            'ha_low': ha_low,
+            'ha_close': ha_close,
+            'trend': classify_trend(ha_open, ha_high, ha_low, ha_close)
+        }
+
+    def update_many(self, coin: str, df: pd.DataFrame) -> List[Dict]:
+        # Feed several candles in order, returning one HA candle per row
+        return [
+            self.update(coin, o, h, l, c)
+            for o, h, l, c in zip(df['open'], df['high'], df['low'], df['close'])
+        ]
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+from crypto_monitor.analysis.heikin_ashi import HeikinAshi
+from crypto_monitor.analysis.spread_analyzer import SpreadAnalyzer
+from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer
+from crypto_monitor.market_data.history import PRICE_COLUMNS, expand_ticks
+
+# A panel holds many coins' price histories as coin x time arrays, one per
+# PRICE_COLUMNS column, plus 'coins' (row labels) and 'lengths' (points per
+# row). Rows are right-aligned: each coin's newest point is in the last
+# column and shorter histories are padded at the start with NaN (NaT for
+# timestamps). Coins without any points are left out.
+
+
+def _right_align(columns: Dict[str, np.ndarray], valid: np.ndarray) -> Dict[str, np.ndarray]:
+    # Move each row's valid points to the end, keeping their order
+    if valid.all():
+        return columns
+    order = np.argsort(valid, axis=1, kind='stable')
+    aligned = {}
+    for name, values in columns.items():
+        values = np.take_along_axis(values, order, axis=1)
+        values[~np.take_along_axis(valid, order, axis=1)] = np.datetime64('NaT') if values.dtype.kind == 'M' else np.nan
+        aligned[name] = values
+    return aligned
+
+
+def panel_from_prices(coins: Sequence[str], bid: np.ndarray, ask: np.ndarray, last: np.ndarray,
+                      timestamp: np.ndarray = None) -> Dict:
+    ## Panel from coin x time bid/ask/last arrays, NaN where a coin has no
+    ## price. Missing points are dropped, not carried forward.
+    bid, ask, last = (np.atleast_2d(np.asarray(values, dtype=float)) for values in (bid, ask, last))
+    if timestamp is None:
+        timestamp = np.full(bid.shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+    else:
+        timestamp = np.broadcast_to(np.asarray(timestamp, dtype='datetime64[ns]'), bid.shape)
+
+    valid = ~(np.isnan(bid) | np.isnan(ask) | np.isnan(last))
+    lengths = valid.sum(axis=1)
+    keep = lengths > 0
+    columns = expand_ticks({'timestamp': timestamp[keep], 'bid': bid[keep], 'ask': ask[keep], 'last': last[keep]})
+    panel = _right_align(columns, valid[keep])
+    # Trim columns no coin has a point in
+    width = int(lengths.max()) if keep.any() else 0
+    panel = {name: values[:, values.shape[1] - width:] for name, values in panel.items()}
+    panel['coins'] = [coin for coin, kept in zip(coins, keep) if kept]
+    panel['lengths'] = lengths[keep]
+    return panel
+
+
+def panel_from_histories(histories: Mapping[str, Mapping[str, np.ndarray]], length: Optional[int] = None) -> Dict:
+    ## Panel from per-coin column arrays, e.g. PriceHistory.arrays(). Only
+    ## the newest `length` points of each coin are kept when given.
+    histories = {coin: arrays for coin, arrays in histories.items() if len(arrays.get('close', ()))}
+    sizes = [len(arrays['close']) for arrays in histories.values()]
+    width = min(max(sizes, default=0), length) if length is not None else max(sizes, default=0)
+
+    panel = {
+        name: np.full((len(histories), width), np.datetime64('NaT') if dtype.startswith('datetime') else np.nan, dtype=dtype)
+        for name, dtype in PRICE_COLUMNS.items()
+    }
+    lengths = np.empty(len(histories), dtype=np.intp)
+    for row, arrays in enumerate(histories.values()):
+        size = min(len(arrays['close']), width)
+        lengths[row] = size
+        if not size:
+            continue
+        for name in PRICE_COLUMNS:
+            panel[name][row, width - size:] = arrays[name][-size:]
+    panel['coins'] = list(histories)
+    panel['lengths'] = lengths
+    return panel
+
+
+def panel_from_frame(df: pd.DataFrame, length: Optional[int] = None) -> Dict:
+    ## Panel from a long frame with a (coin, timestamp) MultiIndex and bid,
+    ## ask and last columns (further PRICE_COLUMNS are derived from them)
+    coins = df.index.get_level_values(0)
+    histories = {}
+    for coin, group in df.groupby(coins, sort=False):
+        group = group.sort_index(level=1)
+        histories[coin] = expand_ticks({
+            'timestamp': group.index.get_level_values(1).values,
+            'bid': group['bid'].to_numpy(), 'ask': group['ask'].to_numpy(), 'last': group['last'].to_numpy()
+        })
+    return panel_from_histories(histories, length)
+
+
+def cross_section(panel: Dict, spread_analyzer: SpreadAnalyzer = None, heikin_ashi: HeikinAshi = None,
+                  volume_analyzer: VolumeAnalyzer = None,
+                  order_book_volumes: Mapping[str, Tuple[float, float]] = None) -> pd.DataFrame:
+    ## One row per coin with its latest state: price, spread statistics and
+    ## condition, Heikin Ashi trend and (given per-coin (buy, sell) notional
+    ## totals, e.g. from OrderBookTracker.volumes) order book imbalance.
+    ## Every column is computed for all coins in one vectorized pass.
+    spread_analyzer = spread_analyzer or SpreadAnalyzer()
+    heikin_ashi = heikin_ashi or HeikinAshi()
+    volume_analyzer = volume_analyzer or VolumeAnalyzer()
+    coins = panel['coins']
+
+    spread = spread_analyzer.analyze_panel(panel)
+    ha = heikin_ashi.calculate_panel(panel)
+    snapshot = {
+        'points': panel['lengths'],
+        'timestamp': panel['timestamp'][:, -1] if len(coins) else np.empty(0, dtype='datetime64[ns]'),
+        'last': panel['last'][:, -1] if len(coins) else np.empty(0),
+        'spread': spread.get('current_spread', np.empty(0)),
+        'spread_percentage': spread.get('current_spread_percentage', np.empty(0)),
+        'avg_spread_percentage': spread.get('avg_spread_percentage', np.empty(0)),
+        'volatility': spread.get('volatility', np.empty(0)),
+        'spread_zscore': spread.get('spread_zscore', np.empty(0)),
+        'condition': spread['condition'],
+        'trend': ha['trend'][:, -1] if len(coins) else np.empty(0, dtype=object)
+    }
+
+    if order_book_volumes is not None:
+        volumes = np.array([order_book_volumes.get(coin) or (np.nan, np.nan) for coin in coins], dtype=float).reshape(-1, 2)
+        book = volume_analyzer.analyze_order_book_panel(volumes[:, 0], volumes[:, 1])
+        missing = np.isnan(volumes).any(axis=1)
+        snapshot['imbalance_ratio'] = np.where(missing, np.nan, book['imbalance_ratio'])
+        snapshot['dominant_side'] = np.where(missing, None, book['dominant_side'])
+
+    return pd.DataFrame(snapshot, index=pd.Index(coins, name='coin'))
+
+
+def rank_coins(snapshot: pd.DataFrame, by: str = 'spread_percentage', ascending: bool = False,
+               top: Optional[int] = None) -> pd.DataFrame:
+    # Coins ordered by one snapshot column (widest spread first by default);
+    # coins without a value go last
+    if by not in snapshot:
+        raise ValueError(f"Unknown ranking column: {by}")
+    ranked = snapshot.sort_values(by, ascending=ascending, na_position='last', kind='stable')
+    return ranked.head(top) if top is not None else ranked
@@ -1,11 +1,255 @@
+import heapq
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+# Points kept per coin by the streaming statistics unless told otherwise
+DEFAULT_MAX_POINTS = 10_000
+
+class RollingQuantile:
+    ## One quantile of a sliding window, with pandas' linear interpolation.
+    ##
+    ## Two heaps split the window around the quantile's position: `_low` (a
+    ## max-heap of negated values) holds the k + 1 smallest values, where
+    ## k = floor(q * (n - 1)), and `_high` the rest, so sorted[k] and
+    ## sorted[k + 1] are their tops. Removed values are only marked and
+    ## dropped once they reach a top, and the heaps are rebuilt when marked
+    ## values make up half of them. add() and remove() are O(log n)
+    ## amortized.
+
+    def __init__(self, q: float):
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be within [0, 1], got {q}")
+        self.q = q
+        self._low: List[float] = []
+        self._high: List[float] = []
+        self._low_size = 0 # Values in each heap that are not marked removed
+        self._high_size = 0
+        self._removed: Dict[float, int] = {}
+
+    def __len__(self) -> int:
+        return self._low_size + self._high_size
+
+    def _prune(self, heap: List[float], sign: float):
+        # Drop marked values from the top of a heap
+        while heap:
+            value = sign * heap[0]
+            count = self._removed.get(value)
+            if not count:
+                return
+            if count == 1:
+                del self._removed[value]
+            else:
+                self._removed[value] = count - 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        n = len(self)
+        target = math.floor(self.q * (n - 1)) + 1 if n else 0
+        while self._low_size > target:
+            value = -heapq.heappop(self._low)
+            heapq.heappush(self._high, value)
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1.0)
+        while self._low_size < target:
+            value = heapq.heappop(self._high)
+            heapq.heappush(self._low, -value)
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1.0)
+
+        if len(self._low) + len(self._high) > 2 * n + 64:
+            self._compact()
+
+    def _compact(self):
+        # Rebuild both heaps without the marked values
+        removed = self._removed
+        kept = []
+        for heap, sign in ((self._low, -1.0), (self._high, 1.0)):
+            values = []
+            for stored in heap:
+                value = sign * stored
+                if removed.get(value):
+                    removed[value] -= 1
+                else:
+                    values.append(stored)
+            heapq.heapify(values)
+            kept.append(values)
+        self._low, self._high = kept
+        self._low_size, self._high_size = len(self._low), len(self._high)
+        self._removed = {}
+
+    def add(self, value: float):
+        if self._low_size and value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        self._rebalance()
+
+    def remove(self, value: float):
+        # `value` must be in the window
+        self._removed[value] = self._removed.get(value, 0) + 1
+        if self._low_size and value <= -self._low[0]:
+            self._low_size -= 1
+            self._prune(self._low, -1.0)
+        else:
+            self._high_size -= 1
+            self._prune(self._high, 1.0)
+        self._rebalance()
+
+    def value(self) -> Optional[float]:
+        n = len(self)
+        if not n:
+            return None
+        position = self.q * (n - 1)
+        lower = -self._low[0]
+        upper = self._high[0] if self._high_size else lower
+        return lower + (upper - lower) * (position - math.floor(position))
+
+class RollingSpreadStats:
+    ## Streaming spread statistics for one coin over a rolling window.
+    ##
+    ## The window is bounded by `max_points` (DEFAULT_MAX_POINTS unless
+    ## given) and/or `window` seconds; both None keeps everything. Per update:
+    ## - mean/variance of spread percentage: Welford, with the inverse
+    ##   update for points leaving the window - O(1)
+    ## - min/max absolute spread: monotonic deques - amortized O(1)
+    ## - EWMA of spread percentage - O(1), not windowed
+    ## - quantiles of spread percentage: a RollingQuantile per quantile -
+    ##   O(log n) amortized
+
+    def __init__(self, window: Optional[float] = None, max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                 ewma_alpha: float = 0.1, quantiles: Tuple[float, ...] = (0.5, 0.95)):
+        self.window = window
+        self.max_points = max_points
+        self.ewma_alpha = ewma_alpha
+        self.quantiles = quantiles
+
+        self._points: Deque[Tuple[int, float, float, float]] = deque() # (seq, ts, abs, pct)
+        self._seq = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._abs_sum = 0.0
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._quantiles = {q: RollingQuantile(q) for q in quantiles}
+        self.ewma: Optional[float] = None
+        self.current: Optional[Tuple[float, float]] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def update(self, timestamp: float, spread_absolute: float, spread_percentage: float):
+        seq = self._seq
+        self._seq += 1
+        self._points.append((seq, timestamp, spread_absolute, spread_percentage))
+        self.current = (spread_absolute, spread_percentage)
+
+        # Welford add
+        n = len(self._points)
+        delta = spread_percentage - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (spread_percentage - self._mean)
+        self._abs_sum += spread_absolute
+
+        while self._max and self._max[-1][1] <= spread_absolute:
+            self._max.pop()
+        self._max.append((seq, spread_absolute))
+        while self._min and self._min[-1][1] >= spread_absolute:
+            self._min.pop()
+        self._min.append((seq, spread_absolute))
+
+        for quantile in self._quantiles.values():
+            quantile.add(spread_percentage)
+
+        if self.ewma is None:
+            self.ewma = spread_percentage
+        else:
+            self.ewma += self.ewma_alpha * (spread_percentage - self.ewma)
+
+        self._evict(timestamp)
+
+    def _evict(self, now: float):
+        while self._points and (
+            (self.max_points is not None and len(self._points) > self.max_points) or
+            (self.window is not None and self._points[0][1] < now - self.window)
+        ):
+            seq, _, spread_absolute, spread_percentage = self._points.popleft()
+
+            # Welford remove
+            n = len(self._points)
+            if n == 0:
+                self._mean = 0.0
+                self._m2 = 0.0
+            else:
+                old_mean = self._mean
+                self._mean = (old_mean * (n + 1) - spread_percentage) / n
+                self._m2 -= (spread_percentage - old_mean) * (spread_percentage - self._mean)
+                self._m2 = max(self._m2, 0.0)
+            self._abs_sum -= spread_absolute
+
+            if self._max and self._max[0][0] == seq:
+                self._max.popleft()
+            if self._min and self._min[0][0] == seq:
+                self._min.popleft()
+            for quantile in self._quantiles.values():
+                quantile.remove(spread_percentage)
+
+    @property
+    def mean_percentage(self) -> Optional[float]:
+        return self._mean if self._points else None
+
+    @property
+    def mean_absolute(self) -> Optional[float]:
+        return self._abs_sum / len(self._points) if self._points else None
+
+    @property
+    def std_percentage(self) -> Optional[float]:
+        # Sample standard deviation, matching pandas' Series.std()
+        if len(self._points) < 2:
+            return None
+        return math.sqrt(self._m2 / (len(self._points) - 1))
+
+    @property
+    def max_absolute(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min_absolute(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        # Linear interpolation, matching pandas' default; only the quantiles
+        # given to the constructor are tracked
+        if q not in self._quantiles:
+            raise ValueError(f"Quantile {q} is not tracked (tracked: {', '.join(map(str, self.quantiles))})")
+        return self._quantiles[q].value()
+
+    def zscore(self) -> Optional[float]:
+        # How unusual the current spread percentage is within the window
+        std = self.std_percentage
+        if self.current is None or not std:
+            return None
+        return (self.current[1] - self._mean) / std
 
 class SpreadAnalyzer:
     ## Analyzes bid-ask spreads to determine market liquidity conditions
 
-    def __init__(self):
+    def __init__(self, window: Optional[float] = None, max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                 ewma_alpha: float = 0.1, quantiles: Tuple[float, ...] = (0.5, 0.95)):
+        # Settings for the streaming per-coin statistics used by update();
+        # max_points=None without a window keeps every point
+        self.window = window
+        self.max_points = max_points
+        self.ewma_alpha = ewma_alpha
+        self.quantiles = quantiles
+        self._stats: Dict[str, RollingSpreadStats] = {}
+
         # Default thresholds in percentage
         self.default_thresholds = {
             'tight': 0.1, # 0.1% spread
@@ -22,20 +266,82 @@ class SpreadAnalyzer:
     def get_thresholds(self,coin: str) -> Dict[str, float]:
         # Get appropriate thresholds for a given coin
         return self.coin_thresholds.get(coin, self.default_thresholds)
+
+    def threshold_vectors(self, coins: Sequence[str]) -> Dict[str, np.ndarray]:
+        # Per-coin thresholds as arrays aligned with `coins`, for panels
+        thresholds = [self.get_thresholds(coin) for coin in coins]
+        return {
+            level: np.array([coin_thresholds[level] for coin_thresholds in thresholds], dtype=float)
+            for level in ('tight', 'normal', 'wide')
+        }
+
+    def classify_panel(self, coins: Sequence[str], spread_percentage: np.ndarray) -> np.ndarray:
+        # Vectorized classify: one condition per coin (or per coin and
+        # point, for a coin x time array)
+        spread_percentage = np.asarray(spread_percentage, dtype=float)
+        thresholds = self.threshold_vectors(coins)
+        shape = (-1,) + (1,) * (spread_percentage.ndim - 1)
+        tight = thresholds['tight'].reshape(shape)
+        normal = thresholds['normal'].reshape(shape)
+        return np.select(
+            [spread_percentage <= tight, spread_percentage <= normal], ['TIGHT', 'NORMAL'], 'WIDE'
+        ).astype(object)
         
     def calculate_volatility(self, df: pd.DataFrame) -> Optional[float]:
         # Calculate price volatility using spread data
         if df.empty or len(df) < 2:
             return None
-            
-            return df['spread_percentage'].std()
+
+        return df['spread_percentage'].std()
+
+    def classify(self, coin: str, spread_percentage: float) -> Tuple[str, str]:
+        # Market condition and message for a spread percentage
+        thresholds = self.get_thresholds(coin)
+
+        if spread_percentage <= thresholds['tight']:
+            return 'TIGHT', 'High liquidity = favorable trading conditions'
+        elif spread_percentage <= thresholds['normal']:
+            return 'NORMAL', 'Normal market conditions'
+        else:
+            return 'WIDE', 'Low liquidity - exercise caution'
+
+    def get_stats(self, coin: str) -> RollingSpreadStats:
+        if coin not in self._stats:
+            self._stats[coin] = RollingSpreadStats(
+                window=self.window, max_points=self.max_points,
+                ewma_alpha=self.ewma_alpha, quantiles=self.quantiles
+            )
+        return self._stats[coin]
+
+    def update(self, coin: str, spread_absolute: float, spread_percentage: float,
+               timestamp: Optional[float] = None) -> Dict:
+        ## Streaming counterpart of analyze_spread: fold one tick into the
+        ## coin's rolling statistics and classify it, without a DataFrame.
+        ## `timestamp` is in seconds and only needed for time windows.
+        stats = self.get_stats(coin)
+        stats.update(timestamp if timestamp is not None else 0.0, spread_absolute, spread_percentage)
+        condition, message = self.classify(coin, spread_percentage)
+
+        return {
+            'current_spread': spread_absolute,
+            'current_spread_percentage': spread_percentage,
+            'avg_spread': stats.mean_absolute,
+            'avg_spread_percentage': stats.mean_percentage,
+            'max_spread': stats.max_absolute,
+            'min_spread': stats.min_absolute,
+            'volatility': stats.std_percentage,
+            'ewma_spread_percentage': stats.ewma,
+            'spread_quantiles': {q: stats.quantile(q) for q in stats.quantiles},
+            'spread_zscore': stats.zscore(),
+            'condition': condition,
+            'message': message
+        }
         
     def analyze_spread(self, df: pd.DataFrame, coin: str) -> Dict:
         if df.empty:
             return {}
         
         latest = df.iloc[-1]
-        thresholds = self.get_thresholds(coin)
 
         # Calculate spread statistics
         spread_stats = {
@@ -49,19 +355,41 @@ class SpreadAnalyzer:
         }
 
         # Determine market condition
-        if latest['spread_percentage'] <= thresholds['tight']:
-            condition = 'TIGHT'
-            message = 'High liquidity = favorable trading conditions'
-        elif latest['spread_percentage'] <= thresholds['normal']:
-            condition = 'NORMAL'
-            message = 'Normal market conditions'
-        else:
-            condition = 'WIDE'
-            message = 'Low liquidity - exercise caution'
+        condition, message = self.classify(coin, latest['spread_percentage'])
 
         spread_stats.update({
             'condition': condition,
             'message': message
         })
 
-        return spread_stats
\ No newline at end of file
+        return spread_stats
+
+    def analyze_panel(self, panel: Dict) -> Dict[str, np.ndarray]:
+        ## analyze_spread for every coin of a panel (see analysis/panel.py)
+        ## at once. Each statistic is an array aligned with panel['coins'].
+        coins = panel['coins']
+        spread_absolute = panel['spread_absolute']
+        spread_percentage = panel['spread_percentage']
+        points = panel['lengths']
+        if not len(coins):
+            return {'condition': np.empty(0, dtype=object)}
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_percentage = np.nansum(spread_percentage, axis=1) / points
+            # Sample standard deviation like pandas' Series.std(); NaN below two points
+            deviation = np.nansum((spread_percentage - avg_percentage[:, None]) ** 2, axis=1)
+            volatility = np.where(points > 1, np.sqrt(deviation / (points - 1)), np.nan)
+            current_percentage = spread_percentage[:, -1]
+            zscore = (current_percentage - avg_percentage) / volatility
+
+            return {
+                'current_spread': spread_absolute[:, -1],
+                'current_spread_percentage': current_percentage,
+                'avg_spread': np.nansum(spread_absolute, axis=1) / points,
+                'avg_spread_percentage': avg_percentage,
+                'max_spread': np.nanmax(spread_absolute, axis=1),
+                'min_spread': np.nanmin(spread_absolute, axis=1),
+                'volatility': volatility,
+                'spread_zscore': np.where(np.isfinite(zscore), zscore, np.nan),
+                'condition': self.classify_panel(coins, current_percentage)
+            }
@@ -1,12 +1,287 @@
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def parse_orders(orders: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    # Convert the API's string rate/amount fields into float arrays in one pass
+    if not orders:
+        return np.empty(0), np.empty(0)
+    prices = np.array([order['rate'] for order in orders], dtype=float)
+    amounts = np.array([order['amount'] for order in orders], dtype=float)
+    return prices, amounts
+
+def _imbalance(buy_volume: float, sell_volume: float) -> float:
+    total_volume = buy_volume + sell_volume
+    return (buy_volume - sell_volume) / total_volume if total_volume > 0 else 0
+
+class OrderBook:
+    ## Contiguous price/amount arrays for both sides of an order book.
+    ## Bids are sorted best (highest) first, asks best (lowest) first.
+
+    def __init__(self, bid_prices: np.ndarray, bid_amounts: np.ndarray,
+                 ask_prices: np.ndarray, ask_amounts: np.ndarray):
+        bid_order = np.argsort(-bid_prices, kind='stable')
+        ask_order = np.argsort(ask_prices, kind='stable')
+        self.bid_prices = bid_prices[bid_order]
+        self.bid_amounts = bid_amounts[bid_order]
+        self.ask_prices = ask_prices[ask_order]
+        self.ask_amounts = ask_amounts[ask_order]
+
+        # Cumulative size and notional from the top of each side
+        self.bid_cum_amount = np.cumsum(self.bid_amounts)
+        self.ask_cum_amount = np.cumsum(self.ask_amounts)
+        self.bid_cum_notional = np.cumsum(self.bid_amounts * self.bid_prices)
+        self.ask_cum_notional = np.cumsum(self.ask_amounts * self.ask_prices)
+
+    @classmethod
+    def from_orders(cls, buy_orders: List[Dict], sell_orders: List[Dict]) -> 'OrderBook':
+        return cls(*parse_orders(buy_orders), *parse_orders(sell_orders))
+
+    @property
+    def empty(self) -> bool:
+        return len(self.bid_prices) == 0 or len(self.ask_prices) == 0
+
+    @property
+    def buy_volume(self) -> float:
+        return float(self.bid_cum_notional[-1]) if len(self.bid_cum_notional) else 0.0
+
+    @property
+    def sell_volume(self) -> float:
+        return float(self.ask_cum_notional[-1]) if len(self.ask_cum_notional) else 0.0
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.empty:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def microprice(self) -> Optional[float]:
+        # Top-of-book mid weighted towards the side with less size
+        if self.empty:
+            return None
+        bid_size = float(self.bid_amounts[0])
+        ask_size = float(self.ask_amounts[0])
+        if bid_size + ask_size == 0:
+            return self.mid
+        return (self.best_bid * ask_size + self.best_ask * bid_size) / (bid_size + ask_size)
+
+    def band_volumes(self, band_pct: float) -> Tuple[float, float]:
+        # Notional resting within band_pct percent of mid on each side
+        mid = self.mid
+        if mid is None:
+            return 0.0, 0.0
+        bid_floor = mid * (1 - band_pct / 100)
+        ask_cap = mid * (1 + band_pct / 100)
+        # Bids are descending, so search the negated prices
+        bid_count = np.searchsorted(-self.bid_prices, -bid_floor, side='right')
+        ask_count = np.searchsorted(self.ask_prices, ask_cap, side='right')
+        buy_volume = float(self.bid_cum_notional[bid_count - 1]) if bid_count else 0.0
+        sell_volume = float(self.ask_cum_notional[ask_count - 1]) if ask_count else 0.0
+        return buy_volume, sell_volume
+
+    def band_imbalance(self, bands: Iterable[float]) -> Dict[float, float]:
+        return {band: _imbalance(*self.band_volumes(band)) for band in bands}
+
+    def vwap_to_fill(self, side: str, notional: float) -> Optional[float]:
+        # Average price paid ('buy', walks the asks) or received ('sell',
+        # walks the bids) to fill `notional`; None if the book is too thin
+        if side == 'buy':
+            prices, cum_amount, cum_notional = self.ask_prices, self.ask_cum_amount, self.ask_cum_notional
+        elif side == 'sell':
+            prices, cum_amount, cum_notional = self.bid_prices, self.bid_cum_amount, self.bid_cum_notional
+        else:
+            raise ValueError(f"Invalid side: {side}")
+
+        if notional <= 0 or not len(cum_notional) or cum_notional[-1] < notional:
+            return None
+
+        # First level whose cumulative notional covers the order
+        level = int(np.searchsorted(cum_notional, notional, side='left'))
+        filled_notional = float(cum_notional[level - 1]) if level else 0.0
+        filled_amount = float(cum_amount[level - 1]) if level else 0.0
+        filled_amount += (notional - filled_notional) / float(prices[level])
+        return notional / filled_amount
+
+def _bin_index(offsets: np.ndarray, bin_size: float, levels: int) -> np.ndarray:
+    # Bin of each price offset from the bottom edge; the top edge belongs to
+    # the last bin rather than falling off the end
+    if bin_size <= 0:
+        return np.zeros(len(offsets), dtype=np.intp)
+    return np.clip(np.floor(offsets / bin_size), 0, levels - 1).astype(np.intp)
+
+def _bin_points(offsets: np.ndarray, volume: np.ndarray, bin_size: float, levels: int) -> np.ndarray:
+    return np.bincount(_bin_index(offsets, bin_size, levels), weights=volume, minlength=levels)
+
+def _bin_ranges(low: np.ndarray, high: np.ndarray, volume: np.ndarray, bin_size: float, levels: int) -> np.ndarray:
+    # Spread each row's volume uniformly over [low, high] in O(rows + bins).
+    #
+    # With density d = volume / (high - low), the volume allocated below
+    # edge e is G(e) = sum d * (clip(e, low, high) - low)
+    #                = e * (A - C) - B + D
+    # where A, B sum d and d * low over rows with low < e, and C, D sum d and
+    # d * high over rows with high < e. Those are prefix sums of bincounts, so
+    # each bin's volume is G(upper edge) - G(lower edge).
+    if bin_size <= 0:
+        return np.bincount(np.zeros(len(volume), dtype=np.intp), weights=volume, minlength=levels)
+
+    ranged = high > low
+    profile = _bin_points(low[~ranged], volume[~ranged], bin_size, levels)
+    if not ranged.any():
+        return profile
+
+    low, high, volume = low[ranged], high[ranged], volume[ranged]
+    density = volume / (high - low)
+
+    # Edge k sits at k * bin_size; a price is below edge k when its floor
+    # bin index is below k
+    low_bin = np.clip(np.floor(low / bin_size), 0, levels).astype(np.intp) + 1
+    high_bin = np.clip(np.floor(high / bin_size), 0, levels).astype(np.intp) + 1
+    size = levels + 2
+
+    def below_edges(index, weights):
+        return np.cumsum(np.bincount(index, weights=weights, minlength=size))[:levels + 1]
+
+    a = below_edges(low_bin, density)
+    b = below_edges(low_bin, density * low)
+    c = below_edges(high_bin, density)
+    d = below_edges(high_bin, density * high)
+
+    edges = np.arange(levels + 1) * bin_size
+    allocated = edges * (a - c) - b + d
+    # Everything ends at or below the top edge
+    allocated[-1] = volume.sum()
+    return profile + np.diff(allocated)
+
+class VolumeProfile:
+    ## Incrementally maintained volume-by-price histogram on a fixed price
+    ## grid. Each tick touches only the bins its range overlaps, so the
+    ## profile never has to be rebuilt from the full history. With `window`
+    ## set, the oldest entry is removed once more than `window` were added.
+
+    def __init__(self, bin_size: float, allocation: str = 'midpoint', window: Optional[int] = None):
+        if bin_size <= 0:
+            raise ValueError("Bin size must be positive")
+        if allocation not in ('midpoint', 'proportional'):
+            raise ValueError(f"Invalid allocation: {allocation}")
+
+        self.bin_size = bin_size
+        self.allocation = allocation
+        self.window = window
+        self._origin = None # Grid index of self._volumes[0]
+        self._volumes = np.zeros(0)
+        self._entries = deque() # Only kept when a window is set
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, low: float, high: float, volume: float = 1.0):
+        self._apply(low, high, volume)
+        self._count += 1
+        if self.window is not None:
+            self._entries.append((low, high, volume))
+            if len(self._entries) > self.window:
+                self._apply(*self._entries.popleft(), sign=-1.0)
+                self._count -= 1
+
+    def remove(self, low: float, high: float, volume: float = 1.0):
+        self._apply(low, high, volume, sign=-1.0)
+        self._count -= 1
+
+    def _ensure(self, first: int, last: int):
+        # Grow the dense grid so it covers grid indexes first..last
+        if self._origin is None:
+            self._origin = first
+            self._volumes = np.zeros(last - first + 1)
+            return
+        end = self._origin + len(self._volumes) - 1
+        if first >= self._origin and last <= end:
+            return
+        new_origin = min(first, self._origin)
+        new_end = max(last, end)
+        # Over-allocate so repeated growth stays amortized O(1)
+        span = new_end - new_origin + 1
+        pad = max(span // 2, 8)
+        if first < self._origin:
+            new_origin -= pad
+        if last > end:
+            new_end += pad
+        volumes = np.zeros(new_end - new_origin + 1)
+        offset = self._origin - new_origin
+        volumes[offset:offset + len(self._volumes)] = self._volumes
+        self._origin = new_origin
+        self._volumes = volumes
+
+    def _apply(self, low: float, high: float, volume: float, sign: float = 1.0):
+        if self.allocation == 'midpoint' or high <= low:
+            index = math.floor((low + high) / 2 / self.bin_size)
+            self._ensure(index, index)
+            self._volumes[index - self._origin] += sign * volume
+            return
+
+        first = math.floor(low / self.bin_size)
+        last = math.floor(high / self.bin_size)
+        self._ensure(first, last)
+        # Overlap of [low, high] with each touched bin
+        bin_lows = np.arange(first, last + 1) * self.bin_size
+        overlap = np.minimum(bin_lows + self.bin_size, high) - np.maximum(bin_lows, low)
+        self._volumes[first - self._origin:last - self._origin + 1] += (
+            sign * volume * np.clip(overlap, 0, None) / (high - low)
+        )
+
+    def snapshot(self, levels: Optional[int] = None) -> Dict:
+        # Same shape as VolumeAnalyzer.calculate_vbp, over the occupied bins.
+        # With `levels`, neighbouring bins are merged into at most that many,
+        # like calculate_vbp's fixed number of price levels.
+        if self._origin is None:
+            return {}
+        occupied = np.flatnonzero(np.abs(self._volumes) > 1e-12)
+        if not len(occupied):
+            return {}
+
+        start, stop = occupied[0], occupied[-1] + 1
+        volumes = self._volumes[start:stop]
+        width = 1
+        if levels is not None and len(volumes) > levels:
+            width = -(-len(volumes) // levels)
+            volumes = np.add.reduceat(volumes, np.arange(0, len(volumes), width))
+        volume_profile = volumes.tolist()
+        edges = (self._origin + start + np.arange(len(volumes) + 1) * width) * self.bin_size
+        price_bins = [f"{bin_low:.2f}-{bin_high:.2f}" for bin_low, bin_high in zip(edges[:-1], edges[1:])]
+
+        poc_index = int(np.argmax(volume_profile))
+        return {
+            'price_bins': price_bins,
+            'volume_profile': volume_profile,
+            'poc': price_bins[poc_index],
+            'poc_volume': volume_profile[poc_index]
+        }
 
 class VolumeAnalyzer:
     ## Analyze volume profile and order book imbalances
 
-    def __init__(self, price_levels: int = 10):
+    def __init__(self, price_levels: int = 10, depth_bands: Tuple[float, ...] = (0.1, 0.5, 1.0),
+                 profile_bin_fraction: float = 0.001):
         self.price_levels = price_levels
+        self.depth_bands = depth_bands
+        # Bin size of incremental profiles, as a fraction of the price
+        self.profile_bin_fraction = profile_bin_fraction
+
+    def new_profile(self, price: float, window: Optional[int] = None) -> VolumeProfile:
+        # Incremental profile for a coin trading around `price`; its grid is
+        # fixed, so the bins are sized from the price rather than the range
+        return VolumeProfile(abs(price) * self.profile_bin_fraction or self.profile_bin_fraction, window=window)
     
     def analyze_order_book(self, buy_orders: List[Dict], sell_orders: List[Dict]) -> Dict:
         # Analyze order book for imbalances
@@ -20,8 +295,16 @@ class VolumeAnalyzer:
             }
         
         # Calculate total volumes
-        buy_volume = sum(float(order['amount']) * float(order['rate']) for order in buy_orders)
-        sell_volume = sum(float(order['amount']) * float(order['rate']) for order in sell_orders)
+        buy_prices, buy_amounts = parse_orders(buy_orders)
+        sell_prices, sell_amounts = parse_orders(sell_orders)
+        buy_volume = float(np.dot(buy_amounts, buy_prices))
+        sell_volume = float(np.dot(sell_amounts, sell_prices))
+
+        return self.analyze_order_book_volumes(buy_volume, sell_volume)
+
+    def analyze_order_book_volumes(self, buy_volume: float, sell_volume: float) -> Dict:
+        # Same result as analyze_order_book from the per-side notional totals,
+        # e.g. the running totals kept by OrderBookTracker
 
         # Calculate imbalance ratio
         total_volume = buy_volume + sell_volume
@@ -45,35 +328,85 @@ class VolumeAnalyzer:
             'dominant_side': dominant_side
         }
     
-    def calculate_vbp(self, df: pd.DataFrame) -> Dict:
-        # Calculate Volume by Price Profile
+    def analyze_order_book_panel(self, buy_volumes: np.ndarray, sell_volumes: np.ndarray) -> Dict[str, np.ndarray]:
+        # analyze_order_book_volumes over arrays of per-coin totals
+        buy_volumes = np.asarray(buy_volumes, dtype=float)
+        sell_volumes = np.asarray(sell_volumes, dtype=float)
+        total_volumes = buy_volumes + sell_volumes
+        with np.errstate(invalid='ignore', divide='ignore'):
+            imbalance_ratio = np.where(total_volumes > 0, (buy_volumes - sell_volumes) / total_volumes, 0.0)
+
+        return {
+            'imbalance_ratio': imbalance_ratio,
+            'buy_volume': buy_volumes,
+            'sell_volume': sell_volumes,
+            'dominant_side': np.select(
+                [imbalance_ratio > 0.2, imbalance_ratio < -0.2], ['buy', 'sell'], 'neutral'
+            ).astype(object)
+        }
+
+    def analyze_depth(self, order_book, sell_orders: List[Dict] = None,
+                      bands: Iterable[float] = None, notional: float = None) -> Dict:
+        ## Depth analytics on the parsed book: cumulative depth, imbalance
+        ## inside percentage bands around mid, microprice and VWAP-to-fill.
+        ## Accepts an OrderBook or the raw buyorders/sellorders lists.
+        if not isinstance(order_book, OrderBook):
+            order_book = OrderBook.from_orders(order_book or [], sell_orders or [])
+        bands = self.depth_bands if bands is None else tuple(bands)
+
+        analysis = {
+            'best_bid': order_book.best_bid,
+            'best_ask': order_book.best_ask,
+            'mid': order_book.mid,
+            'microprice': order_book.microprice,
+            'buy_volume': order_book.buy_volume,
+            'sell_volume': order_book.sell_volume,
+            'imbalance_ratio': _imbalance(order_book.buy_volume, order_book.sell_volume),
+            'band_imbalance': order_book.band_imbalance(bands),
+            'cumulative_depth': {
+                'bid_prices': order_book.bid_prices,
+                'bid_notional': order_book.bid_cum_notional,
+                'ask_prices': order_book.ask_prices,
+                'ask_notional': order_book.ask_cum_notional
+            }
+        }
+
+        if notional is not None:
+            analysis['vwap_buy'] = order_book.vwap_to_fill('buy', notional)
+            analysis['vwap_sell'] = order_book.vwap_to_fill('sell', notional)
+
+        return analysis
+
+    def calculate_vbp(self, df: pd.DataFrame, allocation: str = 'midpoint') -> Dict:
+        # Calculate Volume by Price Profile in a single pass over the rows.
+        # allocation='midpoint' puts each row's volume in the bin holding the
+        # middle of its low-high range; 'proportional' spreads it across every
+        # bin the range overlaps.
 
         if df.empty:
             return{}
         
         # Create price bins
-        price_min = df['low'].min()
-        price_max = df['high'].max()
-        price_range = price_max - price_min
-        bin_size = price_range / self.price_levels
+        low = df['low'].to_numpy(dtype=float)
+        high = df['high'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float) if 'volume' in df else np.ones(len(df))
+        price_min = low.min()
+        price_max = high.max()
+        bin_size = (price_max - price_min) / self.price_levels
 
-        # Create bins and calculate volume for each
-        price_bins = []
-        volume_profile = []
-
-        for i in range(self.price_levels):
-            bin_low = price_min + (i * bin_size)
-            bin_high = bin_low + bin_size
-
-            # Filter trades in this price range
-            mask = (df['low'] >= bin_low) & (df['high'] < bin_high)
-            volume_in_bin = df[mask]['volume'].sum() if 'volume' in df else len(df[mask])
+        if allocation == 'midpoint':
+            volume_profile = _bin_points((low + high) / 2 - price_min, volume, bin_size, self.price_levels)
+        elif allocation == 'proportional':
+            volume_profile = _bin_ranges(low - price_min, high - price_min, volume, bin_size, self.price_levels)
+        else:
+            raise ValueError(f"Invalid allocation: {allocation}")
 
-            price_bins.append(f"{bin_low:.2f}-{bin_high:.2f}")
-            volume_profile.append(volume_in_bin)
+        edges = price_min + np.arange(self.price_levels + 1) * bin_size
+        price_bins = [f"{bin_low:.2f}-{bin_high:.2f}" for bin_low, bin_high in zip(edges[:-1], edges[1:])]
+        volume_profile = volume_profile.tolist()
 
         # Find Point of Control (POC) - price level with highest volume
-        poc_index = np.argmax(volume_profile)
+        poc_index = int(np.argmax(volume_profile))
         poc_price_range = price_bins[poc_index]
 
         return {
@@ -0,0 +1,275 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from rich.console import Console, Group
+from rich.live import Live
+from rich.table import Table
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+
+TREND_COLORS = {
+    'bullish': 'green',
+    'bearish': 'red',
+    'neutral': 'yellow'
+}
+
+CONDITION_COLORS = {
+    'TIGHT': 'green',
+    'NORMAL': 'yellow',
+    'WIDE': 'red'
+}
+
+IMBALANCE_COLORS = {
+    'buy': 'green',
+    'sell': 'red',
+    'neutral': 'yellow'
+}
+
+
+def get_market_message(trend: str, condition: str) -> str:
+    ## Generate a market analysis message based on trend and condition
+    messages = []
+
+    if trend.lower() == 'bullish':
+        messages.append("[green]Upward trend detected[/green]")
+        if condition == 'TIGHT':
+            messages.append("Good conditions for buying")
+    elif trend.lower() == 'bearish':
+        messages.append("[red]Downward trend detected[/red]")
+        if condition == 'TIGHT':
+            messages.append("Good conditions for selling")
+
+    if condition == 'WIDE':
+        messages.append("[red]Exercise caution - high spread[/red]")
+    elif condition == 'TIGHT':
+        messages.append("[green]Good liquidity conditions[/green]")
+
+    return " • ".join(messages)
+
+
+def _money(value) -> str:
+    return f"${value:,.2f}"
+
+
+def _trend(trend: str) -> str:
+    color = TREND_COLORS.get(trend.lower(), 'white')
+    return f"[{color}]{trend.upper()}[/{color}]"
+
+
+def _condition(condition: str) -> str:
+    color = CONDITION_COLORS.get(condition, 'white')
+    return f"[{color}]{condition}[/{color}]"
+
+
+def _imbalance(value: Tuple[float, str, bool]) -> str:
+    ratio, side, stale = value
+    if stale:
+        # Last good book; the latest fetch failed
+        return f"[dim]{ratio:.2%} (stale)[/dim]"
+    color = IMBALANCE_COLORS.get(side, 'white')
+    return f"[{color}]{ratio:.2%}[/{color}]"
+
+
+def _order_book_imbalance(analysis: Dict) -> Tuple[float, str, bool]:
+    order_book_analysis = analysis['order_book_analysis']
+    return (
+        order_book_analysis['imbalance_ratio'], order_book_analysis['dominant_side'],
+        order_book_analysis.get('stale', False)
+    )
+
+
+# A cell is (name, raw value getter, formatter). The raw value is what the
+# cell cache compares, so the formatter only runs when it changes.
+Cell = Tuple[str, Callable[[Dict], Hashable], Callable[[Hashable], str]]
+
+# Columns of the multi-coin summary table, after the coin column
+SUMMARY_COLUMNS: List[Tuple[Cell, Optional[str]]] = [
+    (('Last', lambda a: a['latest']['close'], _money), 'right'),
+    (('Bid', lambda a: a['latest']['bid'], _money), 'right'),
+    (('Ask', lambda a: a['latest']['ask'], _money), 'right'),
+    (('Spread %', lambda a: a['latest']['spread_percentage'], lambda v: f"{v:.3f}%"), 'right'),
+    (('Trend', lambda a: a['latest_ha']['trend'], _trend), None),
+    (('Condition', lambda a: a['spread_analysis']['condition'], _condition), None),
+    (('Imbalance', _order_book_imbalance, _imbalance), 'right'),
+    (('Point of Control', lambda a: a['vbp_data'].get('poc', ''), str), None)
+]
+
+# Rows of the single-coin table. A bare string is a section heading and
+# None an empty spacer row.
+DETAIL_ROWS: List = [
+    ('Timestamp', lambda a: a['timestamp'], str),
+    ('Last Price', lambda a: a['latest']['close'], _money),
+    ('Bid Price', lambda a: a['latest']['bid'], _money),
+    ('Ask Price', lambda a: a['latest']['ask'], _money),
+    None,
+    'Spread Analysis',
+    ('Current Spread', lambda a: a['latest']['spread_absolute'], _money),
+    ('Spread Percentage', lambda a: a['latest']['spread_percentage'], lambda v: f"{v:.3f}%"),
+    None,
+    'Trend Analysis',
+    ('Heikin Ashi Trend', lambda a: a['latest_ha']['trend'], _trend),
+    ('Market Condition', lambda a: a['spread_analysis']['condition'], _condition),
+    None,
+    ('[bold]Analysis', lambda a: (a['latest_ha']['trend'], a['spread_analysis']['condition']),
+     lambda v: get_market_message(*v)),
+    None,
+    'Volume Analysis',
+    ('Order Book Imbalance', _order_book_imbalance, _imbalance),
+    ('Point of Control', lambda a: a['vbp_data'].get('poc', ''), str),
+    ('Volume Signals', lambda a: a['volume_signals'], str)
+]
+
+
+def _timeframe_rows(timeframe: str) -> List[Cell]:
+    # Rows for one timeframe's closed-bar analysis in the single-coin table
+    return [
+        (f"{timeframe} Trend", lambda a: a['timeframes'][timeframe]['latest_ha']['trend'], _trend),
+        (f"{timeframe} Point of Control", lambda a: a['timeframes'][timeframe]['vbp_data'].get('poc', ''), str)
+    ]
+
+
+class CellCache:
+    ## Formatted cell text keyed by (coin, cell name). A cell is only
+    ## re-formatted when its raw value changed since the last render.
+
+    def __init__(self):
+        self._cells: Dict[Tuple[str, str], Tuple[Hashable, str]] = {}
+        self.formatted = 0 # Number of formatter calls, i.e. changed cells
+
+    def text(self, coin: str, cell: Cell, analysis: Dict) -> str:
+        name, getter, formatter = cell
+        value = getter(analysis)
+        cached = self._cells.get((coin, name))
+        if cached is not None and cached[0] == value:
+            return cached[1]
+
+        text = formatter(value)
+        self._cells[(coin, name)] = (value, text)
+        self.formatted += 1
+        return text
+
+    def clear(self):
+        self._cells.clear()
+
+
+def build_coin_table(coin: str, analysis: Dict, cache: CellCache = None) -> Table:
+    cache = cache if cache is not None else CellCache()
+
+    table = Table(title=f"{coin} Market Analysis")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green")
+
+    for row in DETAIL_ROWS:
+        if row is None:
+            table.add_row("", "")  # Empty row for spacing
+        elif isinstance(row, str):
+            table.add_row(f"[bold]{row}", "")
+        else:
+            table.add_row(row[0], cache.text(coin, row, analysis))
+
+    timeframes = analysis.get('timeframes') or {}
+    if timeframes:
+        table.add_row("", "")
+        table.add_row("[bold]Timeframes", "")
+        for timeframe in timeframes:
+            for row in _timeframe_rows(timeframe):
+                table.add_row(row[0], cache.text(coin, row, analysis))
+
+    return table
+
+
+def build_summary_table(results: Dict[str, Dict], cache: CellCache = None) -> Table:
+    # One row per coin for multi-coin monitoring
+    cache = cache if cache is not None else CellCache()
+
+    table = Table(title="Market Overview")
+    table.add_column("Coin", style="cyan")
+    for (name, _, _), justify in SUMMARY_COLUMNS:
+        table.add_column(name, justify=justify or 'left')
+
+    for coin, analysis in results.items():
+        table.add_row(coin, *(cache.text(coin, cell, analysis) for cell, _ in SUMMARY_COLUMNS))
+
+    return table
+
+
+class Dashboard:
+    ## Live terminal dashboard drawn on its own thread.
+    ##
+    ## update() only records the newest analysis per coin and returns, so
+    ## the monitor loop never waits on the terminal. The render thread
+    ## redraws at most `max_fps` times a second, coalescing any updates in
+    ## between, and re-formats only the cells whose values changed.
+
+    def __init__(self, detail: bool = False, max_fps: float = 4.0, console: Console = None,
+                 metrics: Metrics = None):
+        self.detail = detail
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.console = console if console is not None else Console()
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.cache = CellCache()
+        self.frames = 0
+
+        self._results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._live: Optional[Live] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def update(self, results: Dict[str, Dict]):
+        with self._lock:
+            self._results.update(results)
+        self._dirty.set()
+
+    def render(self):
+        with self._lock:
+            results = dict(self._results)
+
+        if not self.detail:
+            return build_summary_table(results, self.cache)
+        return Group(*(build_coin_table(coin, analysis, self.cache) for coin, analysis in results.items()))
+
+    def start(self):
+        self._live = Live(self.render(), console=self.console, auto_refresh=False)
+        self._live.start()
+        self._thread = threading.Thread(target=self._run, name='dashboard', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._dirty.set() # Wake the render thread
+        self._thread.join()
+        self._thread = None
+        # Show whatever arrived since the last frame
+        self._draw()
+        self._live.stop()
+
+    def _draw(self):
+        self._dirty.clear()
+        with self.metrics.timer('crypto_monitor_frame_seconds'):
+            self._live.update(self.render(), refresh=True)
+        self.frames += 1
+
+    def _run(self):
+        last_frame = 0.0
+        while True:
+            self._dirty.wait()
+            if self._stop.is_set():
+                return
+
+            # Cap the frame rate; updates arriving meanwhile share one frame
+            delay = last_frame + self.min_interval - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                return
+
+            self._draw()
+            last_frame = time.monotonic()
@@ -1,183 +1,741 @@
 import click
+import json
+import sys
 import time
-from rich.console import Console
-from rich.table import Table
-from crypto_monitor.market_data.coinspot import CoinspotClient
-from crypto_monitor.analysis.heikin_ashi import HeikinAshi
-from crypto_monitor.analysis.spread_analyzer import SpreadAnalyzer
-from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer
+from typing import TYPE_CHECKING, Callable, Dict, Tuple
+from crypto_monitor.market_data import lite
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
 
-console = Console()
+# pandas, numpy, requests and rich are imported inside the commands that
+# need them, so one-shot commands like `price` start in a few milliseconds
+if TYPE_CHECKING:
+    from crypto_monitor.alerts.rules import AlertEngine
+    from crypto_monitor.export.stream import StreamExporter
+
+
+class _LazyConsole:
+    ## rich Console created on first use
+
+    _console = None
+
+    def get(self):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return _LazyConsole._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = _LazyConsole()
+
+@click.group()
+def cli():
+    ## Crypto market monitor
+    pass
 
 @click.command()
 @click.option('--coin', default='BTC', help='Cryptocurrency symbol (e.g., BTC, XRP)')
-@click.option('--interval', default=60, help='Update interval in seconds')
+@click.option('--coins', default=None, help='Comma separated symbols to monitor together (e.g., BTC,ETH,XRP)')
+@click.option('--all', 'all_coins', is_flag=True, help='Monitor every coin in the /latest response')
+@click.option('--workers', default=8, help='Maximum concurrent order book requests')
+@click.option('--interval', default=60.0, help='Update interval in seconds (fractions allowed)')
 @click.option('--duration', default=10, help='How many intervals to run for')
 @click.option('--display', default='rich', help='Display mode: rich or simple')
+@click.option('--fps', default=4.0, help='Maximum redraws per second of the rich display')
+@click.option('--async', 'use_async', is_flag=True, help='Fixed-cadence asyncio loop with overlapping I/O')
+@click.option('--shards', default=0, help='Analyze --coins/--all across this many worker processes (0 = in process)')
+@click.option('--store', 'store_path', default=None, help='Tick store directory to persist to and warm-start from')
+@click.option('--store-books', is_flag=True, help='Also persist order book snapshots to the tick store')
+@click.option('--metrics-file', default=None, help='Write Prometheus text metrics to this file every tick')
+@click.option('--metrics-port', default=None, type=int, help='Serve Prometheus metrics on localhost:PORT/metrics')
+@click.option('--metrics-log', default=None, help='Append a JSON metrics snapshot to this file every tick')
+@click.option('--log-file', default=None, help='Write JSON log records (e.g. per-tick spread events) to this file')
+@click.option('--log-level', default='INFO', help='Log level for --log-file; DEBUG includes spread events')
+@click.option('--timeframes', default='', help='Also build OHLC bars and analysis for these timeframes (e.g. 1m,5m,1h)')
+@click.option('--alerts', 'alert_rules', default=None, help='JSON file of alert rules to evaluate on every tick')
+@click.option('--alert-file', default=None, help='Append fired alerts to this file as JSON lines')
+@click.option('--alert-webhook', default=None, help='POST fired alerts as JSON to this URL')
+@click.option('--base-url', default=None, help='API base URL, e.g. a local simulator (default: $COINSPOT_BASE_URL or Coinspot)')
+@click.option('--cache-ttl', default=None, type=float,
+              help='Reuse API responses for this many seconds (default: half the interval, so never across ticks; 0 = off)')
+@click.option('--history', default=100, help='Price history points kept per coin')
+@click.option('--history-precision', default=None, type=click.Choice(['float64', 'float32', 'int64']),
+              help='Keep only bid/ask/last at this precision (int64 = fixed point) to fit long histories')
+@click.option('--history-decimals', default=8, help='Decimal places kept by --history-precision int64')
+@click.option('--export', 'export_target', default=None,
+              help='Stream ticks, candles and analysis to a file, unix:PATH, tcp://HOST:PORT or ws://HOST:PORT')
+@click.option('--export-format', default='ndjson', type=click.Choice(['ndjson', 'arrow']), help='Format of --export')
+@click.option('--export-kinds', default='tick,candle,analysis', help='Comma separated record kinds to --export')
+
+def monitor_price(**options):
+    settings = MonitorSettings(options)
+    with Monitor(settings) as monitor:
+        if settings.use_async:
+            import asyncio
+            asyncio.run(monitor_async(monitor))
+        elif settings.shards:
+            monitor_sharded(monitor)
+        elif settings.single:
+            monitor_one(monitor)
+        else:
+            monitor_many(monitor)
+
+def parse_timeframes(timeframes: str) -> tuple:
+    return tuple(t.strip().lower() for t in (timeframes or '').split(',') if t.strip())
+
+def build_candles(timeframes: tuple, capacity: int = 500):
+    # Candle aggregator for the requested timeframes, or None
+    if not timeframes:
+        return None
+    from crypto_monitor.market_data.candles import CandleAggregator
+    try:
+        return CandleAggregator(timeframes, capacity)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--timeframes')
+
+def build_alerts(rules_path: str = None, alert_file: str = None, alert_webhook: str = None,
+                 stdout: bool = False) -> 'AlertEngine':
+    # Alert engine for a rules file, or None without one
+    if not rules_path:
+        if alert_file or alert_webhook:
+            raise click.UsageError("--alert-file and --alert-webhook need --alerts RULES")
+        return None
+    from crypto_monitor.alerts.rules import AlertEngine, load_rules
+    from crypto_monitor.alerts.sinks import FileSink, StdoutSink, WebhookSink
+    try:
+        rules = load_rules(rules_path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise click.BadParameter(f"Invalid alert rules: {e}", param_hint='--alerts')
+
+    sinks = [StdoutSink()] if stdout else []
+    if alert_file:
+        sinks.append(FileSink(alert_file))
+    if alert_webhook:
+        sinks.append(WebhookSink(alert_webhook))
+    return AlertEngine(rules, sinks)
+
+def build_exporter(target: str = None, export_format: str = 'ndjson', kinds: str = 'tick,candle,analysis',
+                   metrics: Metrics = NULL_METRICS) -> 'StreamExporter':
+    # Stream exporter for an --export target, or None without one
+    if not target:
+        return None
+    from crypto_monitor.export.destinations import open_destination
+    from crypto_monitor.export.stream import ENCODERS, StreamExporter
+    try:
+        encoder = ENCODERS[export_format]()
+    except ImportError as e:
+        raise click.BadParameter(str(e), param_hint='--export-format')
+    try:
+        destination = open_destination(target)
+    except (OSError, ValueError) as e:
+        raise click.BadParameter(f"Cannot open {target}: {e}", param_hint='--export')
+    try:
+        return StreamExporter(
+            destination, encoder, [kind.strip() for kind in kinds.split(',') if kind.strip()], metrics=metrics
+        )
+    except ValueError as e:
+        destination.close()
+        raise click.BadParameter(str(e), param_hint='--export-kinds')
+
+def setup_logging(log_file: str = None, log_level: str = 'INFO'):
+    # JSON log file written from a background thread, off the tick path
+    if not log_file:
+        return None
+    import logging
+    from crypto_monitor.engine.logs import JSONFormatter, start_queued_logging
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(JSONFormatter())
+    return start_queued_logging(handler, getattr(logging, log_level.upper(), logging.INFO))
+
+def build_metrics(metrics_file: str = None, metrics_port: int = None, metrics_log: str = None) -> Metrics:
+    # Metrics are only collected when at least one sink is configured
+    from crypto_monitor.metrics.sinks import JSONLogSink, PrometheusFileSink, PrometheusHTTPSink
+    sinks = []
+    if metrics_file:
+        sinks.append(PrometheusFileSink(metrics_file))
+    if metrics_port is not None:
+        sinks.append(PrometheusHTTPSink(metrics_port))
+        console.print(f"[dim]Serving metrics on http://127.0.0.1:{sinks[-1].port}/metrics[/dim]")
+    if metrics_log:
+        sinks.append(JSONLogSink(metrics_log))
+    return Metrics(sinks) if sinks else NULL_METRICS
+
+
+class MonitorSettings:
+    ## The `monitor` command's options, checked and parsed
+
+    def __init__(self, options: Dict):
+        self.single = not (options['coins'] or options['all_coins'])
+        if self.single:
+            self.coins = [options['coin'].upper()]
+        elif options['all_coins']:
+            self.coins = None # Every coin in the /latest response
+        else:
+            self.coins = [c.strip().upper() for c in options['coins'].split(',') if c.strip()]
+
+        self.use_async = options['use_async']
+        self.shards = options['shards']
+        if self.shards and self.single:
+            raise click.UsageError("--shards needs --coins or --all")
+        if self.shards and self.use_async:
+            raise click.UsageError("--shards and --async cannot be combined")
 
-def monitor_price(coin: str, interval: int, duration: int, display: str):
-    client = CoinspotClient()
-    ha_analyzer = HeikinAshi()
-    spread_analyzer = SpreadAnalyzer()
-    volume_analyzer = VolumeAnalyzer()
+        self.workers = options['workers']
+        self.interval = options['interval']
+        self.duration = options['duration']
+        self.display = options['display']
+        self.fps = options['fps']
+        self.timeframes = parse_timeframes(options['timeframes'])
+        self.base_url = options['base_url']
+        # Responses are shared within a tick; a TTL as long as the interval
+        # would hand the next tick the previous one's prices
+        self.cache_ttl = options['cache_ttl'] if options['cache_ttl'] is not None else self.interval / 2
+        self.history = options['history']
+        self.history_precision = options['history_precision']
+        self.history_decimals = options['history_decimals']
 
-    console.print(f"\n[bold blue]Monitoring {coin} price every {interval} seconds...[/bold blue]")
+        self.store_path = options['store_path']
+        self.store_books = options['store_books']
+        self.metrics_file = options['metrics_file']
+        self.metrics_port = options['metrics_port']
+        self.metrics_log = options['metrics_log']
+        self.log_file = options['log_file']
+        self.log_level = options['log_level']
+        self.alert_rules = options['alert_rules']
+        self.alert_file = options['alert_file']
+        self.alert_webhook = options['alert_webhook']
+        self.export_target = options['export_target']
+        self.export_format = options['export_format']
+        self.export_kinds = options['export_kinds']
+
+    @property
+    def label(self) -> str:
+        return ', '.join(self.coins) if self.coins else 'all coins'
+
+
+class Monitor:
+    ## What every monitor mode shares: the store, metrics, logging, alerts,
+    ## exporter, display and clients built from MonitorSettings (closed on
+    ## exit),
+    ## and the rest of a tick once its results are in. Modes only differ in
+    ## how they fetch and analyze a tick.
+
+    def __init__(self, settings: MonitorSettings):
+        from crypto_monitor.storage.tick_store import TickStore
+
+        self.settings = settings
+        # Shard workers open the store themselves, one set of coins each
+        self.store = None
+        if settings.store_path and not settings.shards:
+            self.store = TickStore(settings.store_path, order_books=settings.store_books)
+        self.metrics = build_metrics(settings.metrics_file, settings.metrics_port, settings.metrics_log)
+        self.listener = setup_logging(settings.log_file, settings.log_level)
+        self.alerts = build_alerts(settings.alert_rules, settings.alert_file, settings.alert_webhook, stdout=True)
+        self.exporter = build_exporter(
+            settings.export_target, settings.export_format, settings.export_kinds, self.metrics
+        )
+        self.clients = []
+        self.dashboard = None
+        if settings.display == 'rich':
+            from crypto_monitor.cli.dashboard import Dashboard
+            # Single coins get the detailed table, several coins the summary
+            self.dashboard = Dashboard(
+                detail=settings.single, max_fps=settings.fps, console=console.get(), metrics=self.metrics
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        from crypto_monitor.engine.logs import stop_queued_logging
+
+        if self.dashboard is not None:
+            self.dashboard.stop() # Restores the terminal if the loop was interrupted
+        for client in self.clients:
+            client.close()
+        if self.alerts is not None:
+            self.alerts.close()
+        if self.exporter is not None:
+            self.exporter.close()
+        self.metrics.close()
+        stop_queued_logging(self.listener)
+        if self.store is not None:
+            self.store.close()
+
+    def transport(self):
+        from crypto_monitor.market_data.transport import HTTPTransport
+        return HTTPTransport(cache_ttl=self.settings.cache_ttl, metrics=self.metrics)
+
+    def client(self, **options):
+        # A CoinspotClient on a new transport, closed with the monitor
+        from crypto_monitor.market_data.coinspot import CoinspotClient
+        client = CoinspotClient(transport=self.transport(), **options)
+        self.clients.append(client)
+        return client
+
+    def client_options(self) -> Dict:
+        # CoinspotClient/AsyncCoinspotClient keyword arguments, bar the transport
+        settings = self.settings
+        return dict(max_history=settings.history, store=self.store, base_url=settings.base_url,
+                    history_precision=settings.history_precision, history_decimals=settings.history_decimals)
+
+    def pipeline(self, client):
+        from crypto_monitor.engine.pipeline import TickPipeline
+        return TickPipeline(client, metrics=self.metrics, candles=build_candles(self.settings.timeframes),
+                            alerts=self.alerts, exporter=self.exporter)
+
+    def tracked(self, responses: Dict[str, Dict]) -> Dict[str, Dict]:
+        # The responses that carry prices; the others are reported and skipped
+        ok = {}
+        for symbol, response in responses.items():
+            if response['status'] == 'ok':
+                ok[symbol] = response
+            else:
+                self.metrics.inc('crypto_monitor_coin_errors_total', coin=symbol)
+                console.print(f"[yellow]Skipping {symbol}: {response.get('message', 'Unknown error')}[/yellow]")
+        return ok
+
+    def process(self, pipeline, responses: Dict[str, Dict], order_books: Dict[str, Dict]) -> Dict[str, Dict]:
+        # Analyze each coin of a tick in process
+        results = {}
+        for symbol, response in responses.items():
+            analysis = pipeline.process(symbol, response, order_books.get(symbol))
+            if analysis:
+                results[symbol] = analysis
+        return results
+
+    def finish_tick(self, results: Dict[str, Dict], tick_start: float):
+        # Render the tick's results and record its metrics
+        with self.metrics.timer('crypto_monitor_render_seconds'):
+            if self.dashboard is not None:
+                self.dashboard.update(results)
+            else:
+                for symbol, analysis in results.items():
+                    if not self.settings.single:
+                        click.echo(f"\n--- {symbol} ---")
+                    echo_simple(symbol, analysis)
+
+        self.metrics.observe('crypto_monitor_tick_seconds', time.monotonic() - tick_start)
+        self.metrics.export()
+
+    def report_error(self, error: Exception):
+        self.metrics.inc('crypto_monitor_errors_total', reason=type(error).__name__)
+        console.print(f"[bold red]Error: {str(error)}[/bold red]")
+        import traceback
+        traceback.print_exc()
+
+    def run(self, header: str, fetch: Callable[[], Tuple[Dict, Dict]],
+            analyze: Callable[[Dict, Dict], Dict[str, Dict]]):
+        ## Synchronous loop: each tick fetches (responses, order_books),
+        ## analyzes them into per-coin results and finishes the tick. Ticks
+        ## keep a fixed cadence, with slots missed by an overrunning tick
+        ## skipped (see TickScheduler.run_sync). The first error stops the
+        ## loop.
+        from crypto_monitor.market_data.scheduler import TickScheduler
+
+        settings = self.settings
+        console.print(f"\n[bold blue]{header}[/bold blue]")
+        if self.dashboard is not None:
+            self.dashboard.start()
+
+        def tick(slot: int):
+            tick_start = time.monotonic()
+            with self.metrics.timer('crypto_monitor_fetch_seconds'):
+                responses, order_books = fetch()
+            self.finish_tick(analyze(responses, order_books), tick_start)
 
-    for _ in range(duration):
         try:
-            # Fetch and store price
-            response = client.get_latest_price(coin)
-            client.add_price_to_history(coin, response)
-
-            # Fetch order book separately
-            order_book = client.get_order_book(coin)
-
-            # Get price history and calculate HA
-            df = client.get_price_history(coin)
-            if not df.empty:
-                ha_df = ha_analyzer.calculate(df)
-                ha_df = ha_analyzer.get_trend_signals(ha_df)
-                spread_analysis = spread_analyzer.analyze_spread(df, coin)
-
-                vbp_data = volume_analyzer.calculate_vbp(df)
-                order_book_analysis = volume_analyzer.analyze_order_book(
-                    order_book.get('buyorders', []),
-                    order_book.get('sellorders', [])
-                )
-                
-                volume_signals = volume_analyzer.get_volume_signals(
-                    vbp_data,
-                    order_book_analysis
-                )
+            stats = TickScheduler(settings.interval, metrics=self.metrics).run_sync(tick, settings.duration)
+            if self.dashboard is not None:
+                self.dashboard.stop()
+            if stats['skipped']:
+                console.print(f"[yellow]Skipped {stats['skipped']} overrunning tick(s)[/yellow]")
+        except Exception as e:
+            if self.dashboard is not None:
+                self.dashboard.stop()
+            self.report_error(e)
 
-                # Get latest data point
-                latest = ha_df.iloc[-1]
-                latest_ha = ha_df.iloc[-1]
-
-                if display == 'rich':
-                    # Create rich table display
-                    table = Table(title=f"{coin} Market Analysis")
-                    table.add_column("Metric", style="cyan")
-                    table.add_column("Value", style="green")
-
-                    # Price Information
-                    table.add_row("Timestamp", str(df.index[-1]))
-                    table.add_row("Last Price", f"${latest['close']:,.2f}")
-                    table.add_row("Bid Price", f"${latest['bid']:,.2f}")
-                    table.add_row("Ask Price", f"${latest['ask']:,.2f}")
-
-                    # Spread Information
-                    table.add_row("", "")  # Empty row for spacing
-                    table.add_row("[bold]Spread Analysis", "")
-                    table.add_row("Current Spread", 
-                                f"${latest['spread_absolute']:,.2f}")
-                    table.add_row("Spread Percentage", 
-                                f"{latest['spread_percentage']:.3f}%")
-
-                    # Trend Information
-                    table.add_row("", "")  # Empty row for spacing
-                    table.add_row("[bold]Trend Analysis", "")
-                    
-                    trend_color = {
-                        'bullish': 'green',
-                        'bearish': 'red',
-                        'neutral': 'yellow'
-                    }.get(latest_ha['trend'].lower(), 'white')
-                    
-                    table.add_row("Heikin Ashi Trend", 
-                                f"[{trend_color}]{latest_ha['trend'].upper()}[/{trend_color}]")
-
-                    # Market Condition
-                    condition_color = {
-                        'TIGHT': 'green',
-                        'NORMAL': 'yellow',
-                        'WIDE': 'red'
-                    }.get(spread_analysis['condition'], 'white')
-
-                    table.add_row(
-                        "Market Condition",
-                        f"[{condition_color}]{spread_analysis['condition']}[/{condition_color}]"
-                    )
 
-                    # Market Message
-                    table.add_row("", "")  # Empty row for spacing
-                    message = get_market_message(latest_ha['trend'], spread_analysis['condition'])
-                    table.add_row("[bold]Analysis", message)
+def monitor_one(monitor: Monitor):
+    settings = monitor.settings
+    coin = settings.coins[0]
+    client = monitor.client(**monitor.client_options())
+    pipeline = monitor.pipeline(client)
 
-                    # Volume Analysis
-                    table.add_row("", "")
-                    table.add_row("[bold]Volume Analysis", "")
+    def fetch():
+        # Price and order book of the one coin
+        responses = monitor.tracked({coin: client.get_latest_price(coin)})
+        return responses, ({coin: client.get_order_book(coin)} if responses else {})
 
-                    imbalance_color = {
-                        'buy': 'green',
-                        'sell': 'red',
-                        'neutral': 'yellow'
-                    }.get(order_book_analysis['dominant_side'], 'white')
+    monitor.run(f"Monitoring {coin} price every {settings.interval} seconds...", fetch,
+                lambda responses, order_books: monitor.process(pipeline, responses, order_books))
 
-                    table.add_row(
-                        "Order Book Imbalance",
-                        f"[{imbalance_color}]{order_book_analysis['imbalance_ratio']:.2%}[/{imbalance_color}]"
-                    )
+def monitor_many(monitor: Monitor):
+    ## Monitor several coins from one batched /latest poll per tick, with the
+    ## per-coin order books fetched concurrently
+    settings = monitor.settings
+    client = monitor.client(**monitor.client_options())
+    pipeline = monitor.pipeline(client)
+
+    def fetch():
+        # One request for every coin's price
+        responses = monitor.tracked(client.split_latest_prices(client.get_latest_prices(), settings.coins))
+        return responses, client.get_order_books(list(responses), max_workers=settings.workers)
+
+    monitor.run(f"Monitoring {settings.label} every {settings.interval} seconds...", fetch,
+                lambda responses, order_books: monitor.process(pipeline, responses, order_books))
+
+def monitor_sharded(monitor: Monitor):
+    ## Like monitor_many, but the analysis runs in `shards` worker processes.
+    ## This process only fetches, renders, evaluates alerts and exports.
+    from crypto_monitor.engine.sharded import ShardedPipeline
 
-                    if vbp_data.get('poc'):
-                        table.add_row("Point of Control", vbp_data['poc'])
-                    table.add_row("Volume Signals", volume_signals)
-                    
-                    console.clear()
-                    console.print(table)
+    settings = monitor.settings
+    client = monitor.client(base_url=settings.base_url)
+    # The universe is fixed when the workers start; with --all it is every
+    # coin in the first /latest response
+    latest = client.get_latest_prices()
+    universe = list(client.split_latest_prices(latest, settings.coins))
+
+    def fetch():
+        nonlocal latest
+        if latest is None:
+            latest = client.get_latest_prices()
+        responses = monitor.tracked(client.split_latest_prices(latest, universe))
+        latest = None
+        return responses, client.get_order_books(list(responses), max_workers=settings.workers)
+
+    def analyze(responses, order_books):
+        results, errors = pipeline.process(responses, order_books)
+        for symbol, error in errors.items():
+            monitor.metrics.inc('crypto_monitor_coin_errors_total', coin=symbol)
+            console.print(f"[yellow]{symbol}: {error}[/yellow]")
+        if monitor.alerts is not None:
+            for symbol, analysis in results.items():
+                analysis['alerts'] = monitor.alerts.evaluate(
+                    symbol, analysis, analysis['latest']['timestamp'].astype('int64') / 1e9
+                )
+        if monitor.exporter is not None:
+            for symbol, analysis in results.items():
+                monitor.exporter.publish(symbol, analysis)
+        return results
 
+    label = settings.label if settings.coins else f"all {len(universe)} coins"
+    with ShardedPipeline(universe, settings.shards, max_history=settings.history, timeframes=settings.timeframes,
+                         store_path=settings.store_path, store_books=settings.store_books, metrics=monitor.metrics,
+                         history_precision=settings.history_precision,
+                         history_decimals=settings.history_decimals) as pipeline:
+        monitor.run(f"Monitoring {label} every {settings.interval} seconds on {settings.shards} shards...",
+                    fetch, analyze)
+
+async def monitor_async(monitor: Monitor):
+    ## Asyncio monitor: ticks fire on a fixed cadence, all fetches of a tick
+    ## overlap, and a tick that overruns causes the next ones to be skipped
+    import asyncio
+    from crypto_monitor.market_data.async_client import AsyncCoinspotClient, ThreadedAsyncTransport
+    from crypto_monitor.market_data.scheduler import TickScheduler
+
+    settings = monitor.settings
+    console.print(f"\n[bold blue]Monitoring {settings.label} every {settings.interval} seconds (async)...[/bold blue]")
+
+    transport = ThreadedAsyncTransport(monitor.transport())
+    async with AsyncCoinspotClient(transport=transport, **monitor.client_options()) as client:
+        pipeline = monitor.pipeline(client)
+
+        async def tick(slot: int):
+            tick_start = time.monotonic()
+            with monitor.metrics.timer('crypto_monitor_fetch_seconds'):
+                if settings.single:
+                    # Price and order book requests run concurrently
+                    coin = settings.coins[0]
+                    response, order_book = await asyncio.gather(
+                        client.get_latest_price(coin), client.get_order_book(coin)
+                    )
+                    responses = monitor.tracked({coin: response})
+                    order_books = {coin: order_book}
                 else:
-                    # Original simple display
-                    click.echo(f"\nTimestamp: {df.index[-1]}")
-                    click.echo(f"Price: ${latest['close']:,.2f}")
-                    click.echo(f"Bid: ${latest['bid']:,.2f}")
-                    click.echo(f"Ask: ${latest['ask']:,.2f}")
-                    click.echo(f"Spread: ${spread_analysis['current_spread']:,.2f} "
-                             f"({spread_analysis['current_spread_percentage']:.2f}%)")
-                    click.echo(f"Trend: {latest['trend'].upper()}")
-                    click.echo(f"Market Condition: {spread_analysis['condition']}")
-
-            time.sleep(interval)
+                    responses = monitor.tracked(
+                        client.split_latest_prices(await client.get_latest_prices(), settings.coins)
+                    )
+                    order_books = await client.get_order_books(list(responses), max_concurrency=settings.workers)
 
+            monitor.finish_tick(monitor.process(pipeline, responses, order_books), tick_start)
+
+        if monitor.dashboard is not None:
+            monitor.dashboard.start()
+        try:
+            stats = await TickScheduler(settings.interval, metrics=monitor.metrics).run(tick, settings.duration)
+            if monitor.dashboard is not None:
+                monitor.dashboard.stop()
+            if stats['skipped']:
+                console.print(f"[yellow]Skipped {stats['skipped']} overrunning tick(s)[/yellow]")
         except Exception as e:
-            console.print(f"[bold red]Error: {str(e)}[/bold red]")
-            import traceback
-            traceback.print_exc()
-            break
-
-def get_market_message(trend: str, condition: str) -> str:
-    ## Generate a market analysis message based on trend and condition
-    messages = []
-    
-    if trend.lower() == 'bullish':
-        messages.append("[green]Upward trend detected[/green]")
-        if condition == 'TIGHT':
-            messages.append("Good conditions for buying")
-    elif trend.lower() == 'bearish':
-        messages.append("[red]Downward trend detected[/red]")
-        if condition == 'TIGHT':
-            messages.append("Good conditions for selling")
-    
-    if condition == 'WIDE':
-        messages.append("[red]Exercise caution - high spread[/red]")
-    elif condition == 'TIGHT':
-        messages.append("[green]Good liquidity conditions[/green]")
-    
-    return " • ".join(messages)
-
-def get_price(coin):
-    client = CoinspotClient()
+            if monitor.dashboard is not None:
+                monitor.dashboard.stop()
+            monitor.report_error(e)
+
+def echo_simple(coin: str, analysis: Dict):
+    # Original simple display
+    latest = analysis['latest']
+    spread_analysis = analysis['spread_analysis']
+
+    click.echo(f"\nTimestamp: {analysis['timestamp']}")
+    click.echo(f"Price: ${latest['close']:,.2f}")
+    click.echo(f"Bid: ${latest['bid']:,.2f}")
+    click.echo(f"Ask: ${latest['ask']:,.2f}")
+    click.echo(f"Spread: ${spread_analysis['current_spread']:,.2f} "
+             f"({spread_analysis['current_spread_percentage']:.2f}%)")
+    click.echo(f"Trend: {analysis['latest_ha']['trend'].upper()}")
+    click.echo(f"Market Condition: {spread_analysis['condition']}")
+
+@click.command()
+@click.option('--from', 'source', default=None, help='Recorded ticks: tick store directory, .csv or .jsonl file')
+@click.option('--synthetic', default=0, help='Replay this many synthetic ticks per coin instead of a file')
+@click.option('--coins', default='BTC,ETH,XRP', help='Coins for synthetic ticks')
+@click.option('--book-depth', default=0, help='Levels per side of synthetic order books (0 = none)')
+@click.option('--seed', default=0, help='Seed for synthetic ticks')
+@click.option('--limit', default=None, type=int, help='Stop after this many ticks')
+@click.option('--history', default=100, help='Price history points kept per coin')
+@click.option('--history-precision', default=None, type=click.Choice(['float64', 'float32', 'int64']),
+              help='Keep only bid/ask/last at this precision (int64 = fixed point) to fit long histories')
+@click.option('--history-decimals', default=8, help='Decimal places kept by --history-precision int64')
+@click.option('--signals', 'show_signals', default=20, help='How many signal changes to list')
+@click.option('--timeframes', default='', help='Also build OHLC bars and analysis for these timeframes (e.g. 1m,5m,1h)')
+@click.option('--alerts', 'alert_rules', default=None, help='JSON file of alert rules to evaluate on every tick')
+@click.option('--alert-file', default=None, help='Append fired alerts to this file as JSON lines')
+@click.option('--rank-by', default='spread_percentage', help='Rank the final cross section by this column (e.g. imbalance_ratio, spread_zscore)')
+@click.option('--top', default=20, help='How many coins of the final cross section to list')
+
+def replay(source: str, synthetic: int, coins: str, book_depth: int, seed: int, limit: int,
+           history: int, history_precision: str, history_decimals: int, show_signals: int, timeframes: str,
+           alert_rules: str, alert_file: str, rank_by: str, top: int):
+    ## Feed recorded or synthetic ticks through the monitor's pipeline at full
+    ## speed and report throughput, per-stage timing and emitted signals
+    from rich.table import Table
+    from crypto_monitor.cli.dashboard import CONDITION_COLORS, TREND_COLORS
+    from crypto_monitor.engine.pipeline import TickPipeline
+    from crypto_monitor.engine.replay import ReplayEngine, read_ticks
+    from crypto_monitor.market_data.synthetic import synthetic_ticks
+
+    if source:
+        ticks = read_ticks(source)
+    elif synthetic:
+        symbols = [c.strip().upper() for c in coins.split(',') if c.strip()]
+        ticks = synthetic_ticks(symbols, synthetic, seed=seed, book_depth=book_depth)
+    else:
+        raise click.UsageError("Give --from PATH or --synthetic N")
+
+    from crypto_monitor.market_data.coinspot import CoinspotClient
+    from crypto_monitor.market_data.transport import Transport
+
+    # Replay never touches the network; alerts are tallied, not printed
+    alerts = build_alerts(alert_rules, alert_file)
+    pipeline = TickPipeline(
+        CoinspotClient(max_history=history, transport=Transport(), history_precision=history_precision,
+                       history_decimals=history_decimals),
+        candles=build_candles(parse_timeframes(timeframes), history),
+        alerts=alerts
+    )
+    try:
+        report = ReplayEngine(pipeline).run(ticks, limit=limit)
+    finally:
+        if alerts is not None:
+            alerts.close()
+
+    console.print(
+        f"\n[bold blue]Replayed {report['ticks']:,} ticks in {report['elapsed']:.3f}s "
+        f"({report['ticks_per_sec']:,.0f} ticks/sec)[/bold blue]"
+    )
+
+    table = Table(title="Stage Timing")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Mean (µs)", justify="right")
+    table.add_column("Share", justify="right")
+    total = sum(stats['total'] for stats in report['stages'].values()) or 1.0
+    for stage, stats in report['stages'].items():
+        table.add_row(stage, f"{stats['total']:.3f}", f"{stats['mean_us']:.1f}", f"{stats['total'] / total:.1%}")
+    console.print(table)
+
+    signals = Table(title=f"Signal Changes ({report['transitions']:,} total)")
+    signals.add_column("Timestamp")
+    signals.add_column("Coin", style="cyan")
+    signals.add_column("Trend")
+    signals.add_column("Condition")
+    signals.add_column("Order Book")
+    for event in report['events'][:show_signals]:
+        trend_color = TREND_COLORS.get(event['trend'], 'white')
+        condition_color = CONDITION_COLORS.get(event['condition'], 'white')
+        signals.add_row(
+            str(event['timestamp']),
+            event['coin'],
+            f"[{trend_color}]{event['trend'].upper()}[/{trend_color}]",
+            f"[{condition_color}]{event['condition']}[/{condition_color}]",
+            event['dominant_side']
+        )
+    console.print(signals)
+
+    if report['timeframe_trends']:
+        bars = Table(title="Closed Bars by Heikin Ashi Trend")
+        bars.add_column("Coin", style="cyan")
+        bars.add_column("Timeframe")
+        for trend in ('bullish', 'neutral', 'bearish'):
+            bars.add_column(f"[{TREND_COLORS[trend]}]{trend.upper()}[/{TREND_COLORS[trend]}]", justify="right")
+        for coin, by_timeframe in report['timeframe_trends'].items():
+            for timeframe, counts in by_timeframe.items():
+                bars.add_row(coin, timeframe, *(f"{counts.get(trend, 0):,}" for trend in ('bullish', 'neutral', 'bearish')))
+        console.print(bars)
+
+    if not report['snapshot'].empty:
+        import pandas as pd
+        from crypto_monitor.analysis.panel import rank_coins
+        try:
+            ranked = rank_coins(report['snapshot'], rank_by, top=top)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--rank-by')
+        section = Table(title=f"Cross Section by {rank_by}")
+        section.add_column("Coin", style="cyan")
+        section.add_column("Last", justify="right")
+        section.add_column("Spread %", justify="right")
+        section.add_column("Spread Z", justify="right")
+        section.add_column("Condition")
+        section.add_column("Trend")
+        section.add_column("Imbalance", justify="right")
+        for coin, row in ranked.iterrows():
+            trend_color = TREND_COLORS.get(row['trend'], 'white')
+            condition_color = CONDITION_COLORS.get(row['condition'], 'white')
+            section.add_row(
+                coin, f"{row['last']:,.2f}", f"{row['spread_percentage']:.3f}%",
+                "-" if pd.isna(row['spread_zscore']) else f"{row['spread_zscore']:+.2f}",
+                f"[{condition_color}]{row['condition']}[/{condition_color}]",
+                f"[{trend_color}]{row['trend'].upper()}[/{trend_color}]",
+                "-" if pd.isna(row['imbalance_ratio']) else f"{row['imbalance_ratio']:+.2f}"
+            )
+        console.print(section)
+
+    if alerts is not None:
+        fired = Table(title=f"Alerts Fired ({sum(report['alerts'].values()):,} total)")
+        fired.add_column("Rule", style="cyan")
+        fired.add_column("Count", justify="right")
+        for rule in alerts.rules:
+            fired.add_row(rule.name, f"{report['alerts'].get(rule.name, 0):,}")
+        console.print(fired)
+
+@click.command()
+@click.argument('coins', nargs=-1)
+@click.option('--json', 'as_json', is_flag=True, help='Print one JSON object per coin')
+@click.option('--timeout', default=10.0, help='Request timeout in seconds')
+@click.option('--base-url', default=None, help='API base URL, e.g. a local simulator (default: $COINSPOT_BASE_URL or Coinspot)')
+
+def price(coins, as_json: bool, timeout: float, base_url: str):
+    ## Latest bid/ask/last for one or more coins (default BTC). Uses only the
+    ## standard library, and exits non-zero if any lookup fails.
+    failed = False
+    for coin in [c.upper() for c in coins] or ['BTC']:
+        try:
+            formatted = lite.format_price(lite.get_latest_price(coin, base_url, timeout))
+        except (lite.LiteAPIError, ValueError) as e:
+            failed = True
+            click.echo(f"Error: {str(e)}", err=True)
+            continue
+
+        if as_json:
+            click.echo(json.dumps(dict(coin=coin, **formatted)))
+        else:
+            click.echo(f"\n{coin} Price Information:")
+            click.echo(f"Bid: ${formatted['bid']:,.2f}")
+            click.echo(f"Ask: ${formatted['ask']:,.2f}")
+            click.echo(f"Last: ${formatted['last']:,.2f}")
+            click.echo(f"Spread: ${formatted['spread']:,.2f} ({formatted['spread_percentage']:.3f}%)\n")
+
+    if failed:
+        sys.exit(1)
+
+@click.command()
+@click.argument('coin', default='BTC')
+@click.option('--depth', default=5, help='Levels to show per side')
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON')
+@click.option('--timeout', default=10.0, help='Request timeout in seconds')
+@click.option('--base-url', default=None, help='API base URL, e.g. a local simulator (default: $COINSPOT_BASE_URL or Coinspot)')
+
+def book(coin: str, depth: int, as_json: bool, timeout: float, base_url: str):
+    ## Order book summary: best prices, total volume per side, imbalance and
+    ## the top levels. Standard library only, like `price`.
+    coin = coin.upper()
     try:
-        response = client.get_latest_price(coin)
-        formatted = client.format_price_data(response)
-
-        click.echo(f"\n{coin} Price Information:")
-        click.echo(f"Bid: ${formatted['bid']:,.2f}")
-        click.echo(f"Ask: ${formatted['ask']:,.2f}")
-        click.echo(f"Last: ${formatted['last']:,.2f}")
-        click.echo(f"Spread: ${formatted['spread']:,.2f}\n")
-    except Exception as e:
+        summary = lite.summarize_order_book(lite.get_order_book(coin, base_url, timeout), depth)
+    except (lite.LiteAPIError, ValueError) as e:
         click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+    if as_json:
+        click.echo(json.dumps(dict(coin=coin, **summary)))
+        return
+
+    click.echo(f"\n{coin} Order Book:")
+    if summary['best_bid'] is not None and summary['best_ask'] is not None:
+        click.echo(f"Best Bid: ${summary['best_bid']:,.2f}  Best Ask: ${summary['best_ask']:,.2f}")
+    click.echo(f"Buy Volume: ${summary['buy_volume']:,.2f}  Sell Volume: ${summary['sell_volume']:,.2f}")
+    click.echo(f"Imbalance: {summary['imbalance_ratio']:.2%}")
+    click.echo(f"\n{'Bid':>16} {'Amount':>14} | {'Ask':>16} {'Amount':>14}")
+    for i in range(max(len(summary['bids']), len(summary['asks']))):
+        bid = summary['bids'][i] if i < len(summary['bids']) else None
+        ask = summary['asks'][i] if i < len(summary['asks']) else None
+        left = f"{bid[0]:>16,.2f} {bid[1]:>14,.6f}" if bid else ' ' * 31
+        right = f"{ask[0]:>16,.2f} {ask[1]:>14,.6f}" if ask else ''
+        click.echo(f"{left} | {right}")
+
+@click.command()
+@click.option('--host', default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', default=8765, help='Port to listen on (0 = any free port)')
+@click.option('--coins', default=None, help='Comma separated symbols to simulate (default: BTC,ETH,XRP,DOGE,SOL)')
+@click.option('--num-coins', default=0, help='Simulate this many coins instead, padded with made-up symbols')
+@click.option('--book-depth', default=20, help='Order book levels per side')
+@click.option('--latency', default=0.0, help='Seconds added to every response')
+@click.option('--jitter', default=0.0, help='Up to this many more seconds of random latency')
+@click.option('--error-rate', default=0.0, help='Fraction of requests answered with HTTP 500')
+@click.option('--rate-limit-rate', default=0.0, help='Fraction of requests answered with HTTP 429')
+@click.option('--retry-after', default=1.0, help='Retry-After seconds sent with 429s')
+@click.option('--seed', default=None, type=int, help='Seed for reproducible prices and faults')
+
+def simulate(host: str, port: int, coins: str, num_coins: int, book_depth: int, latency: float, jitter: float,
+             error_rate: float, rate_limit_rate: float, retry_after: float, seed: int):
+    ## Serve a local stand-in for Coinspot's public API until interrupted,
+    ## for offline load tests of the client and the monitor loop
+    from crypto_monitor.market_data.simulator import CoinspotSimulator
+
+    options = dict(host=host, port=port, latency=latency, jitter=jitter, error_rate=error_rate,
+                   rate_limit_rate=rate_limit_rate, retry_after=retry_after, book_depth=book_depth, seed=seed)
+    if num_coins:
+        options['coins'] = num_coins
+    elif coins:
+        options['coins'] = [c.strip().upper() for c in coins.split(',') if c.strip()]
+    simulator = CoinspotSimulator(**options)
+
+    console.print(f"[bold blue]Simulating {len(simulator.market.coins)} coins at {simulator.base_url}[/bold blue]")
+    console.print(f"[dim]export {lite.BASE_URL_ENV}={simulator.base_url}[/dim]")
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+    for (endpoint, status), count in sorted(simulator.requests.items()):
+        click.echo(f"{endpoint} {status}: {count:,}")
+
+cli.add_command(monitor_price, name='monitor')
+cli.add_command(replay)
+cli.add_command(price)
+cli.add_command(book)
+cli.add_command(simulate)
 
 if __name__ == '__main__':
-    monitor_price()
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    ## One JSON object per record: time, level, logger and message plus any
+    ## structured fields passed via `extra` (e.g. the spread_calculation event)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    ## Drops records when the queue is full instead of blocking the caller
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_queued_logging(handler: logging.Handler, level: int = logging.INFO,
+                         logger_name: str = 'crypto_monitor', max_queue: int = 10000) -> QueueListener:
+    ## Route `logger_name` records through a bounded queue to `handler` on a
+    ## background thread, so logging never blocks the monitor loop on I/O.
+    ## Call stop() on the returned listener to flush and detach.
+    log_queue = queue.Queue(maxsize=max_queue)
+    queue_handler = _DroppingQueueHandler(log_queue)
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.queue_handler = queue_handler
+    listener.logger = logger
+    listener.start()
+    return listener
+
+
+def stop_queued_logging(listener: Optional[QueueListener]):
+    if listener is None:
+        return
+    listener.stop()
+    listener.logger.removeHandler(listener.queue_handler)
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,249 @@
+import time
+import pandas as pd
+from typing import Dict, Optional
+from crypto_monitor.alerts.rules import AlertEngine
+from crypto_monitor.analysis.heikin_ashi import StreamingHeikinAshi
+from crypto_monitor.analysis.spread_analyzer import SpreadAnalyzer
+from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer, VolumeProfile
+from crypto_monitor.export.stream import StreamExporter
+from crypto_monitor.market_data.candles import CandleAggregator
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+
+# Stages of TickPipeline.process, in order
+STAGES = ('ingest', 'history', 'heikin_ashi', 'spread', 'vbp', 'order_book', 'signals')
+
+
+class StageTimer:
+    ## Accumulates wall time and call counts per pipeline stage, and feeds
+    ## each sample to a latency histogram when metrics are enabled
+
+    def __init__(self, metrics: Optional[Metrics] = None):
+        self.totals: Dict[str, float] = {stage: 0.0 for stage in STAGES}
+        self.counts: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._observe = self.metrics.observe if self.metrics.enabled else None
+
+    def add(self, stage: str, seconds: float):
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        if self._observe is not None:
+            self._observe('crypto_monitor_stage_seconds', seconds, stage=stage)
+
+    def reset(self):
+        for stage in self.totals:
+            self.totals[stage] = 0.0
+            self.counts[stage] = 0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                'total': total,
+                'calls': self.counts[stage],
+                'mean_us': total / self.counts[stage] * 1e6 if self.counts[stage] else 0.0
+            }
+            for stage, total in self.totals.items()
+        }
+
+
+class TickPipeline:
+    ## The per-tick analysis shared by the live monitor and replay: ingest a
+    ## price response into the client's history, then run Heikin Ashi,
+    ## spread, volume-by-price and order book analysis on it.
+    ##
+    ## Volume-by-price is kept per coin in a VolumeProfile over the same
+    ## window as the history, updated with each new tick.
+    ##
+    ## With a CandleAggregator, each tick also updates true OHLC bars per
+    ## timeframe, and Heikin Ashi and volume-by-price run on a timeframe's
+    ## bars whenever one of its bars closes.
+    ##
+    ## Order books are diffed against the coin's previous snapshot by the
+    ## client; an unchanged book reuses the last analysis, and a changed one
+    ## is analyzed from the running totals instead of the full payload. When
+    ## the fetch failed, the last analysis is reused with 'stale': True.
+    ##
+    ## Analyzing a point already in the history (analyze) reuses the coin's
+    ## last Heikin Ashi candle and spread analysis instead of feeding the
+    ## point to the streaming state again.
+    ##
+    ## With an AlertEngine, each new tick's analysis is also checked against
+    ## the alert rules; the alerts it fired are returned under 'alerts'.
+    ##
+    ## With a StreamExporter, each new tick's records are queued for export.
+
+    def __init__(self, client, ha_analyzer: StreamingHeikinAshi = None,
+                 spread_analyzer: SpreadAnalyzer = None, volume_analyzer: VolumeAnalyzer = None,
+                 metrics: Optional[Metrics] = None, candles: Optional[CandleAggregator] = None,
+                 alerts: Optional[AlertEngine] = None, exporter: Optional[StreamExporter] = None):
+        self.client = client
+        self.ha_analyzer = ha_analyzer or StreamingHeikinAshi()
+        # Streaming spread statistics over the same window as the history
+        self.spread_analyzer = spread_analyzer or SpreadAnalyzer(max_points=client.max_history)
+        self.volume_analyzer = volume_analyzer or VolumeAnalyzer()
+        self.timer = StageTimer(metrics)
+        self.candles = candles
+        self.alerts = alerts
+        self.exporter = exporter
+        self._timeframes: Dict[str, Dict[str, Dict]] = {}
+        self._order_books: Dict[str, Dict] = {}
+        # Last Heikin Ashi candle and spread analysis per coin, reused when
+        # a point already in the history is analyzed again
+        self._latest_ha: Dict[str, Dict] = {}
+        self._spreads: Dict[str, Dict] = {}
+        self._profiles: Dict[str, VolumeProfile] = {}
+
+    def process(self, coin: str, response: Dict, order_book: Optional[Dict] = None,
+                timestamp=None) -> Dict:
+        # Ingest one /latest/{coin} style response and analyze the coin
+        clock = time.perf_counter
+        timer = self.timer
+
+        start = clock()
+        self.client.add_price_to_history(coin, response, timestamp=timestamp)
+        mark = clock()
+        timer.add('ingest', mark - start)
+
+        return self._analyze(coin, order_book or {}, mark, new_tick=True)
+
+    def analyze(self, coin: str, order_book: Optional[Dict] = None) -> Dict:
+        # Analyze a coin whose newest price is already in the history
+        return self._analyze(coin, order_book or {}, time.perf_counter())
+
+    def _update_timeframes(self, coin: str, latest: Dict) -> Dict[str, Dict]:
+        # Feed the newest tick to the candle aggregator and re-run the
+        # analyzers for the timeframes whose bar just closed
+        closed = self.candles.update(
+            coin, latest['timestamp'].astype('int64'), latest['bid'], latest['ask'], latest['last']
+        )
+        state = self._timeframes.setdefault(coin, {})
+        for timeframe, bar in closed.items():
+            state[timeframe] = {
+                'bar': bar,
+                # HA state is kept per coin and timeframe
+                'latest_ha': self.ha_analyzer.update(
+                    f"{coin}@{timeframe}", bar['open'], bar['high'], bar['low'], bar['close']
+                ),
+                'vbp_data': self.volume_analyzer.calculate_vbp(self.candles.frame(coin, timeframe))
+            }
+        return dict(state)
+
+    def _volume_profile(self, coin: str, latest: Dict, new_tick: bool) -> Dict:
+        profile = self._profiles.get(coin)
+        if profile is None:
+            # Seeded from the history, which may have been warm-loaded
+            arrays = self.client.get_price_arrays(coin)
+            profile = self._profiles[coin] = self.volume_analyzer.new_profile(
+                latest['close'], window=self.client.max_history
+            )
+            for low, high in zip(arrays['low'].tolist(), arrays['high'].tolist()):
+                profile.add(low, high)
+        elif new_tick:
+            profile.add(float(latest['low']), float(latest['high']))
+        return profile.snapshot(self.volume_analyzer.price_levels)
+
+    def _analyze_order_book(self, coin: str, order_book: Dict) -> Dict:
+        if not order_book:
+            return self.volume_analyzer.analyze_order_book([], [])
+
+        diff = self.client.diff_order_book(coin, order_book)
+        previous = self._order_books.get(coin)
+        if diff['stale']:
+            # Failed fetch: the last analysis (or an empty book) marked stale
+            self.timer.metrics.inc('crypto_monitor_order_books_failed_total')
+            if previous is None:
+                previous = self.volume_analyzer.analyze_order_book([], [])
+            return dict(previous, stale=True)
+        if diff['unchanged'] and previous is not None:
+            self.timer.metrics.inc('crypto_monitor_order_books_unchanged_total')
+            return previous
+
+        if not diff['bid_levels'] or not diff['ask_levels']:
+            analysis = self.volume_analyzer.analyze_order_book([], [])
+        else:
+            analysis = self.volume_analyzer.analyze_order_book_volumes(diff['buy_volume'], diff['sell_volume'])
+        self._order_books[coin] = analysis
+        return analysis
+
+    def _analyze(self, coin: str, order_book: Dict, start: float, new_tick: bool = False) -> Dict:
+        clock = time.perf_counter
+        timer = self.timer
+
+        # Newest point only; the full columns are never materialized
+        latest = self.client.get_latest_point(coin)
+        if not latest:
+            return {}
+        mark = clock()
+        timer.add('history', mark - start)
+
+        # Streaming state only moves on a new tick (or a coin's first look)
+        advance = new_tick or coin not in self._latest_ha
+
+        # Advance HA by the newest candle only
+        if advance:
+            latest_ha = self._latest_ha[coin] = self.ha_analyzer.update(
+                coin, latest['open'], latest['high'], latest['low'], latest['close']
+            )
+        else:
+            latest_ha = self._latest_ha[coin]
+        start, mark = mark, clock()
+        timer.add('heikin_ashi', mark - start)
+
+        if advance:
+            spread_analysis = self._spreads[coin] = self.spread_analyzer.update(
+                coin, latest['spread_absolute'], latest['spread_percentage'],
+                latest['timestamp'].astype('int64') / 1e9
+            )
+        else:
+            spread_analysis = self._spreads[coin]
+        start, mark = mark, clock()
+        timer.add('spread', mark - start)
+
+        vbp_data = self._volume_profile(coin, latest, new_tick)
+        start, mark = mark, clock()
+        timer.add('vbp', mark - start)
+
+        order_book_analysis = self._analyze_order_book(coin, order_book)
+        start, mark = mark, clock()
+        timer.add('order_book', mark - start)
+
+        volume_signals = self.volume_analyzer.get_volume_signals(
+            vbp_data,
+            order_book_analysis
+        )
+        start, mark = mark, clock()
+        timer.add('signals', mark - start)
+
+        timeframes = {}
+        if self.candles is not None:
+            if new_tick:
+                timeframes = self._update_timeframes(coin, latest)
+            else:
+                timeframes = dict(self._timeframes.get(coin, {}))
+            start, mark = mark, clock()
+            timer.add('candles', mark - start)
+
+        analysis = {
+            'timestamp': pd.Timestamp(latest['timestamp']),
+            'latest': latest,
+            'latest_ha': latest_ha,
+            'spread_analysis': spread_analysis,
+            'vbp_data': vbp_data,
+            'order_book_analysis': order_book_analysis,
+            'volume_signals': volume_signals,
+            'timeframes': timeframes
+        }
+
+        if self.alerts is not None:
+            # Rules fire on state changes, so only genuinely new ticks count
+            analysis['alerts'] = self.alerts.evaluate(
+                coin, analysis, latest['timestamp'].astype('int64') / 1e9
+            ) if new_tick else []
+            timer.add('alerts', clock() - mark)
+
+        if self.exporter is not None and new_tick:
+            # Queued for the exporter's thread; never blocks
+            start = clock()
+            self.exporter.publish(coin, analysis)
+            timer.add('export', clock() - start)
+
+        return analysis
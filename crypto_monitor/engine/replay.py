@@ -0,0 +1,160 @@
+import csv
+import heapq
+import json
+import os
+import time
+import pandas as pd
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from crypto_monitor.analysis.panel import cross_section
+from crypto_monitor.engine.pipeline import TickPipeline
+from crypto_monitor.market_data.candles import CandleAggregator
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.transport import Transport
+from crypto_monitor.storage.tick_store import TickStore
+
+# (coin, timestamp, /latest/{coin} style response, order book or None)
+Tick = Tuple[str, object, Dict, Optional[Dict]]
+
+
+def _response(bid, ask, last) -> Dict:
+    return {'status': 'ok', 'message': 'ok', 'prices': {'bid': bid, 'ask': ask, 'last': last}}
+
+
+def read_ticks(path: str) -> Iterator[Tick]:
+    ## Recorded ticks from a TickStore directory, a CSV file
+    ## (coin,timestamp,bid,ask,last) or newline-delimited JSON with either
+    ## bid/ask/last or a 'prices' object, and an optional 'order_book'
+    if os.path.isdir(path):
+        yield from _read_store(TickStore(path))
+    elif path.endswith('.csv'):
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield (
+                    row['coin'].upper(), pd.Timestamp(row['timestamp']).to_pydatetime(),
+                    _response(row['bid'], row['ask'], row['last']), None
+                )
+    else:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                prices = record.get('prices') or record
+                yield (
+                    record['coin'].upper(), pd.Timestamp(record['timestamp']).to_pydatetime(),
+                    _response(prices['bid'], prices['ask'], prices['last']), record.get('order_book')
+                )
+
+
+def _read_store(store: TickStore) -> Iterator[Tick]:
+    # Merge every coin's ticks in time order, attaching the newest recorded
+    # order book at or before each tick
+    def coin_ticks(coin: str):
+        frame = store.read_frame(coin, columns=['bid', 'ask', 'last'])
+        books = store.read_order_books(coin)
+        book_index = -1
+        for timestamp, bid, ask, last in zip(frame.index, frame['bid'], frame['ask'], frame['last']):
+            timestamp = timestamp.to_pydatetime()
+            while book_index + 1 < len(books) and books[book_index + 1][0] <= timestamp:
+                book_index += 1
+            order_book = books[book_index][1] if book_index >= 0 else None
+            yield timestamp, coin, _response(bid, ask, last), order_book
+
+    merged = heapq.merge(*(coin_ticks(coin) for coin in store.coins()), key=lambda tick: tick[0])
+    for timestamp, coin, response, order_book in merged:
+        yield coin, timestamp, response, order_book
+
+
+class ReplayEngine:
+    ## Drives recorded or synthetic ticks through the same TickPipeline as the
+    ## live monitor, as fast as the CPU allows, and reports throughput,
+    ## per-stage timing and the signals the analyzers emitted.
+
+    def __init__(self, pipeline: TickPipeline = None, max_history: int = 100, max_events: int = 1000,
+                 timeframes: Optional[Iterable[str]] = None):
+        if pipeline is None:
+            # Replay never touches the network
+            pipeline = TickPipeline(
+                CoinspotClient(max_history=max_history, transport=Transport()),
+                candles=CandleAggregator(timeframes, capacity=max_history) if timeframes else None
+            )
+        self.pipeline = pipeline
+        self.max_events = max_events
+
+    def run(self, ticks: Iterable[Tick], limit: Optional[int] = None) -> Dict:
+        self.pipeline.timer.reset()
+        trends: Dict[str, Counter] = {}
+        conditions: Dict[str, Counter] = {}
+        previous: Dict[str, Tuple] = {}
+        events: List[Dict] = []
+        # Trend of every closed bar, per coin and timeframe
+        timeframe_trends: Dict[str, Dict[str, Counter]] = {}
+        last_bars: Dict[Tuple[str, str], Dict] = {}
+        # Alerts fired per rule, when the pipeline has an alert engine
+        alerts: Counter = Counter()
+        transitions = 0
+        count = 0
+
+        start = time.perf_counter()
+        for coin, timestamp, response, order_book in ticks:
+            if limit is not None and count >= limit:
+                break
+            analysis = self.pipeline.process(coin, response, order_book, timestamp=timestamp)
+            count += 1
+            if not analysis:
+                continue
+
+            trend = analysis['latest_ha']['trend']
+            condition = analysis['spread_analysis']['condition']
+            side = analysis['order_book_analysis']['dominant_side']
+            trends.setdefault(coin, Counter())[trend] += 1
+            conditions.setdefault(coin, Counter())[condition] += 1
+            for timeframe, result in analysis.get('timeframes', {}).items():
+                if last_bars.get((coin, timeframe)) is not result['bar']:
+                    last_bars[(coin, timeframe)] = result['bar']
+                    counts = timeframe_trends.setdefault(coin, {}).setdefault(timeframe, Counter())
+                    counts[result['latest_ha']['trend']] += 1
+            for alert in analysis.get('alerts', ()):
+                alerts[alert['rule']] += 1
+
+            # Signals are the points where a coin's state changes
+            state = (trend, condition, side)
+            if previous.get(coin) != state:
+                previous[coin] = state
+                transitions += 1
+                if len(events) < self.max_events:
+                    events.append({
+                        'timestamp': analysis['timestamp'],
+                        'coin': coin,
+                        'trend': trend,
+                        'condition': condition,
+                        'dominant_side': side,
+                        'volume_signals': analysis['volume_signals']
+                    })
+        elapsed = time.perf_counter() - start
+
+        # Where every coin ended up, analyzed as one panel
+        client = self.pipeline.client
+        panel = client.get_price_panel()
+        snapshot = cross_section(
+            panel, self.pipeline.spread_analyzer, volume_analyzer=self.pipeline.volume_analyzer,
+            order_book_volumes={coin: client.order_books.volumes(coin) for coin in panel['coins'] if coin in client.order_books}
+        )
+
+        return {
+            'ticks': count,
+            'elapsed': elapsed,
+            'ticks_per_sec': count / elapsed if elapsed > 0 else 0.0,
+            'stages': self.pipeline.timer.summary(),
+            'trends': {coin: dict(counts) for coin, counts in trends.items()},
+            'conditions': {coin: dict(counts) for coin, counts in conditions.items()},
+            'transitions': transitions,
+            'events': events,
+            'timeframe_trends': {
+                coin: {timeframe: dict(counts) for timeframe, counts in by_timeframe.items()}
+                for coin, by_timeframe in timeframe_trends.items()
+            },
+            'alerts': dict(alerts),
+            'snapshot': snapshot
+        }
@@ -0,0 +1,260 @@
+import json
+import multiprocessing
+import os
+import queue
+import time
+import numpy as np
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+from crypto_monitor.storage.tick_store import to_epoch_ns
+
+# Columns of the shared price block, one row per coin
+PRICE_FIELDS = ('bid', 'ask', 'last')
+
+
+def shard_coins(coins: Iterable[str], shards: int) -> List[List[str]]:
+    # Deal the sorted universe round robin so shards get similar counts
+    ordered = sorted({coin.upper() for coin in coins})
+    return [ordered[i::shards] for i in range(max(1, shards)) if ordered[i::shards]]
+
+
+def compact_result(analysis: Dict) -> Dict:
+    ## The parts of a TickPipeline analysis that the dashboard, the simple
+    ## display, alert rules and the stream exporter read. The volume profile
+    ## arrays stay behind, which keeps what crosses the process boundary
+    ## small.
+    def poc(vbp_data: Dict) -> Dict:
+        return {'poc': vbp_data['poc'], 'poc_volume': vbp_data['poc_volume']} if vbp_data else {}
+
+    return {
+        'timestamp': analysis['timestamp'],
+        'latest': analysis['latest'],
+        'latest_ha': analysis['latest_ha'],
+        'spread_analysis': analysis['spread_analysis'],
+        'vbp_data': poc(analysis['vbp_data']),
+        'order_book_analysis': analysis['order_book_analysis'],
+        'volume_signals': analysis['volume_signals'],
+        'timeframes': {
+            timeframe: {'bar': result['bar'], 'latest_ha': result['latest_ha'], 'vbp_data': poc(result['vbp_data'])}
+            for timeframe, result in analysis['timeframes'].items()
+        }
+    }
+
+
+class SharedBuffer:
+    ## Shared memory block written by the fetcher and read by one worker.
+    ## A payload that does not fit replaces the block with a bigger one;
+    ## the worker re-attaches when the name it is sent changes.
+
+    def __init__(self, size: int = 1 << 20):
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, data: bytes) -> Tuple[str, int]:
+        if len(data) > self._shm.size:
+            size = max(len(data), 2 * self._shm.size)
+            self.close()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._shm.buf[:len(data)] = data
+        return self._shm.name, len(data)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _run_shard(shard: int, coins: List[str], rows: Dict[str, int], prices_name: str,
+               commands, results, options: Dict):
+    ## Worker process: a TickPipeline for one shard's coins, fed from shared
+    ## memory until it receives None
+    import pandas as pd
+    from crypto_monitor.engine.pipeline import TickPipeline
+    from crypto_monitor.market_data.candles import CandleAggregator
+    from crypto_monitor.market_data.coinspot import CoinspotClient
+    from crypto_monitor.market_data.transport import Transport
+    from crypto_monitor.storage.tick_store import TickStore
+
+    prices_shm = shared_memory.SharedMemory(name=prices_name)
+    prices = np.ndarray((options['universe'], len(PRICE_FIELDS)), dtype=np.float64, buffer=prices_shm.buf)
+    # Each shard writes only its own coins' partitions, so stores can share a root
+    store = TickStore(options['store_path'], order_books=options['store_books']) if options['store_path'] else None
+    timeframes = options['timeframes']
+    # Data comes from the fetcher, never the network
+    pipeline = TickPipeline(
+        CoinspotClient(max_history=options['max_history'], transport=Transport(), store=store,
+                       history_precision=options['history_precision'], history_decimals=options['history_decimals']),
+        candles=CandleAggregator(timeframes) if timeframes else None
+    )
+    books_shm: Optional[shared_memory.SharedMemory] = None
+
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                return
+            seq, timestamp_ns, books_name, books_length = command
+            start = time.perf_counter()
+
+            order_books = {}
+            if books_name:
+                if books_shm is None or books_shm.name != books_name:
+                    if books_shm is not None:
+                        books_shm.close()
+                    books_shm = shared_memory.SharedMemory(name=books_name)
+                order_books = json.loads(bytes(books_shm.buf[:books_length]))
+
+            timestamp = pd.Timestamp(timestamp_ns).to_pydatetime()
+            analyses, errors = {}, {}
+            for coin in coins:
+                bid, ask, last = prices[rows[coin]]
+                if np.isnan(bid):
+                    continue # No price this tick; the fetcher reports it
+                response = {'status': 'ok', 'message': 'ok', 'prices': {'bid': bid, 'ask': ask, 'last': last}}
+                try:
+                    analysis = pipeline.process(coin, response, order_books.get(coin), timestamp=timestamp)
+                except Exception as e:
+                    errors[coin] = f"{type(e).__name__}: {e}"
+                    continue
+                if analysis:
+                    analyses[coin] = compact_result(analysis)
+                    if store is not None and store.order_books and coin in order_books:
+                        store.append_order_book(coin, timestamp, order_books[coin])
+
+            results.put((shard, seq, analyses, errors, time.perf_counter() - start))
+    finally:
+        if books_shm is not None:
+            books_shm.close()
+        prices_shm.close()
+        if store is not None:
+            store.close()
+
+
+class ShardedPipeline:
+    ## Runs TickPipeline across a pool of persistent worker processes, one
+    ## shard of the coin universe each, so the analyzers use every core.
+    ##
+    ## The fetcher (the calling process) writes each tick's prices into a
+    ## shared coin x (bid, ask, last) block and each shard's order books into
+    ## that shard's shared buffer, then sends every worker a tiny command.
+    ## Workers reply on one queue with compact results, which process()
+    ## merges for the single renderer. Ticks are processed one at a time,
+    ## so the shared blocks are never written while a worker reads them.
+
+    def __init__(self, coins: Iterable[str], shards: int = None, max_history: int = 100,
+                 timeframes: Iterable[str] = (), store_path: str = None, store_books: bool = False,
+                 start_method: str = 'spawn', timeout: float = 60.0, metrics: Metrics = None,
+                 history_precision: str = None, history_decimals: int = 8):
+        shards = shards or os.cpu_count() or 1
+        self.shards = shard_coins(coins, shards)
+        self.coins = [coin for shard in self.shards for coin in shard]
+        if not self.coins:
+            raise ValueError("No coins to shard")
+        self.rows = {coin: row for row, coin in enumerate(self.coins)}
+        self.timeout = timeout
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._options = {
+            'universe': len(self.coins),
+            'max_history': max_history,
+            'history_precision': history_precision,
+            'history_decimals': history_decimals,
+            'timeframes': tuple(timeframes),
+            'store_path': store_path,
+            'store_books': store_books
+        }
+        self._context = multiprocessing.get_context(start_method)
+        self._seq = 0
+        self._prices_shm: Optional[shared_memory.SharedMemory] = None
+        self._buffers: List[SharedBuffer] = []
+        self._commands = []
+        self._workers = []
+        self._results = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        size = len(self.coins) * len(PRICE_FIELDS) * 8
+        self._prices_shm = shared_memory.SharedMemory(create=True, size=size)
+        self._prices = np.ndarray((len(self.coins), len(PRICE_FIELDS)), dtype=np.float64, buffer=self._prices_shm.buf)
+        self._prices[:] = np.nan
+        self._results = self._context.Queue()
+
+        for shard, coins in enumerate(self.shards):
+            commands = self._context.Queue()
+            worker = self._context.Process(
+                target=_run_shard, name=f"shard-{shard}", daemon=True,
+                args=(shard, coins, {coin: self.rows[coin] for coin in coins}, self._prices_shm.name,
+                      commands, self._results, self._options)
+            )
+            worker.start()
+            self._commands.append(commands)
+            self._workers.append(worker)
+            self._buffers.append(SharedBuffer())
+
+    def process(self, responses: Dict[str, Dict], order_books: Optional[Dict[str, Dict]] = None,
+                timestamp=None) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        ## Analyze one tick of /latest/{coin} style responses (and optional
+        ## order books) across the shards. Returns the analyses and the
+        ## per-coin errors raised in the workers. Coins outside the universe
+        ## given at construction are ignored.
+        order_books = order_books or {}
+        # Naive wall-clock time, like the single-process monitor
+        timestamp_ns = to_epoch_ns(timestamp if timestamp is not None else datetime.now())
+        self._seq += 1
+
+        self._prices[:] = np.nan
+        for coin, response in responses.items():
+            row = self.rows.get(coin.upper())
+            if row is None or response.get('status') != 'ok' or 'prices' not in response:
+                continue
+            prices = response['prices']
+            self._prices[row] = [float(prices[field]) for field in PRICE_FIELDS]
+
+        for shard, coins in enumerate(self.shards):
+            books = {coin: order_books[coin] for coin in coins if coin in order_books}
+            name, length = self._buffers[shard].write(json.dumps(books).encode()) if books else (None, 0)
+            self._commands[shard].put((self._seq, timestamp_ns, name, length))
+
+        analyses, errors = {}, {}
+        waiting = len(self.shards)
+        while waiting:
+            try:
+                shard, seq, shard_analyses, shard_errors, seconds = self._results.get(timeout=self.timeout)
+            except queue.Empty:
+                dead = [worker.name for worker in self._workers if not worker.is_alive()]
+                raise RuntimeError(f"Shard workers did not answer within {self.timeout}s"
+                                   + (f" ({', '.join(dead)} exited)" if dead else ""))
+            if seq != self._seq:
+                continue # Late reply to a tick that already timed out
+            waiting -= 1
+            analyses.update(shard_analyses)
+            errors.update(shard_errors)
+            self.metrics.observe('crypto_monitor_shard_seconds', seconds, shard=str(shard))
+        return analyses, errors
+
+    def close(self):
+        for commands in self._commands:
+            commands.put(None)
+        for worker in self._workers:
+            worker.join(timeout=self.timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self._commands, self._workers = [], []
+
+        for buffer in self._buffers:
+            buffer.close()
+        self._buffers = []
+        if self._prices_shm is not None:
+            del self._prices
+            self._prices_shm.close()
+            self._prices_shm.unlink()
+            self._prices_shm = None
@@ -0,0 +1,229 @@
+import base64
+import hashlib
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# RFC 6455 handshake constant
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC11B85'
+
+
+class Destination:
+    ## Where StreamExporter sends encoded batches. send() runs on the
+    ## exporter's thread; `header` (e.g. an Arrow schema) must precede the
+    ## first batch of every file or connection, and `binary` tells framed
+    ## protocols what kind of message to send.
+
+    def send(self, data: bytes, header: bytes = b'', binary: bool = False):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileDestination(Destination):
+    ## Batches appended to a file; the header is written when the file is
+    ## empty
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'ab')
+
+    def send(self, data: bytes, header: bytes = b'', binary: bool = False):
+        if header and self._file.tell() == 0:
+            self._file.write(header)
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _Client:
+    def __init__(self, sock: socket.socket, address):
+        self.sock = sock
+        self.address = address
+        self.started = False # Header sent
+
+
+class SocketServerDestination(Destination):
+    ## Listens for consumers and sends every batch to each one connected.
+    ## A consumer that does not take a batch within `send_timeout` seconds
+    ## is disconnected, so one slow reader cannot hold back the others.
+    ## Consumers only receive; anything they send is ignored.
+
+    def __init__(self, family: int, address, send_timeout: float = 1.0, backlog: int = 16):
+        self.send_timeout = send_timeout
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen(backlog)
+        self._clients: List[_Client] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, name='export-accept', daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        return self._server.getsockname()
+
+    @property
+    def clients(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                return # Closed
+            try:
+                sock.settimeout(self.send_timeout)
+                if sock.family == socket.AF_INET:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._handshake(sock)
+            except OSError as e:
+                logger.info("Export consumer %s failed to connect: %s", address, e)
+                sock.close()
+                continue
+            with self._lock:
+                self._clients.append(_Client(sock, address))
+
+    def _handshake(self, sock: socket.socket):
+        pass
+
+    def _frame(self, data: bytes, binary: bool) -> bytes:
+        return data
+
+    def send(self, data: bytes, header: bytes = b'', binary: bool = False):
+        with self._lock:
+            clients = list(self._clients)
+        dead = []
+        for client in clients:
+            try:
+                if not client.started:
+                    if header:
+                        client.sock.sendall(self._frame(header, binary))
+                    client.started = True
+                client.sock.sendall(self._frame(data, binary))
+            except OSError as e:
+                logger.info("Dropping export consumer %s: %s", client.address, e)
+                dead.append(client)
+        if dead:
+            with self._lock:
+                for client in dead:
+                    self._clients.remove(client)
+                    client.sock.close()
+
+    def close(self):
+        self._closed = True
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server.close()
+        self._thread.join()
+        with self._lock:
+            for client in self._clients:
+                client.sock.close()
+            self._clients = []
+
+
+class TCPDestination(SocketServerDestination):
+    ## Raw stream on a local TCP port (port 0 picks a free one)
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, send_timeout: float = 1.0):
+        super().__init__(socket.AF_INET, (host, port), send_timeout)
+
+
+class UnixSocketDestination(SocketServerDestination):
+    ## Raw stream on a Unix domain socket; a stale socket file is replaced
+
+    def __init__(self, path: str, send_timeout: float = 1.0):
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(socket.AF_UNIX, path, send_timeout)
+
+    def close(self):
+        super().close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class WebSocketDestination(SocketServerDestination):
+    ## Minimal WebSocket server (RFC 6455, no extensions): every batch is one
+    ## message, text for NDJSON and binary for Arrow. With a header, each
+    ## message carries it too, so every message decodes on its own.
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, send_timeout: float = 1.0):
+        super().__init__(socket.AF_INET, (host, port), send_timeout)
+
+    def _handshake(self, sock: socket.socket):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = sock.recv(4096)
+            if not chunk or len(request) > 16384:
+                raise OSError("Incomplete WebSocket handshake")
+            request += chunk
+
+        headers = {}
+        for line in request.decode('latin-1').split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            sock.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            raise OSError("Not a WebSocket upgrade request")
+
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+    def _frame(self, data: bytes, binary: bool) -> bytes:
+        # Single unmasked frame with FIN set
+        opcode = 0x2 if binary else 0x1
+        length = len(data)
+        if length < 126:
+            head = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        return head + data
+
+    def send(self, data: bytes, header: bytes = b'', binary: bool = False):
+        # Self-contained messages: the header rides along with every batch
+        super().send(header + data, b'', binary)
+
+
+def open_destination(target: str) -> Destination:
+    ## Destination from a target string: tcp://HOST:PORT, ws://HOST:PORT,
+    ## unix:PATH, or a file path (optionally file:PATH)
+    def host_port(address: str) -> Tuple[str, int]:
+        host, _, port = address.rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Expected HOST:PORT, got {address!r}")
+        return host, int(port)
+
+    if target.startswith('tcp://'):
+        return TCPDestination(*host_port(target[len('tcp://'):]))
+    if target.startswith('ws://'):
+        return WebSocketDestination(*host_port(target[len('ws://'):].rstrip('/')))
+    if target.startswith('unix:'):
+        return UnixSocketDestination(target[len('unix:'):])
+    if target.startswith('file:'):
+        target = target[len('file:'):]
+    return FileDestination(target)
@@ -0,0 +1,235 @@
+import json
+import logging
+import queue
+import threading
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from crypto_monitor.export.destinations import Destination
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+# Kinds of record the exporter publishes
+KINDS = ('tick', 'candle', 'analysis')
+
+# Every record is a flat dict with a subset of these fields; Arrow batches
+# use all of them, null where a kind has no value
+RECORD_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('type', 'string'),
+    ('coin', 'string'),
+    ('timestamp', 'timestamp'),
+    ('timeframe', 'string'),
+    ('bid', 'float'),
+    ('ask', 'float'),
+    ('last', 'float'),
+    ('open', 'float'),
+    ('high', 'float'),
+    ('low', 'float'),
+    ('close', 'float'),
+    ('volume', 'float'),
+    ('spread', 'float'),
+    ('spread_percentage', 'float'),
+    ('spread_zscore', 'float'),
+    ('condition', 'string'),
+    ('trend', 'string'),
+    ('imbalance_ratio', 'float'),
+    ('dominant_side', 'string'),
+    ('order_book_stale', 'bool'),
+    ('poc', 'string')
+)
+
+
+def _float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def tick_records(coin: str, analysis: Dict, kinds: Iterable[str] = KINDS,
+                 last_bars: Optional[Dict[Tuple[str, str], Dict]] = None) -> List[Dict]:
+    ## Records for one analyzed tick: the raw prices ('tick'), the signals
+    ## ('analysis') and, for each timeframe whose bar closed on this tick,
+    ## the bar ('candle'). `last_bars` remembers the bars already published,
+    ## since an analysis repeats a timeframe's result until its next close.
+    latest = analysis['latest']
+    timestamp = np.datetime64(latest['timestamp'], 'ns')
+    records = []
+
+    if 'tick' in kinds:
+        records.append({
+            'type': 'tick', 'coin': coin, 'timestamp': timestamp,
+            'bid': float(latest['bid']), 'ask': float(latest['ask']), 'last': float(latest['last'])
+        })
+
+    if 'analysis' in kinds:
+        spread = analysis['spread_analysis']
+        order_book = analysis['order_book_analysis']
+        records.append({
+            'type': 'analysis', 'coin': coin, 'timestamp': timestamp,
+            'spread': float(spread['current_spread']),
+            'spread_percentage': float(spread['current_spread_percentage']),
+            'spread_zscore': _float(spread.get('spread_zscore')),
+            'condition': spread['condition'],
+            'trend': analysis['latest_ha']['trend'],
+            'imbalance_ratio': float(order_book['imbalance_ratio']),
+            'dominant_side': order_book['dominant_side'],
+            'order_book_stale': order_book.get('stale', False),
+            'poc': (analysis['vbp_data'] or {}).get('poc')
+        })
+
+    if 'candle' in kinds:
+        for timeframe, result in analysis.get('timeframes', {}).items():
+            bar = result.get('bar')
+            if bar is None:
+                continue
+            if last_bars is not None:
+                key = (coin, timeframe)
+                previous = last_bars.get(key)
+                if previous is not None and previous['timestamp'] == bar['timestamp']:
+                    continue
+                last_bars[key] = bar
+            records.append({
+                'type': 'candle', 'coin': coin, 'timestamp': np.datetime64(bar['timestamp'], 'ns'),
+                'timeframe': timeframe,
+                'open': float(bar['open']), 'high': float(bar['high']),
+                'low': float(bar['low']), 'close': float(bar['close']), 'volume': float(bar['volume']),
+                'trend': result['latest_ha']['trend'],
+                'poc': (result['vbp_data'] or {}).get('poc')
+            })
+
+    return records
+
+
+class NDJSONEncoder:
+    ## One JSON object per line, timestamps in ISO 8601
+
+    binary = False
+
+    def header(self) -> bytes:
+        return b''
+
+    def encode(self, records: List[Dict]) -> bytes:
+        lines = []
+        for record in records:
+            record = dict(record, timestamp=str(record['timestamp']))
+            lines.append(json.dumps(record, default=str))
+        return ('\n'.join(lines) + '\n').encode()
+
+
+class ArrowEncoder:
+    ## Arrow IPC stream: header() is the schema message, encode() one record
+    ## batch message of RECORD_FIELDS. A reader expects the header first on
+    ## every new file or connection. Needs pyarrow.
+
+    binary = True
+
+    def __init__(self):
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError("Arrow export needs pyarrow (pip install pyarrow)") from e
+        self._pa = pyarrow
+        types = {'string': pyarrow.string(), 'float': pyarrow.float64(), 'timestamp': pyarrow.timestamp('ns'),
+                 'bool': pyarrow.bool_()}
+        self.schema = pyarrow.schema([(name, types[kind]) for name, kind in RECORD_FIELDS])
+        self._header = self.schema.serialize().to_pybytes()
+
+    def header(self) -> bytes:
+        return self._header
+
+    def encode(self, records: List[Dict]) -> bytes:
+        columns = {name: [record.get(name) for record in records] for name, _ in RECORD_FIELDS}
+        batch = self._pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        return batch.serialize().to_pybytes()
+
+
+ENCODERS = {'ndjson': NDJSONEncoder, 'arrow': ArrowEncoder}
+
+
+class StreamExporter:
+    ## Publishes ticks, closed candles and analysis results to a Destination.
+    ##
+    ## publish() only builds the records and puts them on a bounded queue
+    ## without blocking; when the queue is full they are dropped (counted in
+    ## `dropped` and crypto_monitor_export_dropped_total). A background
+    ## thread encodes them in batches of up to `batch_size` records, or
+    ## whatever arrived within `flush_interval` seconds, and sends each
+    ## batch, so a slow consumer never stalls the monitor loop.
+
+    def __init__(self, destination: Destination, encoder=None, kinds: Iterable[str] = KINDS,
+                 batch_size: int = 500, flush_interval: float = 0.5, max_queue: int = 10_000,
+                 metrics: Metrics = None):
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown record kinds: {', '.join(sorted(unknown))}")
+        self.destination = destination
+        self.encoder = encoder if encoder is not None else NDJSONEncoder()
+        self.kinds = tuple(kinds)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.published = 0
+        self.dropped = 0
+        self.sent = 0
+        self.batches = 0
+        self.failed = 0
+        self._last_bars: Dict[Tuple[str, str], Dict] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='stream-export', daemon=True)
+        self._thread.start()
+
+    def publish(self, coin: str, analysis: Dict) -> int:
+        # Queue the records of one analyzed tick; returns how many were queued
+        if self._closed or not analysis:
+            return 0
+        queued = 0
+        for record in tick_records(coin, analysis, self.kinds, self._last_bars):
+            try:
+                self._queue.put_nowait(record)
+                queued += 1
+            except queue.Full:
+                self.dropped += 1
+                self.metrics.inc('crypto_monitor_export_dropped_total')
+        self.published += queued
+        return queued
+
+    def _run(self):
+        batch: List[Dict] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = False # Flush interval elapsed
+            if record is None:
+                self._send(batch)
+                return
+            if record is not False:
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (record is False or len(batch) >= self.batch_size):
+                self._send(batch)
+                batch = []
+                deadline = None
+
+    def _send(self, batch: List[Dict]):
+        if not batch:
+            return
+        try:
+            self.destination.send(self.encoder.encode(batch), self.encoder.header(), self.encoder.binary)
+            self.sent += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("Stream export failed: %s", e)
+
+    def close(self):
+        # Send what is queued, then stop the thread and the destination
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.destination.close()
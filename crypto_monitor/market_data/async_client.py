@@ -0,0 +1,147 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import requests
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.transport import HTTPTransport, Transport
+from crypto_monitor.storage.tick_store import TickStore
+
+
+class AsyncTransport:
+    ## Interface used by AsyncCoinspotClient to fetch JSON payloads
+
+    async def get_json(self, url: str) -> Dict:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class ThreadedAsyncTransport(AsyncTransport):
+    ## Runs a blocking Transport on the default executor so many requests can
+    ## be in flight at once without blocking the event loop. Works with the
+    ## pooled HTTPTransport as well as FakeTransport for tests.
+
+    def __init__(self, transport: Transport = None):
+        self.transport = transport if transport is not None else HTTPTransport()
+
+    async def get_json(self, url: str) -> Dict:
+        return await asyncio.to_thread(self.transport.get_json, url)
+
+    async def close(self):
+        self.transport.close()
+
+
+class AsyncCoinspotClient:
+
+    ### Asyncio client for Coinspot's public API v2, mirroring CoinspotClient
+
+    def __init__(self, max_history: int = 100, transport: AsyncTransport = None, store: TickStore = None,
+                 base_url: str = None, history_precision: str = None, history_decimals: int = 8):
+        # History, parsing and persistence are shared with the sync client;
+        # only I/O is async
+        self._client = CoinspotClient(max_history=max_history, transport=Transport(), store=store, base_url=base_url,
+                                      history_precision=history_precision, history_decimals=history_decimals)
+        self.transport = transport if transport is not None else ThreadedAsyncTransport()
+
+    @property
+    def base_url(self) -> str:
+        return self._client.base_url
+
+    @base_url.setter
+    def base_url(self, value: str):
+        self._client.base_url = value
+
+    @property
+    def max_history(self) -> int:
+        return self._client.max_history
+
+    @property
+    def store(self) -> TickStore:
+        return self._client.store
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def add_price_to_history(self, coin: str, price_data: Dict, timestamp: datetime = None):
+        self._client.add_price_to_history(coin, price_data, timestamp)
+
+    def add_prices_to_history(self, coin: str, responses: Sequence[Dict], timestamps: Sequence = None) -> int:
+        return self._client.add_prices_to_history(coin, responses, timestamps)
+
+    def load_history(self, coin: str, n: int = None) -> int:
+        return self._client.load_history(coin, n)
+
+    def get_price_history(self, coin: str) -> pd.DataFrame:
+        return self._client.get_price_history(coin)
+
+    def get_price_arrays(self, coin: str) -> Dict[str, np.ndarray]:
+        return self._client.get_price_arrays(coin)
+
+    def get_latest_point(self, coin: str) -> Dict:
+        return self._client.get_latest_point(coin)
+
+    def diff_order_book(self, coin: str, order_book: Dict) -> Dict:
+        return self._client.diff_order_book(coin, order_book)
+
+    def split_latest_prices(self, response: Dict, coins: Iterable[str] = None) -> Dict[str, Dict]:
+        return self._client.split_latest_prices(response, coins)
+
+    def format_price_data(self, response: Dict) -> Dict:
+        return self._client.format_price_data(response)
+
+    async def get_latest_prices(self) -> Dict:
+        endpoint = "/latest"
+        return await self.transport.get_json(f"{self.base_url}{endpoint}")
+
+    async def get_latest_price(self, coin: str) -> Dict:
+        if not coin:
+            raise ValueError("Coin symbol cannot be empty")
+
+        coin = coin.upper()
+        endpoint = f"/latest/{coin}"
+
+        try:
+            return await self.transport.get_json(f"{self.base_url}{endpoint}")
+        except requests.RequestException as e:
+            raise requests.RequestException(f"Failed to fetch price for {coin}: {str(e)}")
+
+    async def get_order_book(self, coin: str) -> Dict:
+        if not coin:
+            raise ValueError("Coin symbol cannot be empty")
+
+        coin = coin.upper()
+        endpoint = f"/orders/open/{coin}"
+
+        try:
+            order_book = await self.transport.get_json(f"{self.base_url}{endpoint}")
+        except requests.RequestException as e:
+            raise requests.RequestException(f"Failed to fetch order book for {coin}: {str(e)}")
+
+        if self.store is not None and self.store.order_books:
+            self.store.append_order_book(coin, datetime.now(), order_book)
+        return order_book
+
+    async def get_order_books(self, coins: List[str], max_concurrency: int = 8) -> Dict[str, Dict]:
+        ## Fetch order books for several coins with at most `max_concurrency`
+        ## requests in flight. Failures use the API's error shape, as in
+        ## CoinspotClient.get_order_books.
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def fetch(coin: str) -> Dict:
+            async with semaphore:
+                try:
+                    return await self.get_order_book(coin)
+                except (requests.RequestException, ValueError) as e:
+                    return {'status': 'error', 'message': str(e)}
+
+        books = await asyncio.gather(*(fetch(coin) for coin in coins))
+        return {coin.upper(): book for coin, book in zip(coins, books)}
@@ -0,0 +1,216 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Mapping, Optional
+from crypto_monitor.market_data.history import PRICE_COLUMNS, ColumnarRingBuffer
+from crypto_monitor.storage.tick_store import to_epoch_ns
+
+# Price history columns plus the number of ticks in the bar. The public API
+# has no traded volume, so the tick count stands in for it (calculate_vbp
+# weights bars by the 'volume' column).
+CANDLE_COLUMNS: Dict[str, str] = dict(PRICE_COLUMNS, volume='float64')
+
+DEFAULT_TIMEFRAMES = ('1m', '5m', '1h')
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_timeframe(timeframe: str) -> int:
+    # '30s', '1m', '5m', '1h', '1d' -> period in nanoseconds
+    match = re.fullmatch(r'(\d+)([smhd])', timeframe.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid timeframe: {timeframe}")
+    return int(match.group(1)) * _UNITS[match.group(2)] * 1_000_000_000
+
+
+class CandleSeries:
+    ## OHLC bars of one timeframe built from raw ticks.
+    ##
+    ## open/high/low/close come from the last trade price; bid, ask and the
+    ## spreads are the values at the bar's close. Bars are stamped with
+    ## their start time and aligned to the epoch, so a 5m bar covers
+    ## [12:05, 12:10). Closed bars live in a bounded ring buffer; the bar
+    ## still forming is kept separately until a tick for a later bucket
+    ## closes it. Buckets without ticks produce no bar, and ticks older
+    ## than the forming bar are dropped (counted in `late`).
+
+    def __init__(self, timeframe: str, capacity: int = 500):
+        self.timeframe = timeframe
+        self.period = parse_timeframe(timeframe)
+        self.bars = ColumnarRingBuffer(CANDLE_COLUMNS, capacity, index='timestamp')
+        self.late = 0
+        self._bucket: Optional[int] = None
+        self._bar: Optional[Dict] = None
+
+    def __len__(self) -> int:
+        return len(self.bars)
+
+    @property
+    def current(self) -> Optional[Dict]:
+        # The forming bar, or None before the first tick
+        return self._bar
+
+    def update(self, timestamp_ns: int, bid: float, ask: float, last: float) -> Optional[Dict]:
+        # Add one tick; returns the bar it closed, if any
+        bucket = timestamp_ns - timestamp_ns % self.period
+
+        if self._bucket is not None and bucket == self._bucket:
+            bar = self._bar
+            if last > bar['high']:
+                bar['high'] = last
+            if last < bar['low']:
+                bar['low'] = last
+            bar['close'] = bar['last'] = last
+            self._close_prices(bar, bid, ask)
+            bar['volume'] += 1
+            return None
+
+        if self._bucket is not None and bucket < self._bucket:
+            self.late += 1
+            return None
+
+        closed = self._bar
+        if closed is not None:
+            self.bars.append(closed)
+
+        self._bucket = bucket
+        self._bar = {
+            'timestamp': np.datetime64(bucket, 'ns'),
+            'open': last, 'high': last, 'low': last, 'close': last, 'last': last,
+            'volume': 1.0
+        }
+        self._close_prices(self._bar, bid, ask)
+        return closed
+
+    @staticmethod
+    def _close_prices(bar: Dict, bid: float, ask: float):
+        bar['bid'] = bid
+        bar['ask'] = ask
+        bar['spread_absolute'] = ask - bid
+        bar['spread_percentage'] = (ask - bid) / bid * 100 if bid > 0 else 0.0
+
+    def extend(self, timestamps_ns: np.ndarray, bid: np.ndarray, ask: np.ndarray, last: np.ndarray) -> int:
+        ## Bulk version of update() for time-ordered tick arrays, e.g. a
+        ## warm start from the tick store. Returns how many bars closed.
+        timestamps_ns = np.asarray(timestamps_ns, dtype='int64')
+        bid, ask, last = (np.asarray(values, dtype=float) for values in (bid, ask, last))
+        buckets = timestamps_ns - timestamps_ns % self.period
+
+        if self._bucket is not None:
+            keep = buckets >= self._bucket
+            self.late += int(len(keep) - keep.sum())
+            buckets, bid, ask, last = buckets[keep], bid[keep], ask[keep], last[keep]
+        if not len(buckets):
+            return 0
+
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_percentage = np.where(bid[ends] > 0, (ask[ends] - bid[ends]) / bid[ends] * 100, 0.0)
+        groups = {
+            'timestamp': buckets[starts].astype('datetime64[ns]'),
+            'open': last[starts],
+            'high': np.maximum.reduceat(last, starts),
+            'low': np.minimum.reduceat(last, starts),
+            'close': last[ends],
+            'last': last[ends],
+            'bid': bid[ends],
+            'ask': ask[ends],
+            'spread_absolute': ask[ends] - bid[ends],
+            'spread_percentage': spread_percentage,
+            'volume': np.diff(np.concatenate((starts, [len(buckets)]))).astype(float)
+        }
+
+        closed = 0
+        if self._bar is not None:
+            if buckets[0] == self._bucket:
+                # The first group continues the forming bar
+                bar = self._bar
+                groups['open'][0] = bar['open']
+                groups['high'][0] = max(bar['high'], groups['high'][0])
+                groups['low'][0] = min(bar['low'], groups['low'][0])
+                groups['volume'][0] += bar['volume']
+            else:
+                self.bars.append(self._bar)
+                closed += 1
+
+        # Every group but the last is complete
+        if len(starts) > 1:
+            self.bars.extend({name: values[:-1] for name, values in groups.items()})
+            closed += len(starts) - 1
+
+        self._bucket = int(buckets[starts[-1]])
+        self._bar = {name: values[-1] for name, values in groups.items()}
+        self._bar['timestamp'] = np.datetime64(self._bucket, 'ns')
+        return closed
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        # Read-only views of the closed bars, oldest first
+        return self.bars.arrays()
+
+    def to_frame(self, include_partial: bool = False) -> pd.DataFrame:
+        # Closed bars (cached until the next close), optionally followed by
+        # the forming bar
+        frame = self.bars.to_frame()
+        if not include_partial or self._bar is None:
+            return frame
+
+        row = {name: [value] for name, value in self._bar.items() if name != 'timestamp'}
+        partial = pd.DataFrame(row, index=pd.DatetimeIndex([self._bar['timestamp']], name='timestamp'))
+        partial = partial[list(frame.columns)]
+        return pd.concat([frame, partial]) if len(frame) else partial
+
+
+class CandleAggregator:
+    ## Buckets every coin's ticks into bars at several timeframes at once.
+    ## Each tick updates each timeframe in O(1), so no timeframe is ever
+    ## rebuilt from the ones below it.
+
+    def __init__(self, timeframes: Iterable[str] = DEFAULT_TIMEFRAMES, capacity: int = 500):
+        self.timeframes = tuple(timeframes)
+        if not self.timeframes:
+            raise ValueError("At least one timeframe is required")
+        for timeframe in self.timeframes:
+            parse_timeframe(timeframe)
+        self.capacity = capacity
+        self._series: Dict[str, Dict[str, CandleSeries]] = {}
+
+    def _coin_series(self, coin: str) -> Dict[str, CandleSeries]:
+        series = self._series.get(coin)
+        if series is None:
+            series = self._series[coin] = {
+                timeframe: CandleSeries(timeframe, self.capacity) for timeframe in self.timeframes
+            }
+        return series
+
+    def coins(self):
+        return list(self._series)
+
+    def series(self, coin: str, timeframe: str) -> CandleSeries:
+        return self._coin_series(coin)[timeframe]
+
+    def update(self, coin: str, timestamp, bid: float, ask: float, last: float) -> Dict[str, Dict]:
+        # Add one tick to every timeframe; returns the bars it closed, by
+        # timeframe
+        timestamp_ns = to_epoch_ns(timestamp)
+        closed = {}
+        for timeframe, series in self._coin_series(coin).items():
+            bar = series.update(timestamp_ns, bid, ask, last)
+            if bar is not None:
+                closed[timeframe] = bar
+        return closed
+
+    def extend(self, coin: str, ticks: Mapping[str, np.ndarray]) -> Dict[str, int]:
+        # Bulk add timestamp/bid/ask/last arrays; returns closed bar counts
+        timestamps = np.asarray(ticks['timestamp'])
+        if timestamps.dtype.kind == 'M':
+            timestamps = timestamps.astype('datetime64[ns]').astype('int64')
+        return {
+            timeframe: series.extend(timestamps, ticks['bid'], ticks['ask'], ticks['last'])
+            for timeframe, series in self._coin_series(coin).items()
+        }
+
+    def frame(self, coin: str, timeframe: str, include_partial: bool = False) -> pd.DataFrame:
+        if coin not in self._series:
+            return pd.DataFrame()
+        return self._series[coin][timeframe].to_frame(include_partial)
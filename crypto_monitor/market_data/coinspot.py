@@ -1,49 +1,110 @@
+import logging
 import requests
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from collections import deque
-from typing import Dict, Deque
+from typing import Dict, Iterable, List, Sequence
+from crypto_monitor.market_data.history import PRECISIONS, CompactPriceHistory, PriceHistory, expand_ticks
+from crypto_monitor.market_data.lite import resolve_base_url
+from crypto_monitor.market_data.order_books import OrderBookTracker
+from crypto_monitor.market_data.transport import HTTPTransport, Transport
+from crypto_monitor.storage.tick_store import TickStore
+
+logger = logging.getLogger(__name__)
+
+# Event name of the per-tick spread record logged at DEBUG level
+SPREAD_EVENT = 'spread_calculation'
 
 class CoinspotClient:
 
     ### Client for interacting with Coinspot's public API v2
 
-    def __init__(self, max_history: int = 100):
-        self.base_url = "https://www.coinspot.com.au/pubapi/v2"
-        self._price_history: Dict[str, Deque] = {}
+    def __init__(self, max_history: int = 100, transport: Transport = None, store: TickStore = None,
+                 base_url: str = None, history_precision: str = None, history_decimals: int = 8):
+        # Real API unless given a URL or $COINSPOT_BASE_URL (e.g. the simulator)
+        self.base_url = resolve_base_url(base_url)
+        # Pooled keep-alive transport with timeouts and retries by default
+        self.transport = transport if transport is not None else HTTPTransport()
+        self._price_history: Dict[str, PriceHistory] = {}
         self.max_history = max_history
+        # Keep full price points, or only bid/ask/last at this precision
+        # ('float64', 'float32' or 'int64' fixed point; see CompactPriceHistory)
+        self.history_precision = history_precision
+        if history_precision is not None and history_precision not in PRECISIONS:
+            raise ValueError(f"Invalid history precision: {history_precision}")
+        # Decimal places kept by 'int64' fixed point
+        self.history_decimals = history_decimals
+        # Optional persistent tick store: every point is appended to it and
+        # a coin's history is warm-loaded from it when first seen
+        self.store = store
+        # Previous order book snapshot per coin, for diffing
+        self.order_books = OrderBookTracker()
+        # Thread pool for get_order_books, created on first use
+        self._pool: ThreadPoolExecutor = None
+        self._pool_workers = 0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def _init_history(self, coin:str):
         #Initialize history for coin if it doesn't exist
         if coin not in self._price_history:
-            self._price_history[coin] = deque(maxlen=self.max_history)
+            self._price_history[coin] = self._new_history()
+            if self.store is not None:
+                self.load_history(coin)
 
-    def add_price_to_history(self, coin: str, price_data: Dict):
-        #Add a price point to the historical data
-        self._init_history(coin)
+    def _new_history(self) -> PriceHistory:
+        if self.history_precision is None:
+            return PriceHistory(self.max_history)
+        return CompactPriceHistory(self.max_history, self.history_precision, self.history_decimals)
 
-        # Ensure we have a valid response
-        if price_data['status'] != 'ok' or 'prices' not in price_data:
-            raise ValueError(f"Invalid price data: {price_data.get('message', 'Unknown error')}")
-        
-        prices = price_data['prices']
-        bid = float(prices['bid'])
-        ask = float(prices['ask'])
-        last = float(prices['last'])
+    def load_history(self, coin: str, n: int = None) -> int:
+        # Reload the last n (default max_history) stored points into memory
+        if self.store is None:
+            return 0
+
+        ticks = self.store.tail(coin, n or self.max_history, columns=['timestamp', 'bid', 'ask', 'last'])
+        if not len(ticks['timestamp']):
+            return 0
+
+        if coin not in self._price_history:
+            self._price_history[coin] = self._new_history()
+        self._price_history[coin].extend(expand_ticks(ticks))
+        return len(ticks['timestamp'])
+
+    def add_price_to_history(self, coin: str, price_data: Dict, timestamp: datetime = None):
+        #Add a price point to the historical data, stamped now unless a
+        #timestamp is given (e.g. when replaying recorded ticks)
+        bid, ask, last = self._parse_prices(price_data)
+        self._init_history(coin)
 
         # Calculate spreads
         absolute_spread = ask - bid
         percentage_spread = (absolute_spread / bid) * 100 if bid > 0 else 0
 
-        # Log spread calculation details
-        print(f"\nSpread Calculation for {coin}:")
-        print(f"Bid (Buy) Price: ${bid:,.2f}")
-        print(f"Ask (Sell) Price: ${ask:,.2f}")
-        print(f"Last Trade Price: ${last:,.2f}")
-        print(f"Absolute Spread: ${absolute_spread:,.2f}")
-        print(f"Percentage Spread: {percentage_spread:.3f}%")
+        # Structured spread event; skipped entirely unless DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Spread for %s: bid=%.2f ask=%.2f last=%.2f spread=%.2f (%.3f%%)",
+                coin, bid, ask, last, absolute_spread, percentage_spread,
+                extra={
+                    'event': SPREAD_EVENT, 'coin': coin, 'bid': bid, 'ask': ask, 'last': last,
+                    'spread_absolute': absolute_spread, 'spread_percentage': percentage_spread
+                }
+            )
 
-        timestamp = datetime.now()
+        if timestamp is None:
+            timestamp = datetime.now()
         data_point = {
             'timestamp': timestamp,
             'open': last,  # Using last price as open for this interval
@@ -58,22 +119,102 @@ class CoinspotClient:
         }
 
         self._price_history[coin].append(data_point)
+        if self.store is not None:
+            self.store.append(coin, data_point)
+
+    def add_prices_to_history(self, coin: str, responses: Sequence[Dict], timestamps: Sequence = None) -> int:
+        ## Ingest a batch of /latest/{coin} responses in one call, e.g. when
+        ## backfilling or replaying. Without timestamps the points are
+        ## stamped now. The batch is validated up front, so an invalid
+        ## response leaves the history untouched.
+        if not len(responses):
+            return 0
+
+        prices = np.array([self._parse_prices(response) for response in responses], dtype=float)
+        if timestamps is None:
+            timestamps = np.full(len(prices), np.datetime64(datetime.now(), 'ns'))
+        elif len(timestamps) != len(prices):
+            raise ValueError("Expected one timestamp per response")
+        else:
+            timestamps = pd.DatetimeIndex(timestamps).values
+
+        # Only a valid batch creates (and warm-loads) the coin's history
+        self._init_history(coin)
+
+        columns = expand_ticks({
+            'timestamp': timestamps, 'bid': prices[:, 0], 'ask': prices[:, 1], 'last': prices[:, 2]
+        })
+        self._price_history[coin].extend(columns)
+        if self.store is not None:
+            self.store.extend(coin, columns)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Added %d prices for %s", len(prices), coin,
+                extra={'event': 'prices_added', 'coin': coin, 'count': len(prices)}
+            )
+        return len(prices)
+
+    def _parse_prices(self, price_data: Dict):
+        # (bid, ask, last) of a /latest/{coin} response
+        if price_data['status'] != 'ok' or 'prices' not in price_data:
+            raise ValueError(f"Invalid price data: {price_data.get('message', 'Unknown error')}")
+
+        prices = price_data['prices']
+        return float(prices['bid']), float(prices['ask']), float(prices['last'])
 
     def get_price_history(self, coin: str) -> pd.DataFrame:
-        # Get historical price data as a DataFrame
+        # Get historical price data as a DataFrame. The frame is cached until
+        # the next price point arrives, so treat it as read-only.
         if coin not in self._price_history:
             return pd.DataFrame()
-        
-        df = pd.DataFrame(list(self._price_history[coin]))
-        if not df.empty:
-            df.set_index('timestamp', inplace=True)
-        return df
+
+        return self._price_history[coin].to_frame()
+
+    def get_price_arrays(self, coin: str) -> Dict[str, np.ndarray]:
+        # Zero-copy, read-only column views of the history (oldest first)
+        if coin not in self._price_history:
+            return {}
+
+        return self._price_history[coin].arrays()
+
+    def get_latest_point(self, coin: str) -> Dict:
+        # Newest history point as scalars, cheaper than indexing the arrays
+        if coin not in self._price_history:
+            return {}
+
+        return self._price_history[coin].latest()
     
+    def get_price_panel(self, coins: Iterable[str] = None, length: int = None) -> Dict:
+        # Every (or the given) coin's history as one coin x time panel, for
+        # the vectorized analysis in analysis/panel.py
+        from crypto_monitor.analysis.panel import panel_from_histories
+        coins = self._price_history if coins is None else [coin for coin in coins if coin in self._price_history]
+        return panel_from_histories({coin: self._price_history[coin].arrays() for coin in coins}, length)
+
     def get_latest_prices(self) -> Dict:
         endpoint = "/latest"
-        response = requests.get(f"{self.base_url}{endpoint}")
-        response.raise_for_status()
-        return response.json()
+        return self.transport.get_json(f"{self.base_url}{endpoint}")
+
+    def split_latest_prices(self, response: Dict, coins: Iterable[str] = None) -> Dict[str, Dict]:
+        # Fan a /latest response out into per-coin responses shaped like
+        # /latest/{coin}, so they can go straight into add_price_to_history
+        if response.get('status') != 'ok' or 'prices' not in response:
+            raise ValueError(f"Invalid price data: {response.get('message', 'Unknown error')}")
+
+        prices = {key.upper(): value for key, value in response['prices'].items()}
+        if coins is None:
+            # Market pairs such as XRP/USDT have no /orders/open/{coin} endpoint
+            coins = [key for key in prices if '/' not in key]
+
+        split = {}
+        for coin in coins:
+            coin = coin.upper()
+            if coin in prices:
+                split[coin] = {'status': 'ok', 'message': 'ok', 'prices': prices[coin]}
+            else:
+                split[coin] = {'status': 'error', 'message': f"No price for {coin} in /latest response"}
+        return split
 
     def get_latest_price(self, coin: str) -> Dict:
         if not coin:
@@ -83,9 +224,7 @@ class CoinspotClient:
         endpoint = f"/latest/{coin}"
 
         try:
-            response = requests.get(f"{self.base_url}{endpoint}")
-            response.raise_for_status() # Raises exception for 4XX/5XX status codes
-            return response.json()
+            return self.transport.get_json(f"{self.base_url}{endpoint}")
         except requests.RequestException as e:
             raise requests.RequestException(f"Failed to fetch price for {coin}: {str(e)}")
 
@@ -111,8 +250,43 @@ class CoinspotClient:
         endpoint = f"/orders/open/{coin}"
 
         try:
-            response = requests.get(f"{self.base_url}{endpoint}")
-            response.raise_for_status()
-            return response.json()
+            order_book = self.transport.get_json(f"{self.base_url}{endpoint}")
         except requests.RequestException as e:
-            raise requests.RequestException(f"Failed to fetch order book for {coin}: {str(e)}")
\ No newline at end of file
+            raise requests.RequestException(f"Failed to fetch order book for {coin}: {str(e)}")
+
+        if self.store is not None and self.store.order_books:
+            self.store.append_order_book(coin, datetime.now(), order_book)
+        return order_book
+
+    def diff_order_book(self, coin: str, order_book: Dict) -> Dict:
+        ## Diff an order book against the coin's previous snapshot; see
+        ## OrderBookTracker.update for the result
+        return self.order_books.update(coin, order_book)
+
+    def get_order_books(self, coins: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+        ## Fetch order books for several coins concurrently on the client's
+        ## bounded pool, which is kept for later calls until close().
+        ## A failed fetch is reported in the API's own error shape so one bad
+        ## coin doesn't abort the whole batch.
+
+        def fetch(coin: str) -> Dict:
+            try:
+                return self.get_order_book(coin)
+            except (requests.RequestException, ValueError) as e:
+                return {'status': 'error', 'message': str(e)}
+
+        if not coins:
+            return {}
+
+        books = self._order_book_pool(max_workers).map(fetch, coins)
+        return {coin.upper(): book for coin, book in zip(coins, books)}
+
+    def _order_book_pool(self, max_workers: int) -> ThreadPoolExecutor:
+        # Threads are only started as needed, up to max_workers
+        max_workers = max(1, max_workers)
+        if self._pool is None or self._pool_workers != max_workers:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order-books')
+            self._pool_workers = max_workers
+        return self._pool
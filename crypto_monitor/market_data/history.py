@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Mapping, Optional
+
+# Column layout of a per-tick price history point
+PRICE_COLUMNS: Dict[str, str] = {
+    'timestamp': 'datetime64[ns]',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'bid': 'float64',
+    'ask': 'float64',
+    'last': 'float64',
+    'spread_absolute': 'float64',
+    'spread_percentage': 'float64'
+}
+
+
+def _spread_percentage(columns: Mapping) -> np.ndarray:
+    bid = columns['bid']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(bid > 0, columns['spread_absolute'] / bid * 100, 0.0)
+
+
+# How the other PRICE_COLUMNS follow from timestamp/bid/ask/last, with the
+# same pseudo-candle rules as CoinspotClient.add_price_to_history. Each rule
+# takes a mapping of the columns derived so far, in this order.
+DERIVED_COLUMNS = {
+    'open': lambda columns: columns['last'],
+    'high': lambda columns: np.maximum(np.maximum(columns['bid'], columns['ask']), columns['last']),
+    'low': lambda columns: np.minimum(np.minimum(columns['bid'], columns['ask']), columns['last']),
+    'close': lambda columns: columns['last'],
+    'spread_absolute': lambda columns: columns['ask'] - columns['bid'],
+    'spread_percentage': _spread_percentage
+}
+
+
+def expand_ticks(ticks: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Build full price history columns from timestamp/bid/ask/last arrays
+    timestamp = np.asarray(ticks['timestamp'])
+    if timestamp.dtype.kind in 'iu':
+        timestamp = timestamp.astype('datetime64[ns]')
+    columns = {'timestamp': timestamp}
+    for name in ('bid', 'ask', 'last'):
+        columns[name] = np.asarray(ticks[name], dtype=float)
+    for name, derive in DERIVED_COLUMNS.items():
+        columns[name] = derive(columns)
+    return {name: columns[name] for name in PRICE_COLUMNS}
+
+
+class ColumnarRingBuffer:
+    ## Fixed-capacity, preallocated per-column ring buffer.
+    ##
+    ## Every value is written twice, at slot i and i + capacity, so the last
+    ## `capacity` points are always one contiguous slice. Column views are
+    ## therefore zero-copy in both the filling and the wrapped state.
+
+    def __init__(self, columns: Mapping[str, str], capacity: int, index: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+
+        self.capacity = capacity
+        self.index = index
+        self._columns = {
+            name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in columns.items()
+        }
+        self._next = 0 # Slot the next value is written to
+        self._size = 0
+        self._version = 0
+        self._frame_cache = None
+        self._frame_version = -1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def version(self) -> int:
+        # Incremented on every write, used to invalidate materialized views
+        return self._version
+
+    @property
+    def columns(self) -> Iterable[str]:
+        return self._columns.keys()
+
+    @property
+    def nbytes(self) -> int:
+        # Memory held by the preallocated columns (mirror half included)
+        return sum(values.nbytes for values in self._columns.values())
+
+    def append(self, row: Mapping):
+        slot = self._next
+        mirror = slot + self.capacity
+        for name, values in self._columns.items():
+            value = row[name]
+            values[slot] = value
+            values[mirror] = value
+
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._version += 1
+
+    def extend(self, rows: Mapping[str, Iterable]):
+        # Bulk append of equally sized column arrays
+        arrays = {name: np.asarray(rows[name]) for name in self._columns}
+        count = len(next(iter(arrays.values()))) if arrays else 0
+        if count == 0:
+            return
+
+        # Only the newest `capacity` points can survive
+        skip = max(0, count - self.capacity)
+        count -= skip
+        slots = (self._next + np.arange(count)) % self.capacity
+        for name, values in self._columns.items():
+            data = arrays[name][skip:]
+            values[slots] = data
+            values[slots + self.capacity] = data
+
+        self._next = int((self._next + count) % self.capacity)
+        self._size = min(self._size + count, self.capacity)
+        self._version += 1
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+        self._version += 1
+
+    def _window(self) -> slice:
+        # The mirror half makes start + size <= 2 * capacity always valid
+        start = (self._next - self._size) % self.capacity
+        return slice(start, start + self._size)
+
+    def column(self, name: str) -> np.ndarray:
+        # Read-only chronological view, valid until the next write
+        view = self._columns[name][self._window()]
+        view.flags.writeable = False
+        return view
+
+    def latest(self) -> Dict:
+        # Newest point as scalars, without building column views
+        if not self._size:
+            return {}
+        slot = (self._next - 1) % self.capacity
+        return {name: values[slot] for name, values in self._columns.items()}
+
+    def arrays(self) -> Mapping[str, np.ndarray]:
+        window = self._window()
+        views = {}
+        for name, values in self._columns.items():
+            view = values[window]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+    def to_frame(self) -> pd.DataFrame:
+        # Materialized only when the data changed since the last call. The
+        # returned frame is shared between callers and must not be mutated.
+        if self._frame_version != self._version:
+            arrays = dict(self.arrays())
+            if self.index is not None:
+                index = pd.DatetimeIndex(arrays.pop(self.index), name=self.index)
+                self._frame_cache = pd.DataFrame(arrays, index=index)
+            else:
+                self._frame_cache = pd.DataFrame(arrays)
+            self._frame_version = self._version
+        return self._frame_cache
+
+
+class PriceHistory(ColumnarRingBuffer):
+    ## Ring buffer holding the per-tick price points of one coin
+
+    def __init__(self, capacity: int):
+        super().__init__(PRICE_COLUMNS, capacity, index='timestamp')
+
+
+# Storage dtypes of CompactPriceHistory's price columns. 'int64' is fixed
+# point: prices are kept as integers of 10**-decimals units.
+PRECISIONS = {'float64': 'float64', 'float32': 'float32', 'int64': 'int64'}
+
+
+class _DerivedColumns(Mapping):
+    ## CompactPriceHistory's columns, each derived on first access
+
+    def __init__(self, history: 'CompactPriceHistory'):
+        self._history = history
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in PRICE_COLUMNS:
+            raise KeyError(name)
+        return self._history.column(name)
+
+    def __iter__(self):
+        return iter(PRICE_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(PRICE_COLUMNS)
+
+
+class CompactPriceHistory(ColumnarRingBuffer):
+    ## Price history that stores only what the API sends: bid, ask and last
+    ## at the chosen precision, plus the timestamp as epoch nanoseconds.
+    ## open/high/low/close and the spreads are derived on demand, each
+    ## column once per write and only when asked for, so the interface
+    ## matches PriceHistory. A point takes 8 + 24 bytes with float64 or
+    ## int64 fixed point (`decimals` places) and 8 + 12 with float32 (about
+    ## 7 significant digits), against 8 + 72 for PriceHistory; the ring
+    ## buffer's mirror doubles each.
+
+    def __init__(self, capacity: int, precision: str = 'float32', decimals: int = 8):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Invalid precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+        dtype = PRECISIONS[precision]
+        super().__init__(
+            {'timestamp': 'datetime64[ns]', 'bid': dtype, 'ask': dtype, 'last': dtype}, capacity, index='timestamp'
+        )
+        self.precision = precision
+        self.decimals = decimals
+        self._scale = 10.0 ** decimals if precision == 'int64' else None
+        self._derived: Dict[str, np.ndarray] = {}
+        self._derived_version = -1
+
+    @property
+    def columns(self) -> Iterable[str]:
+        return PRICE_COLUMNS.keys()
+
+    def _encode(self, values):
+        if self._scale is None:
+            return values
+        if np.ndim(values):
+            return np.rint(np.asarray(values, dtype=float) * self._scale).astype(np.int64)
+        return round(float(values) * self._scale)
+
+    def _decode(self, values):
+        if self._scale is None:
+            return values.astype(np.float64)
+        return values / self._scale
+
+    def append(self, row: Mapping):
+        # Only the primitive fields of a full price point are kept
+        super().append({
+            'timestamp': row['timestamp'],
+            'bid': self._encode(row['bid']),
+            'ask': self._encode(row['ask']),
+            'last': self._encode(row['last'])
+        })
+
+    def extend(self, rows: Mapping[str, Iterable]):
+        super().extend({
+            'timestamp': rows['timestamp'],
+            'bid': self._encode(rows['bid']),
+            'ask': self._encode(rows['ask']),
+            'last': self._encode(rows['last'])
+        })
+
+    def column(self, name: str) -> np.ndarray:
+        # Decoded or derived once per write, read-only like PriceHistory's
+        # views
+        if self._derived_version != self._version:
+            self._derived = {}
+            self._derived_version = self._version
+        values = self._derived.get(name)
+        if values is None:
+            if name == 'timestamp':
+                values = super().column(name)
+            elif name in ('bid', 'ask', 'last'):
+                values = self._decode(super().column(name))
+            else:
+                values = DERIVED_COLUMNS[name](_DerivedColumns(self))
+            values.flags.writeable = False
+            self._derived[name] = values
+        return values
+
+    def arrays(self) -> Mapping[str, np.ndarray]:
+        # Full PRICE_COLUMNS mapping; a column is only derived when read.
+        # Like PriceHistory's views, it is valid until the next write.
+        return _DerivedColumns(self)
+
+    def latest(self) -> Dict:
+        # Newest point, decoded and derived from its stored fields alone
+        # (scalar arithmetic, as in CoinspotClient.add_price_to_history)
+        stored = super().latest()
+        if not stored:
+            return {}
+        bid, ask, last = (float(self._decode(stored[name])) for name in ('bid', 'ask', 'last'))
+        spread = ask - bid
+        return {
+            'timestamp': stored['timestamp'],
+            'open': last,
+            'high': max(bid, ask, last),
+            'low': min(bid, ask, last),
+            'close': last,
+            'bid': bid,
+            'ask': ask,
+            'last': last,
+            'spread_absolute': spread,
+            'spread_percentage': spread / bid * 100 if bid > 0 else 0.0
+        }
@@ -0,0 +1,86 @@
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple
+
+# Lightweight Coinspot access for one-shot queries (cron jobs, health
+# checks): standard library only, so nothing here pulls in requests, numpy
+# or pandas
+
+BASE_URL = "https://www.coinspot.com.au/pubapi/v2"
+# Points every client at another server, e.g. the local simulator
+BASE_URL_ENV = 'COINSPOT_BASE_URL'
+
+
+class LiteAPIError(Exception):
+    pass
+
+
+def resolve_base_url(base_url: str = None) -> str:
+    # Explicit URL, else $COINSPOT_BASE_URL, else the real API
+    return (base_url or os.environ.get(BASE_URL_ENV) or BASE_URL).rstrip('/')
+
+
+def fetch_json(url: str, timeout: float = 10.0) -> Dict:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (urllib.error.URLError, ValueError, OSError) as e:
+        raise LiteAPIError(f"Failed to fetch {url}: {e}")
+
+
+def get_latest_price(coin: str, base_url: str = None, timeout: float = 10.0) -> Dict:
+    if not coin:
+        raise ValueError("Coin symbol cannot be empty")
+    return fetch_json(f"{resolve_base_url(base_url)}/latest/{coin.upper()}", timeout)
+
+
+def get_order_book(coin: str, base_url: str = None, timeout: float = 10.0) -> Dict:
+    if not coin:
+        raise ValueError("Coin symbol cannot be empty")
+    return fetch_json(f"{resolve_base_url(base_url)}/orders/open/{coin.upper()}", timeout)
+
+
+def format_price(response: Dict) -> Dict:
+    # Same fields as CoinspotClient.format_price_data, plus the spread %
+    if response.get('status') != 'ok' or 'prices' not in response:
+        raise LiteAPIError(f"API Error: {response.get('message', 'Unknown error')}")
+
+    prices = response['prices']
+    bid = float(prices['bid'])
+    ask = float(prices['ask'])
+    return {
+        'bid': bid,
+        'ask': ask,
+        'last': float(prices['last']),
+        'spread': ask - bid,
+        'spread_percentage': (ask - bid) / bid * 100 if bid > 0 else 0.0
+    }
+
+
+def _levels(orders: List[Dict]) -> List[Tuple[float, float]]:
+    return [(float(order['rate']), float(order['amount'])) for order in orders]
+
+
+def summarize_order_book(order_book: Dict, depth: int = 5) -> Dict:
+    ## Best prices, totals and imbalance of an /orders/open/{coin} response,
+    ## with the top `depth` levels per side
+    if order_book.get('status', 'ok') != 'ok':
+        raise LiteAPIError(f"API Error: {order_book.get('message', 'Unknown error')}")
+
+    bids = sorted(_levels(order_book.get('buyorders', [])), reverse=True)
+    asks = sorted(_levels(order_book.get('sellorders', [])))
+    buy_volume = sum(rate * amount for rate, amount in bids)
+    sell_volume = sum(rate * amount for rate, amount in asks)
+    total = buy_volume + sell_volume
+
+    return {
+        'best_bid': bids[0][0] if bids else None,
+        'best_ask': asks[0][0] if asks else None,
+        'buy_volume': buy_volume,
+        'sell_volume': sell_volume,
+        'imbalance_ratio': (buy_volume - sell_volume) / total if total > 0 else 0.0,
+        'bids': bids[:depth],
+        'asks': asks[:depth]
+    }
@@ -0,0 +1,162 @@
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+_rate_amount = itemgetter('rate', 'amount')
+
+# Levels keyed by the API's rate string. Amounts stay as the raw strings
+# too, so an unchanged level is never parsed; orders sharing a rate are
+# merged into one float amount.
+Levels = Dict[str, object]
+
+
+def _pairs(orders: List[Dict]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(map(_rate_amount, orders))
+
+
+def _levels(pairs: Tuple[Tuple[str, str], ...]) -> Levels:
+    levels: Levels = dict(pairs)
+    if len(levels) == len(pairs):
+        return levels
+
+    levels = {}
+    for rate, amount in pairs:
+        if rate in levels:
+            levels[rate] = float(levels[rate]) + float(amount)
+        else:
+            levels[rate] = amount
+    return levels
+
+
+class _BookSide:
+    ## One side of a coin's last snapshot, its hash and running notional
+    ## total
+
+    def __init__(self):
+        self.hash: Optional[int] = None
+        self.levels: Levels = {}
+        self.volume = 0.0
+
+    def apply(self, orders: List[Dict]) -> Optional[Dict]:
+        # Replace the snapshot, updating the total from the levels that
+        # differ only; returns the compact diff, or None if the side is
+        # unchanged
+        pairs = _pairs(orders)
+        fingerprint = hash(pairs)
+        if fingerprint == self.hash:
+            return None
+        self.hash = fingerprint
+
+        old = self.levels
+        levels = _levels(pairs)
+        added: Dict[float, float] = {}
+        changed: Dict[float, float] = {}
+        removed: List[float] = []
+        delta = 0.0
+
+        for rate in [rate for rate, amount in levels.items() if old.get(rate) != amount]:
+            price, size = float(rate), float(levels[rate])
+            previous = old.get(rate)
+            if previous is None:
+                added[price] = size
+                delta += price * size
+            else:
+                changed[price] = size
+                delta += price * (size - float(previous))
+        # Levels that disappeared, only looked for when some did
+        if len(old) + len(added) != len(levels):
+            for rate in old.keys() - levels.keys():
+                price = float(rate)
+                removed.append(price)
+                delta -= price * float(old[rate])
+
+        self.levels = levels
+        self.volume += delta
+        return {'added': added, 'removed': removed, 'changed': changed}
+
+    def resync(self):
+        # Recompute the total from scratch, dropping accumulated rounding
+        self.volume = sum(float(rate) * float(amount) for rate, amount in self.levels.items())
+
+
+_NO_CHANGE = {'added': {}, 'removed': [], 'changed': {}}
+
+
+class OrderBookTracker:
+    ## Keeps each coin's previous /orders/open snapshot and turns every new
+    ## one into a diff of price levels (added, removed, changed amounts).
+    ## Buy and sell notional totals are updated from the diff alone, and a
+    ## side whose hash matches the previous snapshot's is not diffed at all.
+    ## Totals are recomputed in full every `resync_every` diffs.
+
+    def __init__(self, resync_every: int = 1000):
+        self.resync_every = resync_every
+        self._sides: Dict[str, Tuple[_BookSide, _BookSide]] = {}
+        self._updates: Dict[str, int] = {}
+
+    def __contains__(self, coin: str) -> bool:
+        return coin.upper() in self._sides
+
+    def volumes(self, coin: str) -> Optional[Tuple[float, float]]:
+        # (buy notional, sell notional) of the last snapshot
+        sides = self._sides.get(coin.upper())
+        return (sides[0].volume, sides[1].volume) if sides else None
+
+    def depth(self, coin: str) -> Optional[Tuple[int, int]]:
+        # Number of distinct bid and ask levels in the last snapshot
+        sides = self._sides.get(coin.upper())
+        return (len(sides[0].levels), len(sides[1].levels)) if sides else None
+
+    def update(self, coin: str, order_book: Dict) -> Dict:
+        ## Fold a new snapshot in. The result always carries the totals
+        ## ('buy_volume', 'sell_volume', 'bid_levels', 'ask_levels'),
+        ## 'unchanged' and 'stale'; changed snapshots add 'bids' and 'asks'
+        ## diffs.
+        coin = coin.upper()
+        if order_book.get('status', 'ok') != 'ok':
+            # Failed fetch: keep the last good snapshot, flagged as stale
+            return self._result(coin, True, stale=True)
+
+        sides = self._sides.get(coin)
+        if sides is None:
+            sides = self._sides[coin] = (_BookSide(), _BookSide())
+        bids = sides[0].apply(order_book.get('buyorders', []))
+        asks = sides[1].apply(order_book.get('sellorders', []))
+        if bids is None and asks is None:
+            return self._result(coin, True)
+
+        updates = self._updates.get(coin, 0) + 1
+        if updates >= self.resync_every:
+            updates = 0
+            sides[0].resync()
+            sides[1].resync()
+        self._updates[coin] = updates
+
+        result = self._result(coin, False)
+        result['bids'] = bids if bids is not None else _NO_CHANGE
+        result['asks'] = asks if asks is not None else _NO_CHANGE
+        return result
+
+    def _result(self, coin: str, unchanged: bool, stale: bool = False) -> Dict:
+        sides = self._sides.get(coin)
+        if sides is None:
+            return {
+                'unchanged': unchanged, 'stale': stale,
+                'buy_volume': 0.0, 'sell_volume': 0.0, 'bid_levels': 0, 'ask_levels': 0
+            }
+        return {
+            'unchanged': unchanged,
+            'stale': stale,
+            'buy_volume': sides[0].volume,
+            'sell_volume': sides[1].volume,
+            'bid_levels': len(sides[0].levels),
+            'ask_levels': len(sides[1].levels)
+        }
+
+    def reset(self, coin: str = None):
+        if coin is None:
+            self._sides.clear()
+            self._updates.clear()
+            return
+        coin = coin.upper()
+        for state in (self._sides, self._updates):
+            state.pop(coin, None)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+
+
+class TickScheduler:
+    ## Fires ticks on a fixed wall-clock cadence: tick k is due at
+    ## start + k * interval no matter how long earlier ticks took, so the
+    ## period doesn't drift by the fetch and compute time.
+    ##
+    ## Backpressure: at most `max_in_flight` ticks run at once. A tick that
+    ## comes due while that many are still running is skipped rather than
+    ## queued, and slots missed entirely (e.g. the loop was blocked) are
+    ## dropped instead of being fired in a burst to catch up.
+    ##
+    ## run() drives an asyncio tick function; run_sync() a blocking one,
+    ## where a tick is never in flight when the next comes due.
+    ##
+    ## Each slot's drift (how late it fired) and skipped slots are recorded
+    ## on `metrics` when given. An interval of 0 runs ticks back to back.
+    ## `clock` and the sleep functions can be replaced, e.g. by a fake
+    ## clock in tests.
+
+    def __init__(self, interval: float, max_in_flight: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 metrics: Optional[Metrics] = None,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep,
+                 sleep_sync: Callable[[float], None] = time.sleep):
+        if interval < 0:
+            raise ValueError("Interval must not be negative")
+
+        self.interval = interval
+        self.max_in_flight = max(1, max_in_flight)
+        self._clock = clock
+        self._sleep = sleep
+        self._sleep_sync = sleep_sync
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.stats = {'fired': 0, 'skipped': 0, 'completed': 0, 'max_lag': 0.0}
+
+    def _catch_up(self, slot: int, due: float, duration: Optional[int]) -> int:
+        # Record how late `slot` fired and move past the slots already missed
+        lag = self._clock() - due
+        self.stats['max_lag'] = max(self.stats['max_lag'], lag)
+        self.metrics.set_gauge('crypto_monitor_tick_drift_seconds', lag)
+
+        # Drop slots we're already past instead of bursting
+        missed = int(lag // self.interval) if self.interval > 0 else 0
+        if missed > 0:
+            if duration is not None:
+                missed = min(missed, duration - slot - 1)
+            self.stats['skipped'] += missed
+            self.metrics.inc('crypto_monitor_ticks_skipped_total', missed, reason='missed')
+            slot += missed
+        return slot
+
+    async def run(self, tick: Callable[[int], Awaitable], duration: Optional[int] = None) -> Dict:
+        # Run `tick(slot)` for `duration` slots (forever if None). The first
+        # exception raised by a tick stops the schedule and is re-raised.
+        in_flight: Set[asyncio.Task] = set()
+        errors = []
+
+        def done(task: asyncio.Task):
+            in_flight.discard(task)
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                errors.append(task.exception())
+            else:
+                self.stats['completed'] += 1
+
+        start = self._clock()
+        slot = 0
+        try:
+            while duration is None or slot < duration:
+                due = start + slot * self.interval
+                delay = due - self._clock()
+                if delay > 0:
+                    await self._sleep(delay)
+                if errors:
+                    raise errors[0]
+
+                slot = self._catch_up(slot, due, duration)
+                if len(in_flight) >= self.max_in_flight:
+                    self.stats['skipped'] += 1
+                    self.metrics.inc('crypto_monitor_ticks_skipped_total', reason='in_flight')
+                else:
+                    task = asyncio.ensure_future(tick(slot))
+                    in_flight.add(task)
+                    task.add_done_callback(done)
+                    self.stats['fired'] += 1
+                    self.metrics.inc('crypto_monitor_ticks_total')
+                slot += 1
+
+            if in_flight:
+                await asyncio.wait(set(in_flight))
+            if errors:
+                raise errors[0]
+        finally:
+            for task in list(in_flight):
+                task.cancel()
+
+        return dict(self.stats)
+
+    def run_sync(self, tick: Callable[[int], None], duration: Optional[int] = None) -> Dict:
+        # Blocking counterpart of run(): `tick(slot)` runs in this thread,
+        # and the wait for the next slot is what remains of the interval,
+        # not the whole interval. A tick's exception propagates.
+        start = self._clock()
+        slot = 0
+        while duration is None or slot < duration:
+            due = start + slot * self.interval
+            delay = due - self._clock()
+            if delay > 0:
+                self._sleep_sync(delay)
+
+            slot = self._catch_up(slot, due, duration)
+            self.stats['fired'] += 1
+            self.metrics.inc('crypto_monitor_ticks_total')
+            tick(slot)
+            self.stats['completed'] += 1
+            slot += 1
+
+        return dict(self.stats)
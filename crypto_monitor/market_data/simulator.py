@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+import numpy as np
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple, Union
+from crypto_monitor.market_data.synthetic import DEFAULT_START_PRICES, synthetic_order_book
+from crypto_monitor.market_data.transport import endpoint_label
+
+API_PREFIX = '/pubapi/v2'
+
+
+class SimulatedMarket:
+    ## Random-walk prices for a set of coins. Every read of a coin's price
+    ## advances its walk one step; the spread wanders between tight and wide.
+
+    def __init__(self, coins: Iterable[str], volatility: float = 0.001, book_depth: int = 20,
+                 seed: Optional[int] = None):
+        self.coins = [coin.upper() for coin in coins]
+        self.volatility = volatility
+        self.book_depth = book_depth
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._last = {coin: DEFAULT_START_PRICES.get(coin, 100.0) for coin in self.coins}
+        self._spread = {coin: 0.3 for coin in self.coins}
+
+    def __contains__(self, coin: str) -> bool:
+        return coin.upper() in self._last
+
+    def _step(self, coin: str) -> Dict[str, str]:
+        self._last[coin] *= float(np.exp(self._rng.normal(0.0, self.volatility)))
+        self._spread[coin] = abs(self._rng.normal(0.3, 0.25)) + 0.01
+        last = self._last[coin]
+        half_spread = last * self._spread[coin] / 200
+        return {'bid': f"{last - half_spread:.8f}", 'ask': f"{last + half_spread:.8f}", 'last': f"{last:.8f}"}
+
+    def latest(self, coin: Optional[str] = None) -> Dict:
+        # /latest (every coin) or /latest/{coin}
+        with self._lock:
+            if coin is None:
+                prices = {coin.lower(): self._step(coin) for coin in self.coins}
+            elif coin.upper() in self._last:
+                prices = self._step(coin.upper())
+            else:
+                return {'status': 'error', 'message': f"Coin {coin} not found"}
+        return {'status': 'ok', 'message': 'ok', 'prices': prices}
+
+    def order_book(self, coin: str) -> Dict:
+        coin = coin.upper()
+        with self._lock:
+            if coin not in self._last:
+                return {'status': 'error', 'message': f"Coin {coin} not found"}
+            return synthetic_order_book(self._last[coin], self.book_depth, self._spread[coin], self._rng)
+
+
+class CoinspotSimulator:
+    ## Local stand-in for Coinspot's public API, serving /latest,
+    ## /latest/{coin} and /orders/open/{coin} under /pubapi/v2 from a
+    ## SimulatedMarket.
+    ##
+    ## Each request first waits `latency` seconds (plus up to `jitter`),
+    ## then fails with a 500 with probability `error_rate` or a 429 with
+    ## probability `rate_limit_rate`. Payload size follows the number of
+    ## coins and `book_depth`. Point a client at `base_url`, or export it as
+    ## $COINSPOT_BASE_URL. Served requests are counted by endpoint and
+    ## status code in `requests`.
+
+    def __init__(self, coins: Union[int, Iterable[str]] = tuple(DEFAULT_START_PRICES), host: str = '127.0.0.1',
+                 port: int = 0, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0, book_depth: int = 20,
+                 volatility: float = 0.001, seed: Optional[int] = None):
+        if isinstance(coins, int):
+            # The known coins first, then made-up ones to reach the count
+            known = list(DEFAULT_START_PRICES)
+            coins = known[:coins] + [f"SIM{i}" for i in range(max(0, coins - len(known)))]
+        self.market = SimulatedMarket(coins, volatility, book_depth, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests: Counter = Counter()
+        # Fault injection draws come from their own generator, so they
+        # don't perturb the price walk
+        self._rng = np.random.default_rng(None if seed is None else seed + 1)
+        self._lock = threading.Lock()
+
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so pooled clients reuse connections. Headers and
+            # body are separate writes, so Nagle would hold the body back
+            # for the client's delayed ACK.
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body, headers = simulator.handle(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        host = self.server.server_address[0]
+        return f"http://{host}:{self.port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='coinspot-simulator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+        self._thread = None
+
+    def _draw(self) -> Tuple[float, float, float]:
+        with self._lock:
+            return tuple(self._rng.random(3))
+
+    def handle(self, path: str) -> Tuple[int, Dict, Dict[str, str]]:
+        ## (status code, JSON body, extra headers) for a request path
+        path = path.split('?')[0].rstrip('/')
+        if not path.startswith(API_PREFIX):
+            return self._count(path, 404, {'status': 'error', 'message': 'Not found'})
+        parts = path[len(API_PREFIX):].strip('/').split('/')
+
+        delay, fault, limited = self._draw()
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * delay)
+        if fault < self.error_rate:
+            return self._count(path, 500, {'status': 'error', 'message': 'Simulated server error'})
+        if limited < self.rate_limit_rate:
+            return self._count(path, 429, {'status': 'error', 'message': 'Rate limit exceeded'},
+                               {'Retry-After': f"{self.retry_after:g}"})
+
+        if parts == ['latest']:
+            return self._count(path, 200, self.market.latest())
+        if len(parts) == 2 and parts[0] == 'latest':
+            return self._count(path, 200, self.market.latest(parts[1]))
+        if len(parts) == 3 and parts[:2] == ['orders', 'open']:
+            return self._count(path, 200, self.market.order_book(parts[2]))
+        return self._count(path, 404, {'status': 'error', 'message': 'Not found'})
+
+    def _count(self, path: str, status: int, body: Dict, headers: Dict[str, str] = None):
+        with self._lock:
+            self.requests[(endpoint_label(path), status)] += 1
+        return status, body, headers or {}
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Rough starting prices so synthetic books look like the real markets
+DEFAULT_START_PRICES = {'BTC': 95000.0, 'ETH': 5000.0, 'XRP': 3.5, 'DOGE': 0.5, 'SOL': 300.0}
+
+
+def random_walk(n: int, start: float = 100.0, volatility: float = 0.001,
+                rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    # Geometric random walk of n prices
+    rng = rng if rng is not None else np.random.default_rng()
+    returns = rng.normal(0.0, volatility, n)
+    returns[0] = 0.0
+    return start * np.exp(np.cumsum(returns))
+
+
+def synthetic_ohlc(n: int, start: float = 100.0, seed: int = 0) -> pd.DataFrame:
+    # OHLC bars with volume, e.g. for HeikinAshi and calculate_vbp
+    rng = np.random.default_rng(seed)
+    close = random_walk(n, start, rng=rng)
+    open_ = np.concatenate(([start], close[:-1]))
+    wick = np.abs(rng.normal(0, 0.0005, (2, n))) * close
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + wick[0],
+        'low': np.minimum(open_, close) - wick[1],
+        'close': close,
+        'volume': rng.exponential(10.0, n)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='s', name='timestamp'))
+
+
+def synthetic_history(n: int, start: float = 100.0, seed: int = 0) -> pd.DataFrame:
+    # Frame shaped like CoinspotClient.get_price_history
+    rng = np.random.default_rng(seed)
+    last = random_walk(n, start, rng=rng)
+    half_spread = last * (np.abs(rng.normal(0.3, 0.25, n)) + 0.01) / 200
+    bid = last - half_spread
+    ask = last + half_spread
+    return pd.DataFrame({
+        'open': last,
+        'high': np.maximum(np.maximum(bid, ask), last),
+        'low': np.minimum(np.minimum(bid, ask), last),
+        'close': last,
+        'bid': bid,
+        'ask': ask,
+        'last': last,
+        'spread_absolute': ask - bid,
+        'spread_percentage': (ask - bid) / bid * 100
+    }, index=pd.date_range('2024-01-01', periods=n, freq='s', name='timestamp'))
+
+
+def synthetic_order_book(mid: float, depth: int = 20, spread_pct: float = 0.1,
+                         rng: Optional[np.random.Generator] = None) -> Dict:
+    # Order book in the /orders/open/{coin} shape around `mid`
+    rng = rng if rng is not None else np.random.default_rng()
+    half_spread = mid * spread_pct / 200
+    step = mid * 0.0005
+    offsets = half_spread + step * np.arange(depth)
+    bid_rates = mid - offsets
+    ask_rates = mid + offsets
+    bid_amounts = rng.exponential(1.0, depth) * 1000 / mid
+    ask_amounts = rng.exponential(1.0, depth) * 1000 / mid
+
+    return {
+        'status': 'ok',
+        'message': 'ok',
+        'buyorders': [
+            {'amount': f"{amount:.8f}", 'rate': f"{rate:.8f}", 'total': f"{amount * rate:.8f}"}
+            for amount, rate in zip(bid_amounts, bid_rates)
+        ],
+        'sellorders': [
+            {'amount': f"{amount:.8f}", 'rate': f"{rate:.8f}", 'total': f"{amount * rate:.8f}"}
+            for amount, rate in zip(ask_amounts, ask_rates)
+        ]
+    }
+
+
+def synthetic_ticks(coins: List[str], n: int, interval: float = 1.0,
+                    start: datetime = datetime(2024, 1, 1), seed: int = 0,
+                    book_depth: int = 0) -> Iterator[Tuple[str, datetime, Dict, Optional[Dict]]]:
+    ## Deterministic random-walk ticks for several coins, interleaved in
+    ## time order as (coin, timestamp, /latest/{coin} response, order book).
+    ## Order books are only generated when book_depth > 0.
+    rng = np.random.default_rng(seed)
+    coins = [coin.upper() for coin in coins]
+    lasts = {
+        coin: random_walk(n, DEFAULT_START_PRICES.get(coin, 100.0), rng=rng) for coin in coins
+    }
+    # Spread percentage wanders between very tight and wide
+    spreads = {coin: np.abs(rng.normal(0.3, 0.25, n)) + 0.01 for coin in coins}
+
+    for i in range(n):
+        timestamp = start + timedelta(seconds=i * interval)
+        for coin in coins:
+            last = lasts[coin][i]
+            half_spread = last * spreads[coin][i] / 200
+            response = {
+                'status': 'ok',
+                'message': 'ok',
+                'prices': {
+                    'bid': f"{last - half_spread:.8f}",
+                    'ask': f"{last + half_spread:.8f}",
+                    'last': f"{last:.8f}"
+                }
+            }
+            order_book = synthetic_order_book(last, book_depth, spreads[coin][i], rng) if book_depth else None
+            yield coin, timestamp, response, order_book
@@ -0,0 +1,222 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def endpoint_label(url: str) -> str:
+    # Endpoint template for metric labels, e.g. '/latest/{coin}', so coins
+    # don't multiply the number of series
+    parts = urlsplit(url).path.rstrip('/').split('/')
+    if 'orders' in parts:
+        return '/orders/open/{coin}'
+    if 'latest' in parts:
+        return '/latest' if parts[-1] == 'latest' else '/latest/{coin}'
+    return parts[-1] if parts else ''
+
+
+class Transport:
+    ## Interface used by CoinspotClient to fetch JSON payloads
+
+    def get_json(self, url: str) -> Dict:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _CacheEntry:
+
+    def __init__(self, payload: Dict, expires: float, etag: Optional[str], last_modified: Optional[str]):
+        self.payload = payload
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class _Request:
+    ## A request in flight, shared by every caller of its URL
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload: Optional[Dict] = None
+
+
+class HTTPTransport(Transport):
+    ## Keep-alive HTTP transport built on a pooled requests.Session.
+    ##
+    ## - connect/read timeouts so a stalled socket can't hang the monitor loop
+    ## - jittered exponential retry on connection errors, 5xx and 429
+    ##   (honouring Retry-After when the server sends one)
+    ## - concurrent callers of a URL wait for the request already in flight
+    ##   instead of issuing their own, and share its payload
+    ## - optional short-TTL cache: callers asking for the same URL within the
+    ##   TTL share one request. Expired entries are revalidated with
+    ##   If-None-Match/If-Modified-Since when possible.
+    ##
+    ## Cached payloads are shared between callers and must not be mutated.
+    ## Request latency, retries, errors and cache hits are recorded on
+    ## `metrics` when given.
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 cache_ttl: float = 0.0, pool_size: int = 10,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic,
+                 metrics: Optional[Metrics] = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_ttl = cache_ttl
+        self._sleep = sleep
+        self._clock = clock
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+        self._cache: Dict[str, _CacheEntry] = {}
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_json(self, url: str) -> Dict:
+        while True:
+            with self._lock:
+                entry = self._cache.get(url) if self.cache_ttl > 0 else None
+                if entry is not None and entry.expires > self._clock():
+                    self.metrics.inc('coinspot_http_cache_hits_total', endpoint=endpoint_label(url))
+                    return entry.payload
+
+                request = self._in_flight.get(url)
+                if request is None:
+                    # This caller does the request, the others wait for it
+                    request = self._in_flight[url] = _Request()
+                    break
+
+            request.done.wait()
+            if request.payload is not None:
+                return request.payload
+            # The request failed; try again, or wait for whoever does
+
+        try:
+            payload, etag, last_modified = self._fetch(url, entry)
+            request.payload = payload
+            if self.cache_ttl > 0:
+                with self._lock:
+                    self._cache[url] = _CacheEntry(payload, self._clock() + self.cache_ttl, etag, last_modified)
+            return payload
+        finally:
+            with self._lock:
+                self._in_flight.pop(url)
+            request.done.set()
+
+    def _fetch(self, url: str, entry: Optional[_CacheEntry]) -> Tuple[Dict, Optional[str], Optional[str]]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        metrics = self.metrics
+        endpoint = endpoint_label(url)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe('coinspot_http_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+                if attempt >= self.max_retries:
+                    metrics.inc('coinspot_http_errors_total', endpoint=endpoint, reason=type(e).__name__)
+                    raise
+                metrics.inc('coinspot_http_retries_total', endpoint=endpoint, reason=type(e).__name__)
+                self._sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            metrics.observe('coinspot_http_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                metrics.inc('coinspot_http_retries_total', endpoint=endpoint, reason=str(response.status_code))
+                self._sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+                attempt += 1
+                continue
+
+            if response.status_code == 304 and entry is not None:
+                metrics.inc('coinspot_http_not_modified_total', endpoint=endpoint)
+                return entry.payload, entry.etag, entry.last_modified
+
+            try:
+                response.raise_for_status() # Raises exception for 4XX/5XX status codes
+            except requests.HTTPError:
+                metrics.inc('coinspot_http_errors_total', endpoint=endpoint, reason=str(response.status_code))
+                raise
+            return (
+                response.json(),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass # HTTP-date form, fall back to our own schedule
+
+        # "Full jitter" exponential backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class FakeTransport(Transport):
+    ## Offline transport for tests. Responses are keyed by URL suffix
+    ## (e.g. '/latest/BTC') and may be a payload dict, an exception to raise,
+    ## a (status_code, payload) tuple or a callable taking the URL.
+
+    def __init__(self, responses: Optional[Dict] = None):
+        self.responses = dict(responses or {})
+        self.calls: List[str] = []
+
+    def add(self, path: str, response):
+        self.responses[path] = response
+
+    def get_json(self, url: str) -> Dict:
+        self.calls.append(url)
+
+        # Longest suffix wins so '/latest/BTC' beats '/BTC'
+        for path in sorted(self.responses, key=len, reverse=True):
+            if url.endswith(path):
+                response = self.responses[path]
+                break
+        else:
+            raise requests.HTTPError(f"404 Client Error: Not Found for url: {url}")
+
+        if callable(response):
+            response = response(url)
+        if isinstance(response, Exception):
+            raise response
+        if isinstance(response, tuple):
+            status, response = response
+            if status >= 400:
+                raise requests.HTTPError(f"{status} Error for url: {url}")
+        return response
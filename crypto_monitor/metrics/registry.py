@@ -0,0 +1,221 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond analysis stages up to
+# slow HTTP requests
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class _Histogram:
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+
+    def __init__(self, metrics: 'Metrics', name: str, labels: Dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class Metrics:
+    ## Thread-safe in-process metrics registry: counters, gauges and latency
+    ## histograms keyed by name and labels. Sinks receive a snapshot on
+    ## export(); see crypto_monitor.metrics.sinks.
+
+    enabled = True
+
+    def __init__(self, sinks: Optional[Iterable] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.sinks: List = list(sinks or [])
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        for sink in self.sinks:
+            if hasattr(sink, 'attach'):
+                sink.attach(self)
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        # Context manager observing the wall time of its block
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> Dict:
+        # Plain-data copy of every series, safe to hand to another thread
+        with self._lock:
+            return {
+                'counters': {
+                    name: [(dict(key), value) for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                'gauges': {
+                    name: [(dict(key), value) for key, value in series.items()]
+                    for name, series in self._gauges.items()
+                },
+                'histograms': {
+                    name: [
+                        (dict(key), {
+                            'buckets': list(histogram.buckets),
+                            'counts': list(histogram.counts),
+                            'sum': histogram.sum,
+                            'count': histogram.count
+                        })
+                        for key, histogram in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+                'help': dict(self._help)
+            }
+
+    def export(self):
+        # Push the current values to every sink
+        if not self.sinks:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.write(snapshot)
+
+    def close(self):
+        self.export()
+        for sink in self.sinks:
+            sink.close()
+
+
+class _NullTimer:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullMetrics(Metrics):
+    ## Disabled metrics: every call is a no-op, so instrumented code costs
+    ## one method call when metrics aren't wanted
+
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        pass
+
+    def set_gauge(self, name: str, value: float, **labels):
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+    def timer(self, name: str, **labels):
+        return _NULL_TIMER
+
+    def export(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def render_prometheus(snapshot: Dict) -> str:
+    # Prometheus text exposition format (also valid OpenMetrics text,
+    # minus the trailing '# EOF' which OpenMetrics consumers add)
+    lines = []
+    help_texts = snapshot.get('help', {})
+
+    def labels_text(labels: Dict, extra: Dict = None) -> str:
+        merged = dict(labels)
+        if extra:
+            merged.update(extra)
+        if not merged:
+            return ''
+        body = ','.join(
+            '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for key, value in merged.items()
+        )
+        return '{' + body + '}'
+
+    def header(name: str, kind: str):
+        if name in help_texts:
+            lines.append(f"# HELP {name} {help_texts[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for name, series in sorted(snapshot['counters'].items()):
+        header(name, 'counter')
+        for labels, value in series:
+            lines.append(f"{name}{labels_text(labels)} {value}")
+
+    for name, series in sorted(snapshot['gauges'].items()):
+        header(name, 'gauge')
+        for labels, value in series:
+            lines.append(f"{name}{labels_text(labels)} {value}")
+
+    for name, series in sorted(snapshot['histograms'].items()):
+        header(name, 'histogram')
+        for labels, data in series:
+            cumulative = 0
+            for bound, count in zip(data['buckets'] + ['+Inf'], data['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{labels_text(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{labels_text(labels)} {data['sum']}")
+            lines.append(f"{name}_count{labels_text(labels)} {data['count']}")
+
+    return '\n'.join(lines) + '\n'
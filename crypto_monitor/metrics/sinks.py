@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, TextIO
+from crypto_monitor.metrics.registry import render_prometheus
+
+
+class MetricsSink:
+    ## Receives metrics snapshots from Metrics.export()
+
+    def write(self, snapshot: Dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PrometheusFileSink(MetricsSink):
+    ## Prometheus text file, e.g. for node_exporter's textfile collector.
+    ## Written to a temporary file and renamed so scrapers never see a
+    ## partial file.
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, snapshot: Dict):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(render_prometheus(snapshot))
+        os.replace(tmp_path, self.path)
+
+
+class JSONLogSink(MetricsSink):
+    ## One JSON object per export, appended to a file or stream
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None):
+        if (path is None) == (stream is None):
+            raise ValueError("Give either a path or a stream")
+        self._owned = stream is None
+        self.stream = open(path, 'a') if stream is None else stream
+
+    def write(self, snapshot: Dict):
+        record = {'timestamp': time.time()}
+        record.update({kind: snapshot[kind] for kind in ('counters', 'gauges', 'histograms')})
+        self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+
+
+class PrometheusHTTPSink(MetricsSink):
+    ## Serves /metrics from a local HTTP endpoint. Scrapes read the registry
+    ## directly, so export() has nothing to push.
+
+    def __init__(self, port: int = 9108, host: str = '127.0.0.1'):
+        self.metrics = None
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics' or sink.metrics is None:
+                    self.send_error(404)
+                    return
+                body = render_prometheus(sink.metrics.snapshot()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Keep scrapes out of the monitor's output
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def attach(self, metrics):
+        self.metrics = metrics
+
+    def write(self, snapshot: Dict):
+        pass
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,265 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Stored per tick; the timestamp is epoch nanoseconds
+TICK_COLUMNS: Dict[str, str] = {
+    'timestamp': '<i8',
+    'bid': '<f8',
+    'ask': '<f8',
+    'last': '<f8',
+    'spread_absolute': '<f8',
+    'spread_percentage': '<f8'
+}
+
+ORDER_BOOK_FILE = 'order_books.jsonl'
+
+
+def to_epoch_ns(value) -> int:
+    # Accepts datetime, pandas/NumPy timestamps, ISO strings and epoch ns
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(np.datetime64(pd.Timestamp(value).to_datetime64(), 'ns').astype('int64'))
+
+
+def _partition_name(timestamp_ns: int) -> str:
+    return str(np.datetime64(timestamp_ns, 'ns').astype('datetime64[D]'))
+
+
+class TickStore:
+    ## Append-only columnar tick store, partitioned by coin and day:
+    ##
+    ##     <root>/<COIN>/<YYYY-MM-DD>/<column>.bin
+    ##
+    ## Each column is a raw little-endian array, so a partition can be
+    ## memory-mapped and range queries read only the partitions, columns and
+    ## pages they need. Ticks are buffered per partition and written after
+    ## `buffer_rows` ticks (1 = write through) and on flush()/close().
+    ## Optional order book snapshots go to order_books.jsonl per partition.
+
+    def __init__(self, root: str, buffer_rows: int = 1, order_books: bool = False):
+        self.root = root
+        self.buffer_rows = max(1, buffer_rows)
+        self.order_books = order_books
+        self._pending: Dict[Tuple[str, str], Dict[str, List]] = {}
+        # Partitions repaired by this process, see _repair()
+        self._repaired = set()
+        os.makedirs(root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _partition_path(self, coin: str, partition: str) -> str:
+        return os.path.join(self.root, coin.upper(), partition)
+
+    def append(self, coin: str, tick: Dict):
+        # `tick` holds the TICK_COLUMNS values, e.g. a price history point
+        coin = coin.upper()
+        timestamp = to_epoch_ns(tick['timestamp'])
+        key = (coin, _partition_name(timestamp))
+
+        pending = self._pending.get(key)
+        if pending is None:
+            # A new day starts a new partition; write out the previous one
+            for other in [k for k in self._pending if k[0] == coin]:
+                self._write(other)
+            pending = self._pending[key] = {name: [] for name in TICK_COLUMNS}
+
+        pending['timestamp'].append(timestamp)
+        for name in TICK_COLUMNS:
+            if name != 'timestamp':
+                pending[name].append(tick[name])
+
+        if len(pending['timestamp']) >= self.buffer_rows:
+            self._write(key)
+
+    def append_order_book(self, coin: str, timestamp, order_book: Dict):
+        coin = coin.upper()
+        timestamp = to_epoch_ns(timestamp)
+        path = self._partition_path(coin, _partition_name(timestamp))
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ORDER_BOOK_FILE), 'a') as f:
+            f.write(json.dumps({'timestamp': timestamp, 'order_book': order_book}) + '\n')
+
+    def extend(self, coin: str, ticks: Dict[str, Iterable]):
+        # Bulk append of equally sized TICK_COLUMNS arrays in time order,
+        # written straight through one partition at a time
+        coin = coin.upper()
+        timestamps = np.asarray(ticks['timestamp'])
+        if not len(timestamps):
+            return
+        if timestamps.dtype.kind == 'M':
+            timestamps = timestamps.astype('datetime64[ns]').astype('int64')
+        elif timestamps.dtype.kind not in 'iu':
+            timestamps = np.array([to_epoch_ns(value) for value in timestamps], dtype='int64')
+
+        # Anything buffered for this coin comes first
+        for key in [k for k in self._pending if k[0] == coin]:
+            self._write(key)
+
+        days = timestamps.astype('datetime64[ns]').astype('datetime64[D]')
+        bounds = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(days)]))):
+            chunk = {name: np.asarray(ticks[name])[start:end] for name in TICK_COLUMNS if name != 'timestamp'}
+            chunk['timestamp'] = timestamps[start:end]
+            self._write_columns(self._partition_path(coin, str(days[start])), chunk)
+
+    def _write(self, key: Tuple[str, str]):
+        pending = self._pending.pop(key, None)
+        if not pending or not pending['timestamp']:
+            return
+        self._write_columns(self._partition_path(*key), pending)
+
+    def _repair(self, path: str):
+        # A torn write leaves some columns with rows the others lack. Readers
+        # clip to the shortest column, but appending after those rows would
+        # misalign the columns, so before the first append to a partition
+        # every column is cut back to the rows all of them have.
+        sizes = {}
+        for name in TICK_COLUMNS:
+            file = os.path.join(path, f"{name}.bin")
+            sizes[name] = os.path.getsize(file) if os.path.exists(file) else 0
+        rows = min(size // np.dtype(TICK_COLUMNS[name]).itemsize for name, size in sizes.items())
+        for name, size in sizes.items():
+            length = rows * np.dtype(TICK_COLUMNS[name]).itemsize
+            if size > length:
+                os.truncate(os.path.join(path, f"{name}.bin"), length)
+        self._repaired.add(path)
+
+    def _write_columns(self, path: str, columns: Dict[str, Iterable]):
+        os.makedirs(path, exist_ok=True)
+        if path not in self._repaired:
+            self._repair(path)
+        # Timestamp last: a torn write then leaves it as the shortest column
+        # and readers clip every column to its length
+        for name in list(TICK_COLUMNS)[1:] + ['timestamp']:
+            with open(os.path.join(path, f"{name}.bin"), 'ab') as f:
+                f.write(np.asarray(columns[name], dtype=TICK_COLUMNS[name]).tobytes())
+
+    def flush(self):
+        for key in list(self._pending):
+            self._write(key)
+
+    def close(self):
+        self.flush()
+
+    def coins(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def partitions(self, coin: str) -> List[str]:
+        path = os.path.join(self.root, coin.upper())
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.listdir(path))
+
+    def _columns(self, coin: str, partition: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        # Memory-map the requested columns of one partition, clipped to the
+        # rows every one of them has
+        path = self._partition_path(coin, partition)
+        maps = {}
+        for name in columns:
+            file = os.path.join(path, f"{name}.bin")
+            size = os.path.getsize(file) if os.path.exists(file) else 0
+            count = size // np.dtype(TICK_COLUMNS[name]).itemsize
+            if count:
+                maps[name] = np.memmap(file, dtype=TICK_COLUMNS[name], mode='r', shape=(count,))
+            else:
+                maps[name] = np.empty(0, dtype=TICK_COLUMNS[name])
+        rows = min(len(m) for m in maps.values()) if maps else 0
+        return {name: m[:rows] for name, m in maps.items()}
+
+    def read(self, coin: str, start=None, end=None, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        ## Range query over [start, end]; only partitions overlapping the
+        ## range and the requested columns (plus timestamp) are opened
+        self.flush()
+        coin = coin.upper()
+        columns = list(columns) if columns is not None else list(TICK_COLUMNS)
+        if 'timestamp' not in columns:
+            columns = ['timestamp'] + columns
+
+        start_ns = to_epoch_ns(start) if start is not None else None
+        end_ns = to_epoch_ns(end) if end is not None else None
+        first_day = _partition_name(start_ns) if start_ns is not None else None
+        last_day = _partition_name(end_ns) if end_ns is not None else None
+
+        parts = {name: [] for name in columns}
+        for partition in self.partitions(coin):
+            if (first_day and partition < first_day) or (last_day and partition > last_day):
+                continue
+
+            data = self._columns(coin, partition, columns)
+            timestamps = data['timestamp']
+            lo = np.searchsorted(timestamps, start_ns, side='left') if start_ns is not None else 0
+            hi = np.searchsorted(timestamps, end_ns, side='right') if end_ns is not None else len(timestamps)
+            for name in columns:
+                parts[name].append(np.array(data[name][lo:hi]))
+
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=TICK_COLUMNS[name])
+            for name, chunks in parts.items()
+        }
+
+    def tail(self, coin: str, n: int, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        # Last `n` ticks, reading partitions newest first until enough rows
+        self.flush()
+        coin = coin.upper()
+        columns = list(columns) if columns is not None else list(TICK_COLUMNS)
+
+        parts = {name: [] for name in columns}
+        remaining = n
+        for partition in reversed(self.partitions(coin)):
+            if remaining <= 0:
+                break
+            data = self._columns(coin, partition, columns)
+            rows = len(next(iter(data.values()))) if data else 0
+            take = min(rows, remaining)
+            for name in columns:
+                parts[name].insert(0, np.array(data[name][rows - take:]))
+            remaining -= take
+
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=TICK_COLUMNS[name])
+            for name, chunks in parts.items()
+        }
+
+    def read_frame(self, coin: str, start=None, end=None, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        data = self.read(coin, start, end, columns)
+        index = pd.DatetimeIndex(data.pop('timestamp').view('datetime64[ns]'), name='timestamp')
+        return pd.DataFrame(data, index=index)
+
+    def read_order_books(self, coin: str, start=None, end=None) -> List[Tuple[datetime, Dict]]:
+        coin = coin.upper()
+        start_ns = to_epoch_ns(start) if start is not None else None
+        end_ns = to_epoch_ns(end) if end is not None else None
+
+        first_day = _partition_name(start_ns) if start_ns is not None else None
+        last_day = _partition_name(end_ns) if end_ns is not None else None
+
+        snapshots = []
+        for partition in self.partitions(coin):
+            if (first_day and partition < first_day) or (last_day and partition > last_day):
+                continue
+            file = os.path.join(self._partition_path(coin, partition), ORDER_BOOK_FILE)
+            if not os.path.exists(file):
+                continue
+            with open(file) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # Torn last line after a crash
+                    timestamp = record['timestamp']
+                    if (start_ns is not None and timestamp < start_ns) or (end_ns is not None and timestamp > end_ns):
+                        continue
+                    snapshots.append((pd.Timestamp(timestamp).to_pydatetime(), record['order_book']))
+        return snapshots
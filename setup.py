@@ -1,9 +1,9 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 
 setup(
     name="crypto_monitor",
     version="0.1",
-    packages=find_packages(),
+    packages=find_namespace_packages(include=['crypto_monitor*']),
     install_requires=[
         'click',
         'requests',
@@ -11,5 +11,15 @@ setup(
         'numpy',
         'pytest',
         'python-dotenv',
+        'rich',
     ],
+    extras_require={
+        # Arrow record batches for `monitor --export-format arrow`
+        'arrow': ['pyarrow'],
+    },
+    entry_points={
+        'console_scripts': [
+            'crypto-monitor=crypto_monitor.cli.main:cli',
+        ],
+    },
 )
\ No newline at end of file
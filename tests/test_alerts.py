@@ -0,0 +1,150 @@
+import io
+import json
+import time
+import pytest
+from crypto_monitor.alerts.rules import AlertEngine, Rule, load_rules
+from crypto_monitor.alerts.sinks import FileSink, StdoutSink, WebhookSink
+from crypto_monitor.engine.replay import ReplayEngine
+from crypto_monitor.engine.pipeline import TickPipeline
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.synthetic import synthetic_ticks
+from crypto_monitor.market_data.transport import Transport
+
+def analysis(price=100.0, spread=0.1, condition='NORMAL', trend='bullish', imbalance=0.0, zscore=None):
+    return {
+        'latest': {'close': price},
+        'latest_ha': {'trend': trend},
+        'spread_analysis': {
+            'current_spread_percentage': spread, 'condition': condition, 'spread_zscore': zscore
+        },
+        'order_book_analysis': {'imbalance_ratio': imbalance, 'dominant_side': 'neutral'},
+        'volume_signals': 'No significant volume signals'
+    }
+
+def fired(engine, coin, ticks):
+    # Rule names fired per tick
+    return [[alert['rule'] for alert in engine.evaluate(coin, a, float(t))] for t, a in enumerate(ticks)]
+
+def test_threshold_rules_fire_on_transitions_only():
+    engine = AlertEngine([
+        Rule('above_105', 'price', '>', 105),
+        Rule('above_110', 'price', '>', 110),
+        Rule('below_95', 'price', '<', 95)
+    ])
+    prices = [100, 106, 107, 111, 104, 111, 90, 90, None, 90]
+    assert fired(engine, 'BTC', [analysis(price=p) for p in prices]) == [
+        [], ['above_105'], [], ['above_110'], [], ['above_105', 'above_110'], ['below_95'], [], [], ['below_95']
+    ]
+
+def test_equality_and_changed_rules():
+    engine = AlertEngine([
+        Rule('wide', 'spread_condition', '==', 'WIDE'),
+        Rule('not_tight', 'spread_condition', '!=', 'TIGHT'),
+        Rule('flip', 'trend', 'changed')
+    ])
+    ticks = [
+        analysis(condition='TIGHT'),
+        analysis(condition='WIDE', trend='bearish'),
+        analysis(condition='WIDE', trend='bearish'),
+        analysis(condition='NORMAL', trend='bullish'),
+        analysis(condition='TIGHT'),
+        analysis(condition='WIDE')
+    ]
+    assert fired(engine, 'ETH', ticks) == [
+        [], ['wide', 'not_tight', 'flip'], [], ['flip'], [], ['wide', 'not_tight']
+    ]
+
+def test_rule_state_is_per_coin_and_scoped():
+    engine = AlertEngine([
+        Rule('imbalanced', 'imbalance', '>=', 0.5),
+        Rule('btc_zscore', 'spread_zscore', '>', 2, coins=['btc'])
+    ])
+    assert [a['rule'] for a in engine.evaluate('BTC', analysis(imbalance=0.5, zscore=3.0))] == ['imbalanced', 'btc_zscore']
+    assert [a['rule'] for a in engine.evaluate('ETH', analysis(imbalance=0.6, zscore=3.0))] == ['imbalanced']
+    assert engine.evaluate('BTC', analysis(imbalance=0.7, zscore=3.5)) == []
+
+def test_debounce_and_cooldown():
+    engine = AlertEngine([
+        Rule('wide', 'spread_condition', '==', 'WIDE', debounce=3),
+        Rule('high', 'price', '>', 100, cooldown=10)
+    ])
+    conditions = ['WIDE', 'WIDE', 'NORMAL', 'WIDE', 'WIDE', 'WIDE', 'WIDE']
+    assert fired(engine, 'BTC', [analysis(condition=c) for c in conditions]) == [
+        [], [], [], [], [], ['wide'], []
+    ]
+
+    alerts = []
+    for t, price in enumerate([101, 99, 101, 99, 101]):
+        alerts += engine.evaluate('XRP', analysis(price=price), timestamp=t * 4.0)
+    # Crossings at t=0, 8 and 16; the one at 8 is within the cooldown
+    assert [a['timestamp'] for a in alerts] == [0.0, 16.0]
+
+def test_alert_contents_and_sinks(tmp_path):
+    stream = io.StringIO()
+    path = tmp_path / 'alerts.jsonl'
+    engine = AlertEngine(
+        [Rule('wide', 'spread_percentage', '>', 0.5, message="{coin} spread at {value}%")],
+        [StdoutSink(stream), FileSink(str(path))]
+    )
+    engine.evaluate('btc', analysis(spread=0.75), timestamp=1.0)
+    engine.close()
+
+    assert stream.getvalue() == "[ALERT] wide: BTC spread at 0.75%\n"
+    alert = json.loads(path.read_text())
+    assert alert['coin'] == 'BTC' and alert['value'] == 0.75 and alert['threshold'] == 0.5
+
+def test_webhook_sink_posts_in_background():
+    class Session:
+        posts = []
+
+        def post(self, url, data=None, headers=None, timeout=None):
+            self.posts.append((url, json.loads(data)))
+            return type('Response', (), {'raise_for_status': lambda self: None})()
+
+    sink = WebhookSink('http://hooks/alert', session=Session())
+    AlertEngine([Rule('high', 'price', '>', 1)], [sink]).evaluate('BTC', analysis())
+    sink.close()
+    assert Session.posts[0][0] == 'http://hooks/alert'
+    assert Session.posts[0][1]['rule'] == 'high'
+    assert sink.sent == 1
+
+def test_load_rules_and_validation(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([
+        {'name': 'wide', 'metric': 'spread_condition', 'op': '==', 'value': 'WIDE', 'debounce': 2},
+        {'name': '5m_flip', 'metric': 'trend@5m', 'op': 'changed'}
+    ]))
+    rules = load_rules(str(path))
+    assert [(rule.name, rule.debounce) for rule in rules] == [('wide', 2), ('5m_flip', 1)]
+
+    with pytest.raises(ValueError):
+        Rule('bad', 'price', '~', 1)
+    with pytest.raises(ValueError):
+        Rule('bad', 'no_such_metric', '>', 1)
+
+def test_many_rules_stay_cheap():
+    # 3000 threshold rules over 100 coins; a tick only touches rules whose
+    # state changed
+    rules = [Rule(f"price_{i}", 'price', '>', 100 + i * 0.01) for i in range(1000)]
+    rules += [Rule(f"spread_{i}", 'spread_percentage', '<', i * 0.001) for i in range(1000)]
+    rules += [Rule(f"imbalance_{i}", 'imbalance', '>', -1 + i * 0.002) for i in range(1000)]
+    engine = AlertEngine(rules)
+    coins = [f"C{i}" for i in range(100)]
+    for coin in coins:
+        engine.evaluate(coin, analysis(), 0.0)
+
+    start = time.perf_counter()
+    for t in range(1, 4):
+        for coin in coins:
+            engine.evaluate(coin, analysis(price=100 + t * 0.001, spread=0.1 + t * 0.0001), float(t))
+    per_tick = (time.perf_counter() - start) / (3 * len(coins))
+    assert per_tick < 1e-3
+
+def test_pipeline_and_replay_report_alerts():
+    engine = AlertEngine([Rule('flip', 'trend', 'changed'), Rule('wide', 'spread_condition', '==', 'WIDE')])
+    pipeline = TickPipeline(CoinspotClient(max_history=50, transport=Transport()), alerts=engine)
+    report = ReplayEngine(pipeline).run(synthetic_ticks(['BTC', 'ETH'], 200, seed=2))
+
+    assert report['alerts']['flip'] > 0
+    assert sum(report['alerts'].values()) == engine.fired
+    assert report['stages']['alerts']['calls'] == 400
@@ -1,7 +1,10 @@
 import pytest
 import pandas as pd
 import numpy as np
-from crypto_monitor.analysis.heikin_ashi import HeikinAshi
+from crypto_monitor.analysis.heikin_ashi import HeikinAshi, StreamingHeikinAshi
+from crypto_monitor.analysis.panel import cross_section, panel_from_frame, panel_from_prices, rank_coins
+from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer, VolumeProfile
+from crypto_monitor.analysis.spread_analyzer import RollingQuantile, RollingSpreadStats, SpreadAnalyzer
 
 def test_heikin_ashi_calculation():
     # Create sample price data
@@ -35,3 +38,256 @@ def test_heikin_ashi_trend():
     trends = ha.get_trend_signals(ha_candles)
 
     assert 'trend' in trends.columns
+
+def _reference_ha_open(data):
+    # Straightforward loop the vectorized recurrence must match
+    ha_close = ((data['open'] + data['high'] + data['low'] + data['close']) / 4).tolist()
+    ha_open = [float(data['open'].iloc[0])]
+    for i in range(1, len(data)):
+        ha_open.append((ha_open[i-1] + ha_close[i-1]) / 2)
+    return ha_open
+
+def test_heikin_ashi_vectorized_matches_loop():
+    data = pd.DataFrame({
+        'open':[10,12,14,11],
+        'high': [15, 14, 16, 13],
+        'low': [9, 11, 13, 10],
+        'close': [12, 14, 11, 12]
+    })
+
+    ha_candles = HeikinAshi().calculate(data)
+    assert ha_candles['ha_open'].tolist() == _reference_ha_open(data)
+
+    # Longer series crosses several recurrence blocks
+    rng = np.random.default_rng(42)
+    close = 100 + rng.standard_normal(500).cumsum()
+    long_data = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close})
+    np.testing.assert_allclose(
+        HeikinAshi().calculate(long_data)['ha_open'], _reference_ha_open(long_data), rtol=1e-12
+    )
+
+def test_streaming_heikin_ashi_matches_batch():
+    data = pd.DataFrame({
+        'open': [10, 12, 14, 11],
+        'high': [15, 14, 16, 13],
+        'low': [9, 11, 13, 10],
+        'close': [12, 14, 11, 12]
+    })
+
+    ha = HeikinAshi()
+    batch = ha.get_trend_signals(ha.calculate(data))
+
+    stream = StreamingHeikinAshi()
+    candles = stream.update_many('BTC', data)
+
+    for col in ['ha_open', 'ha_high', 'ha_low', 'ha_close', 'trend']:
+        assert [c[col] for c in candles] == batch[col].tolist()
+
+    # State is kept per coin
+    other = stream.update('ETH', 10, 15, 9, 12)
+    assert other['ha_open'] == 10
+
+def test_order_book_depth_analytics():
+    buy_orders = [
+        {'amount': '2', 'rate': '99'},
+        {'amount': '1', 'rate': '100'},
+        {'amount': '5', 'rate': '90'}
+    ]
+    sell_orders = [
+        {'amount': '1', 'rate': '102'},
+        {'amount': '3', 'rate': '101'}
+    ]
+
+    analyzer = VolumeAnalyzer(depth_bands=(0.5, 2.0))
+    depth = analyzer.analyze_depth(buy_orders, sell_orders, notional=303)
+
+    assert depth['best_bid'] == 100
+    assert depth['best_ask'] == 101
+    assert depth['mid'] == 100.5
+    # Top of book: 1 @ 100 vs 3 @ 101, so microprice leans to the bid
+    assert depth['microprice'] == (100 * 3 + 101 * 1) / 4
+    assert depth['cumulative_depth']['bid_notional'].tolist() == [100, 298, 748]
+
+    # 0.5% band: 100 bid vs 303 of asks; 2% band adds the 99 bid and 102 ask
+    assert depth['band_imbalance'][0.5] == (100 - 303) / (100 + 303)
+    assert depth['band_imbalance'][2.0] == (298 - 405) / (298 + 405)
+
+    # 303 of notional is exactly the 101 level
+    assert depth['vwap_buy'] == 101
+    # Selling 303 takes 100 at 100, 198 at 99 and the last 5 at 90
+    assert depth['vwap_sell'] == pytest.approx(303 / (1 + 2 + 5 / 90))
+
+    # Whole-book ratio agrees with analyze_order_book
+    summary = analyzer.analyze_order_book(buy_orders, sell_orders)
+    assert summary['imbalance_ratio'] == pytest.approx(depth['imbalance_ratio'])
+    assert analyzer.analyze_depth(buy_orders, sell_orders, notional=10_000)['vwap_buy'] is None
+
+def test_vbp_keeps_every_row():
+    # Bins of 2 over 10-20; the last row touches the top of the range
+    data = pd.DataFrame({
+        'low': [10, 12, 14.5, 19],
+        'high': [11, 13, 15.5, 20],
+        'volume': [1, 2, 3, 4]
+    })
+
+    analyzer = VolumeAnalyzer(price_levels=5)
+    vbp = analyzer.calculate_vbp(data)
+    assert vbp['volume_profile'] == [1, 2, 3, 0, 4]
+    assert vbp['price_bins'][-1] == '18.00-20.00'
+    assert vbp['poc'] == '18.00-20.00'
+
+    # Rows straddling bin edges: 10-12 sits in the first bin, 11-20 spreads
+    # 9 over 9 price units
+    straddling = pd.DataFrame({'low': [10, 11], 'high': [12, 20], 'volume': [2, 9]})
+    proportional = analyzer.calculate_vbp(straddling, allocation='proportional')
+    assert proportional['volume_profile'] == pytest.approx([3, 2, 2, 2, 2])
+
+    midpoint = analyzer.calculate_vbp(straddling)
+    assert midpoint['volume_profile'] == [2, 0, 9, 0, 0]
+
+def test_incremental_volume_profile_matches_batch():
+    data = pd.DataFrame({
+        'low': [10.0, 10.5, 11.2, 12.9],
+        'high': [10.8, 11.5, 11.9, 13.0],
+        'volume': [1.0, 2.0, 3.0, 4.0]
+    })
+
+    # Rows span 10-13, so calculate_vbp's three levels are the profile's
+    # unit bins (the heavier last row avoids a tie for the POC)
+    heavier = data.assign(volume=[1.0, 2.0, 3.0, 5.0])
+    profile = VolumeProfile(bin_size=1.0, allocation='proportional')
+    for row in heavier.itertuples():
+        profile.add(row.low, row.high, row.volume)
+    batch = VolumeAnalyzer(price_levels=3).calculate_vbp(heavier, allocation='proportional')
+    snapshot = profile.snapshot()
+    assert snapshot['price_bins'] == batch['price_bins']
+    assert snapshot['volume_profile'] == pytest.approx(batch['volume_profile'])
+    assert snapshot['poc'] == batch['poc']
+    assert snapshot['poc_volume'] == pytest.approx(batch['poc_volume'])
+
+    # Merged down to fewer levels
+    merged = profile.snapshot(levels=2)
+    assert merged['price_bins'] == ['10.00-12.00', '12.00-14.00']
+    assert sum(merged['volume_profile']) == pytest.approx(11.0)
+
+    profile = VolumeProfile(bin_size=1.0, allocation='proportional', window=3)
+    for row in data.itertuples():
+        profile.add(row.low, row.high, row.volume)
+
+    snapshot = profile.snapshot()
+    # The first row fell out of the window
+    assert len(profile) == 3
+    assert sum(snapshot['volume_profile']) == pytest.approx(9.0)
+    assert snapshot['price_bins'][0] == '10.00-11.00'
+    assert snapshot['poc'] == '11.00-12.00'
+    assert snapshot['volume_profile'] == pytest.approx([1.0, 1.0 + 3.0, 4.0])
+
+def test_spread_volatility_is_returned():
+    df = pd.DataFrame({'spread_absolute': [1.0, 2.0, 4.0], 'spread_percentage': [0.1, 0.2, 0.4]})
+    analysis = SpreadAnalyzer().analyze_spread(df, 'ETH')
+
+    assert analysis['volatility'] == pytest.approx(df['spread_percentage'].std())
+
+def test_streaming_spread_matches_dataframe_stats():
+    rng = np.random.default_rng(7)
+    spreads = rng.uniform(0.5, 5.0, 50)
+    percentages = rng.uniform(0.01, 1.5, 50)
+
+    analyzer = SpreadAnalyzer(max_points=20)
+    for i, (spread, percentage) in enumerate(zip(spreads, percentages)):
+        streamed = analyzer.update('BTC', spread, percentage, timestamp=float(i))
+
+        window = pd.DataFrame({
+            'spread_absolute': spreads[max(0, i - 19):i + 1],
+            'spread_percentage': percentages[max(0, i - 19):i + 1]
+        })
+        expected = analyzer.analyze_spread(window, 'BTC')
+
+        for key in ['avg_spread', 'avg_spread_percentage', 'max_spread', 'min_spread', 'condition']:
+            assert streamed[key] == pytest.approx(expected[key])
+        if i:
+            assert streamed['volatility'] == pytest.approx(expected['volatility'])
+        assert streamed['spread_quantiles'][0.5] == pytest.approx(window['spread_percentage'].median())
+
+def test_rolling_quantile_matches_sorted_window():
+    rng = np.random.default_rng(3)
+    # Few distinct values, so duplicates straddle the quantile positions
+    values = rng.integers(0, 6, 400).astype(float)
+    for q in (0.0, 0.3, 0.5, 0.95, 1.0):
+        quantile = RollingQuantile(q)
+        for i, value in enumerate(values):
+            quantile.add(value)
+            if i >= 25:
+                quantile.remove(values[i - 25])
+            window = pd.Series(values[max(0, i - 24):i + 1])
+            assert quantile.value() == pytest.approx(window.quantile(q))
+    with pytest.raises(ValueError):
+        RollingSpreadStats().quantile(0.25)
+
+def test_streaming_spread_time_window():
+    stats = RollingSpreadStats(window=10.0)
+    for t, percentage in [(0, 1.0), (5, 3.0), (12, 5.0)]:
+        stats.update(float(t), percentage, percentage)
+
+    # The point at t=0 is older than 10 seconds
+    assert len(stats) == 2
+    assert stats.mean_percentage == 4.0
+    assert stats.min_absolute == 3.0
+    assert stats.zscore() == pytest.approx(1 / np.sqrt(2))
+
+def test_panel_analysis_matches_per_coin():
+    rng = np.random.default_rng(11)
+    coins = ['BTC', 'ETH', 'XRP', 'DOGE']
+    last = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, (4, 150)), axis=1))
+    half_spread = last * rng.uniform(0.0001, 0.01, (4, 150))
+    bid, ask = last - half_spread, last + half_spread
+    # Ragged histories: ETH starts late, XRP misses a tick, DOGE has no prices
+    bid[1, :40] = np.nan
+    ask[2, 70] = np.nan
+    bid[3] = np.nan
+
+    panel = panel_from_prices(coins, bid, ask, last)
+    assert panel['coins'] == ['BTC', 'ETH', 'XRP']
+    assert list(panel['lengths']) == [150, 110, 149]
+
+    spread = SpreadAnalyzer()
+    ha = HeikinAshi()
+    snapshot = cross_section(panel, spread, ha, order_book_volumes={'BTC': (30.0, 10.0)})
+    ha_panel = ha.calculate_panel(panel)
+    for row, coin in enumerate(panel['coins']):
+        size = panel['lengths'][row]
+        df = pd.DataFrame({name: panel[name][row, -size:] for name in ['open', 'high', 'low', 'close', 'spread_absolute', 'spread_percentage']})
+        expected = spread.analyze_spread(df, coin)
+        trends = ha.get_trend_signals(ha.calculate(df))
+
+        assert snapshot.loc[coin, 'avg_spread_percentage'] == pytest.approx(expected['avg_spread_percentage'])
+        assert snapshot.loc[coin, 'volatility'] == pytest.approx(expected['volatility'])
+        assert snapshot.loc[coin, 'condition'] == expected['condition']
+        assert ha_panel['ha_open'][row, -size:] == pytest.approx(trends['ha_open'].to_numpy())
+        assert list(ha_panel['trend'][row, -size:]) == list(trends['trend'])
+        assert snapshot.loc[coin, 'trend'] == trends['trend'].iloc[-1]
+
+    assert snapshot.loc['BTC', 'imbalance_ratio'] == pytest.approx(0.5)
+    assert snapshot.loc['BTC', 'dominant_side'] == 'buy'
+    assert np.isnan(snapshot.loc['ETH', 'imbalance_ratio'])
+
+def test_panel_from_frame_and_ranking():
+    timestamps = pd.date_range('2024-01-01', periods=3, freq='s')
+    df = pd.DataFrame({
+        'bid': [99.0, 99.5, 99.0, 9.0, 9.5],
+        'ask': [101.0, 100.5, 100.0, 9.1, 9.55],
+        'last': [100.0, 100.0, 99.5, 9.05, 9.5]
+    }, index=pd.MultiIndex.from_tuples(
+        [('BTC', t) for t in timestamps] + [('ETH', t) for t in timestamps[1:]], names=['coin', 'timestamp']
+    ))
+
+    panel = panel_from_frame(df.iloc[::-1])
+    assert panel['coins'] == ['ETH', 'BTC']
+    assert panel['close'][1] == pytest.approx([100.0, 100.0, 99.5])
+    assert np.isnan(panel['close'][0, 0]) and panel['timestamp'][0, -1] == timestamps[-1]
+
+    snapshot = cross_section(panel)
+    assert list(rank_coins(snapshot).index) == ['BTC', 'ETH']
+    assert list(rank_coins(snapshot, 'spread_percentage', ascending=True, top=1).index) == ['ETH']
+    with pytest.raises(ValueError):
+        rank_coins(snapshot, 'nope')
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from crypto_monitor.market_data.async_client import AsyncCoinspotClient, ThreadedAsyncTransport
+from crypto_monitor.market_data.scheduler import TickScheduler
+from crypto_monitor.market_data.transport import FakeTransport
+
+def test_async_client_mirrors_sync_api():
+    transport = FakeTransport({
+        '/latest': {'status': 'ok', 'message': 'ok', 'prices': {
+            'btc': {'bid': '100', 'ask': '101', 'last': '100.5'},
+            'eth': {'bid': '10', 'ask': '11', 'last': '10.5'}
+        }},
+        '/orders/open/BTC': {'status': 'ok', 'buyorders': [], 'sellorders': []},
+        '/orders/open/ETH': (500, None)
+    })
+
+    async def run():
+        async with AsyncCoinspotClient(transport=ThreadedAsyncTransport(transport)) as client:
+            responses = client.split_latest_prices(await client.get_latest_prices())
+            for coin, response in responses.items():
+                client.add_price_to_history(coin, response)
+            books = await client.get_order_books(['BTC', 'ETH'], max_concurrency=2)
+            return client.get_price_history('BTC'), books
+
+    df, books = asyncio.run(run())
+    assert df['last'].tolist() == [100.5]
+    assert books['BTC']['status'] == 'ok'
+    assert books['ETH']['status'] == 'error'
+
+class FakeClock:
+    ## Time that only moves when slept through or advanced by hand
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def sleep_async(self, seconds: float):
+        self.sleep(seconds)
+        # Let ticks that are due run, and their done callbacks fire
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+def test_scheduler_keeps_cadence_and_skips_overruns():
+    clock = FakeClock()
+    started = []
+
+    async def tick(slot):
+        started.append(slot)
+        # Second tick overruns the next slot
+        clock.now += 0.07 if slot == 1 else 0.001
+
+    scheduler = TickScheduler(0.05, clock=clock, sleep=clock.sleep_async)
+    stats = asyncio.run(scheduler.run(tick, duration=5))
+
+    assert started == [0, 1, 3, 4]
+    assert stats['fired'] == 4 and stats['skipped'] == 1
+    assert stats['completed'] == stats['fired']
+    assert stats['max_lag'] == pytest.approx(0.07)
+
+def test_sync_scheduler_sleeps_only_the_rest_of_the_interval():
+    clock = FakeClock()
+    started = []
+
+    def tick(slot):
+        started.append((slot, clock.now))
+        # Each tick takes 0.3s; the third overruns by two and a half slots
+        clock.now += 2.5 if slot == 2 else 0.3
+
+    stats = TickScheduler(1.0, clock=clock, sleep_sync=clock.sleep).run_sync(tick, duration=6)
+
+    # Ticks start on their slots, not 1.3s apart. Slot 3 passed while the
+    # third tick ran and is dropped; slot 4 runs late, then 5 is on time.
+    assert [slot for slot, _ in started] == [0, 1, 2, 4, 5]
+    assert [at for _, at in started] == pytest.approx([0.0, 1.0, 2.0, 4.5, 5.0])
+    assert clock.sleeps == pytest.approx([0.7, 0.7, 0.2])
+    assert stats['skipped'] == 1 and stats['completed'] == 5
+
+def test_scheduler_reraises_tick_errors():
+    async def tick(slot):
+        raise RuntimeError("fetch failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(TickScheduler(0.01).run(tick, duration=3))
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+from click.testing import CliRunner
+from crypto_monitor.cli import main
+from crypto_monitor.market_data import lite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_cli_import_skips_heavy_dependencies():
+    code = (
+        "import sys, crypto_monitor.cli.main; "
+        "print([m for m in ('pandas', 'numpy', 'requests', 'rich') if m in sys.modules])"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+def _fake_fetch(responses):
+    def fetch_json(url, timeout=10.0):
+        for path, response in responses.items():
+            if url.endswith(path):
+                if isinstance(response, Exception):
+                    raise response
+                return response
+        raise lite.LiteAPIError(f"Failed to fetch {url}: HTTP Error 404")
+    return fetch_json
+
+def test_price_command(monkeypatch):
+    monkeypatch.setattr(lite, 'fetch_json', _fake_fetch({
+        '/latest/BTC': {'status': 'ok', 'message': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+    }))
+    runner = CliRunner()
+
+    result = runner.invoke(main.cli, ['price', 'btc', '--json'])
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {
+        'coin': 'BTC', 'bid': 100.0, 'ask': 101.0, 'last': 100.5, 'spread': 1.0, 'spread_percentage': 1.0
+    }
+
+    # One failed lookup makes the exit code non-zero for health checks
+    result = runner.invoke(main.cli, ['price', 'BTC', 'NOPE'])
+    assert result.exit_code == 1
+    assert 'Last: $100.50' in result.output
+
+def test_book_command(monkeypatch):
+    monkeypatch.setattr(lite, 'fetch_json', _fake_fetch({
+        '/orders/open/ETH': {
+            'status': 'ok',
+            'buyorders': [{'amount': '1', 'rate': '99'}, {'amount': '2', 'rate': '100'}],
+            'sellorders': [{'amount': '1', 'rate': '102'}, {'amount': '1', 'rate': '101'}]
+        }
+    }))
+
+    result = CliRunner().invoke(main.cli, ['book', 'eth', '--depth', '1', '--json'])
+    assert result.exit_code == 0
+    summary = json.loads(result.output)
+    assert summary['best_bid'] == 100 and summary['best_ask'] == 101
+    assert summary['bids'] == [[100, 2]]
+    assert summary['imbalance_ratio'] == (299 - 203) / 502
+
+def _analysis(close, trend='bullish'):
+    return {
+        'timestamp': '2024-01-01 00:00:00',
+        'latest': {'close': close, 'bid': close - 0.5, 'ask': close + 0.5,
+                   'spread_absolute': 1.0, 'spread_percentage': 100 / (close - 0.5)},
+        'latest_ha': {'trend': trend},
+        'spread_analysis': {'condition': 'TIGHT'},
+        'vbp_data': {'poc': '99.00-101.00'},
+        'order_book_analysis': {'imbalance_ratio': 0.25, 'dominant_side': 'buy'},
+        'volume_signals': 'Strong buying pressure'
+    }
+
+def test_cell_cache_reformats_only_changed_cells():
+    from crypto_monitor.cli.dashboard import SUMMARY_COLUMNS, CellCache, build_summary_table
+
+    cache = CellCache()
+    build_summary_table({'BTC': _analysis(100.0), 'ETH': _analysis(10.0)}, cache)
+    assert cache.formatted == 2 * len(SUMMARY_COLUMNS)
+
+    # Only BTC's last/bid/ask/spread % moved
+    table = build_summary_table({'BTC': _analysis(101.0), 'ETH': _analysis(10.0)}, cache)
+    assert cache.formatted == 2 * len(SUMMARY_COLUMNS) + 4
+    assert table.columns[1]._cells == ['$101.00', '$10.00']
+
+def test_dashboard_caps_frame_rate():
+    import io
+    from rich.console import Console
+    from crypto_monitor.cli.dashboard import Dashboard
+
+    output = io.StringIO()
+    dashboard = Dashboard(max_fps=5, console=Console(file=output, width=120))
+    with dashboard:
+        for i in range(200):
+            dashboard.update({'BTC': _analysis(100.0 + i)})
+
+    # 200 updates in well under a second collapse into a handful of frames,
+    # and the last one is always drawn
+    assert 1 <= dashboard.frames <= 5
+    assert '$299.00' in output.getvalue()
@@ -0,0 +1,184 @@
+import json
+import logging
+import pytest
+from datetime import datetime
+from crypto_monitor.engine.logs import JSONFormatter, start_queued_logging, stop_queued_logging
+from crypto_monitor.engine.pipeline import STAGES, TickPipeline
+from crypto_monitor.engine.replay import ReplayEngine, read_ticks
+from crypto_monitor.engine.sharded import ShardedPipeline, shard_coins
+from crypto_monitor.market_data.candles import CandleAggregator
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.synthetic import synthetic_ticks
+from crypto_monitor.market_data.transport import FakeTransport
+from crypto_monitor.metrics.registry import Metrics
+from crypto_monitor.storage.tick_store import TickStore
+
+def test_replay_synthetic_ticks():
+    ticks = synthetic_ticks(['BTC', 'ETH'], 50, book_depth=5, seed=1)
+    report = ReplayEngine(max_history=20).run(ticks)
+
+    assert report['ticks'] == 100
+    assert report['ticks_per_sec'] > 0
+    assert set(report['stages']) == set(STAGES)
+    assert all(report['stages'][stage]['calls'] == 100 for stage in STAGES)
+    assert sum(report['trends']['BTC'].values()) == 50
+    assert report['events'][0]['coin'] == 'BTC'
+    assert report['transitions'] >= 2
+
+def test_replay_is_deterministic():
+    first = ReplayEngine().run(synthetic_ticks(['XRP'], 30, seed=3))
+    second = ReplayEngine().run(synthetic_ticks(['XRP'], 30, seed=3))
+    assert first['trends'] == second['trends']
+    assert first['conditions'] == second['conditions']
+
+def test_read_ticks_from_files(tmp_path):
+    jsonl = tmp_path / 'ticks.jsonl'
+    jsonl.write_text(
+        json.dumps({'coin': 'btc', 'timestamp': '2024-01-01T00:00:00', 'bid': 100, 'ask': 101, 'last': 100.5}) + '\n' +
+        json.dumps({'coin': 'btc', 'timestamp': '2024-01-01T00:00:01',
+                    'prices': {'bid': '101', 'ask': '102', 'last': '101.5'},
+                    'order_book': {'buyorders': [], 'sellorders': []}}) + '\n'
+    )
+    ticks = list(read_ticks(str(jsonl)))
+    assert [t[0] for t in ticks] == ['BTC', 'BTC']
+    assert ticks[1][2]['prices']['last'] == '101.5'
+    assert ticks[1][3] == {'buyorders': [], 'sellorders': []}
+
+    csv_file = tmp_path / 'ticks.csv'
+    csv_file.write_text("coin,timestamp,bid,ask,last\neth,2024-01-01 00:00:00,10,11,10.5\n")
+    assert list(read_ticks(str(csv_file)))[0][1] == datetime(2024, 1, 1)
+
+    report = ReplayEngine().run(read_ticks(str(jsonl)))
+    assert report['ticks'] == 2
+
+def test_read_ticks_from_store_in_time_order(tmp_path):
+    store = TickStore(str(tmp_path), order_books=True)
+    for coin, second in [('BTC', 0), ('ETH', 1), ('BTC', 2)]:
+        store.append(coin, {'timestamp': datetime(2024, 1, 1, 0, 0, second), 'bid': 1.0, 'ask': 2.0,
+                            'last': 1.5, 'spread_absolute': 1.0, 'spread_percentage': 100.0})
+    store.append_order_book('BTC', datetime(2024, 1, 1, 0, 0, 1), {'buyorders': [], 'sellorders': []})
+
+    ticks = list(read_ticks(str(tmp_path)))
+    assert [(t[0], t[1].second) for t in ticks] == [('BTC', 0), ('ETH', 1), ('BTC', 2)]
+    # Newest book at or before each tick
+    assert ticks[0][3] is None
+    assert ticks[2][3] == {'buyorders': [], 'sellorders': []}
+
+def test_queued_logging_writes_json_events(tmp_path):
+    path = tmp_path / 'monitor.log'
+    handler = logging.FileHandler(path)
+    handler.setFormatter(JSONFormatter())
+    listener = start_queued_logging(handler, logging.DEBUG)
+    try:
+        client = CoinspotClient(transport=FakeTransport())
+        client.add_price_to_history('BTC', {'status': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}})
+    finally:
+        stop_queued_logging(listener)
+        logging.getLogger('crypto_monitor').setLevel(logging.NOTSET)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records[0]['event'] == 'spread_calculation'
+    assert records[0]['coin'] == 'BTC'
+    assert records[0]['spread_absolute'] == 1.0
+
+def test_pipeline_analyzes_closed_bars_per_timeframe():
+    candles = CandleAggregator(('1m', '5m'))
+    pipeline = TickPipeline(CoinspotClient(max_history=50, transport=FakeTransport()), candles=candles)
+
+    analyses = [
+        pipeline.process(coin, response, book, timestamp=timestamp)
+        for coin, timestamp, response, book in synthetic_ticks(['BTC'], 11 * 60, interval=1.0)
+    ]
+
+    # Bars close on the first tick of the next bucket
+    assert analyses[59]['timeframes'] == {}
+    assert set(analyses[60]['timeframes']) == {'1m'}
+    last = analyses[-1]['timeframes']
+    assert set(last) == {'1m', '5m'}
+    assert last['5m']['bar']['volume'] == 300
+    assert last['1m']['latest_ha']['trend'] in ('bullish', 'bearish', 'neutral')
+    assert last['5m']['vbp_data']['poc']
+    assert len(candles.series('BTC', '1m')) == 10
+    assert pipeline.timer.counts['candles'] == 11 * 60
+
+def test_pipeline_reuses_analysis_of_unchanged_order_books():
+    client = CoinspotClient(transport=FakeTransport())
+    pipeline = TickPipeline(client)
+    order_book = {
+        'buyorders': [{'rate': '100', 'amount': '2'}],
+        'sellorders': [{'rate': '101', 'amount': '1'}]
+    }
+    response = {'status': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+
+    first = pipeline.process('BTC', response, order_book)
+    second = pipeline.process('BTC', response, dict(order_book))
+    assert second['order_book_analysis'] is first['order_book_analysis']
+    assert first['order_book_analysis']['dominant_side'] == 'buy'
+
+    order_book['sellorders'] = [{'rate': '101', 'amount': '4'}]
+    third = pipeline.process('BTC', response, order_book)
+    assert third['order_book_analysis']['dominant_side'] == 'sell'
+    assert third['order_book_analysis'] == pipeline.volume_analyzer.analyze_order_book(
+        order_book['buyorders'], order_book['sellorders']
+    )
+
+def test_pipeline_marks_failed_order_book_fetches_stale():
+    metrics = Metrics()
+    pipeline = TickPipeline(CoinspotClient(transport=FakeTransport()), metrics=metrics)
+    response = {'status': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+    failed = {'status': 'error', 'message': 'down'}
+
+    # No good book yet: an empty one, marked stale
+    first = pipeline.process('BTC', response, failed)['order_book_analysis']
+    assert first['stale'] and first['dominant_side'] == 'neutral'
+
+    book = {'buyorders': [{'rate': '100', 'amount': '2'}], 'sellorders': [{'rate': '101', 'amount': '1'}]}
+    good = pipeline.process('BTC', response, book)['order_book_analysis']
+    assert 'stale' not in good
+    stale = pipeline.process('BTC', response, failed)['order_book_analysis']
+    assert stale == dict(good, stale=True)
+    assert metrics.snapshot()['counters']['crypto_monitor_order_books_failed_total'] == [({}, 2.0)]
+
+def test_pipeline_analyze_does_not_advance_streaming_state():
+    pipeline = TickPipeline(CoinspotClient(transport=FakeTransport()))
+    for bid in (100, 101):
+        response = {'status': 'ok', 'prices': {'bid': str(bid), 'ask': str(bid + 1), 'last': str(bid + 0.5)}}
+        processed = pipeline.process('BTC', response)
+
+    state = pipeline.ha_analyzer._state['BTC']
+    for _ in range(2):
+        analysis = pipeline.analyze('BTC')
+        assert analysis['latest_ha'] == processed['latest_ha']
+        assert analysis['spread_analysis'] == processed['spread_analysis']
+    # Re-analyzing the same point neither moves HA nor re-adds the spread
+    assert pipeline.ha_analyzer._state['BTC'] == state
+    assert len(pipeline.spread_analyzer.get_stats('BTC')) == 2
+
+def test_shard_coins_balances_the_universe():
+    shards = shard_coins(['xrp', 'BTC', 'ETH', 'LTC', 'DOGE'], 2)
+    assert shards == [['BTC', 'ETH', 'XRP'], ['DOGE', 'LTC']]
+    assert shard_coins(['BTC'], 4) == [['BTC']]
+
+def test_sharded_pipeline_matches_single_process(tmp_path):
+    coins = ['BTC', 'ETH', 'XRP']
+    ticks = {}
+    for coin, timestamp, response, order_book in synthetic_ticks(coins, 20, book_depth=3, seed=4):
+        responses, order_books = ticks.setdefault(timestamp, ({}, {}))
+        responses[coin] = response
+        order_books[coin] = order_book
+
+    pipeline = TickPipeline(CoinspotClient(max_history=50, transport=FakeTransport()))
+    with ShardedPipeline(coins, shards=2, max_history=50, store_path=str(tmp_path)) as sharded:
+        for timestamp, (responses, order_books) in ticks.items():
+            results, errors = sharded.process(responses, order_books, timestamp=timestamp)
+            assert errors == {}
+            for coin in coins:
+                expected = pipeline.process(coin, responses[coin], order_books[coin], timestamp=timestamp)
+                result = results[coin]
+                assert result['latest_ha'] == expected['latest_ha']
+                assert result['spread_analysis']['condition'] == expected['spread_analysis']['condition']
+                assert result['order_book_analysis'] == pytest.approx(expected['order_book_analysis'])
+                assert result['vbp_data']['poc'] == expected['vbp_data']['poc']
+
+    # Every shard persisted its own coins
+    assert TickStore(str(tmp_path)).coins() == coins
\ No newline at end of file
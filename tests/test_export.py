@@ -0,0 +1,166 @@
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import pytest
+from crypto_monitor.engine.pipeline import TickPipeline
+from crypto_monitor.export.destinations import (
+    Destination, FileDestination, TCPDestination, UnixSocketDestination, WebSocketDestination, open_destination
+)
+from crypto_monitor.export.stream import StreamExporter, tick_records
+from crypto_monitor.market_data.candles import CandleAggregator
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.synthetic import synthetic_ticks
+from crypto_monitor.market_data.transport import Transport
+
+def _run(exporter, ticks=60, coins=('BTC', 'ETH')):
+    pipeline = TickPipeline(
+        CoinspotClient(transport=Transport()), candles=CandleAggregator(['1m']), exporter=exporter
+    )
+    for coin, timestamp, response, order_book in synthetic_ticks(list(coins), ticks, seed=2, book_depth=5):
+        pipeline.process(coin, response, order_book, timestamp=timestamp)
+    return pipeline
+
+class _Recorder(Destination):
+    def __init__(self, block: threading.Event = None):
+        self.batches = []
+        self.block = block
+
+    def send(self, data, header=b'', binary=False):
+        if self.block is not None:
+            self.block.wait()
+        self.batches.append(data)
+
+def test_exporter_publishes_ticks_candles_and_analysis(tmp_path):
+    path = tmp_path / 'export.ndjson'
+    exporter = StreamExporter(FileDestination(str(path)), batch_size=50)
+    _run(exporter, ticks=150)
+    exporter.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    kinds = [record['type'] for record in records]
+    assert kinds.count('tick') == kinds.count('analysis') == 300
+    assert exporter.sent == len(records) and exporter.batches >= len(records) // 50
+    assert exporter.dropped == 0
+
+    # Each closed 1m bar is published once, when it closes
+    candles = [record for record in records if record['type'] == 'candle']
+    assert len(candles) == 2 * 2
+    assert len({(record['coin'], record['timestamp']) for record in candles}) == len(candles)
+    analysis = next(record for record in records if record['type'] == 'analysis')
+    assert analysis['condition'] in ('TIGHT', 'NORMAL', 'WIDE')
+    assert analysis['dominant_side'] in ('buy', 'sell', 'neutral')
+    assert analysis['timestamp'].startswith('2024-01-01T')
+
+def test_slow_destination_never_blocks_publishing():
+    block = threading.Event()
+    destination = _Recorder(block)
+    exporter = StreamExporter(destination, kinds=['tick'], batch_size=10, max_queue=20)
+
+    start = time.perf_counter()
+    _run(exporter, ticks=100)
+    assert time.perf_counter() - start < 5
+    assert exporter.dropped > 0
+    assert exporter.published + exporter.dropped == 200
+
+    block.set()
+    exporter.close()
+    assert exporter.sent == exporter.published
+    assert sum(batch.count(b'\n') for batch in destination.batches) == exporter.published
+
+def test_tick_records_kinds():
+    exporter = StreamExporter(_Recorder(), kinds=['analysis'])
+    pipeline = _run(None, ticks=2, coins=['BTC'])
+    analysis = pipeline.analyze('BTC')
+    assert [record['type'] for record in tick_records('BTC', analysis, ['tick', 'analysis'])] == ['tick', 'analysis']
+    assert exporter.publish('BTC', analysis) == 1
+    exporter.close()
+    with pytest.raises(ValueError):
+        StreamExporter(_Recorder(), kinds=['trades'])
+
+def _read_lines(sock, count):
+    data = b''
+    while data.count(b'\n') < count:
+        chunk = sock.recv(65536)
+        assert chunk, "connection closed"
+        data += chunk
+    return data.splitlines()[:count]
+
+def _connected(destination):
+    deadline = time.monotonic() + 5
+    while not destination.clients and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert destination.clients
+
+def test_socket_destinations_stream_to_consumers(tmp_path):
+    tcp = TCPDestination()
+    unix_path = str(tmp_path / 'export.sock')
+    unix = UnixSocketDestination(unix_path)
+    consumers = [socket.create_connection(tcp.address, timeout=5), socket.socket(socket.AF_UNIX)]
+    consumers[1].settimeout(5)
+    consumers[1].connect(unix_path)
+    try:
+        for destination in (tcp, unix):
+            _connected(destination)
+            destination.send(b'{"a": 1}\n{"a": 2}\n')
+        for consumer in consumers:
+            assert [json.loads(line)['a'] for line in _read_lines(consumer, 2)] == [1, 2]
+    finally:
+        for consumer in consumers:
+            consumer.close()
+        tcp.close()
+        unix.close()
+    assert not os.path.exists(unix_path)
+
+def test_websocket_destination_handshake_and_frames():
+    destination = WebSocketDestination()
+    consumer = socket.create_connection(destination.address, timeout=5)
+    try:
+        key = base64.b64encode(os.urandom(16)).decode()
+        consumer.sendall((
+            f"GET / HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        response = b''
+        while b'\r\n\r\n' not in response:
+            response += consumer.recv(4096)
+        assert response.startswith(b'HTTP/1.1 101')
+
+        _connected(destination)
+        payload = b'{"type": "tick"}\n' * 20
+        destination.send(payload)
+        head = consumer.recv(2)
+        assert head[0] == 0x81 # FIN, text
+        length = head[1]
+        if length == 126:
+            length = struct.unpack('!H', consumer.recv(2))[0]
+        data = b''
+        while len(data) < length:
+            data += consumer.recv(length - len(data))
+        assert data == payload
+    finally:
+        consumer.close()
+        destination.close()
+
+def test_open_destination(tmp_path):
+    destination = open_destination(f"file:{tmp_path / 'out.ndjson'}")
+    assert isinstance(destination, FileDestination)
+    destination.close()
+    with pytest.raises(ValueError):
+        open_destination('tcp://nowhere')
+
+def test_arrow_export_round_trips(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    from crypto_monitor.export.stream import ArrowEncoder
+
+    path = tmp_path / 'export.arrow'
+    exporter = StreamExporter(FileDestination(str(path)), ArrowEncoder(), batch_size=40)
+    _run(exporter, ticks=30)
+    exporter.close()
+
+    table = pa.ipc.open_stream(path.read_bytes()).read_all()
+    assert table.num_rows == exporter.sent
+    assert set(table.column('type').to_pylist()) == {'tick', 'analysis'}
@@ -1,26 +1,273 @@
+import logging
+import numpy as np
+import pandas as pd
 import pytest
-from crypto_monitor.market_data.coinspot import CoinspotClient
+import requests
+from datetime import datetime
+from crypto_monitor.market_data.candles import CandleAggregator, CandleSeries, parse_timeframe
+from crypto_monitor.analysis.volume_analyzer import VolumeAnalyzer
+from crypto_monitor.market_data.coinspot import CoinspotClient, SPREAD_EVENT
+from crypto_monitor.market_data.order_books import OrderBookTracker
+from crypto_monitor.market_data.simulator import CoinspotSimulator
 
 def test_coinspot_client_initialization():
     client = CoinspotClient()
     assert client is not None
 
 def test_fetch_btc_latest():
-    client = CoinspotClient()
-    latest = client.get_latest_price('BTC')
+    with CoinspotSimulator(coins=['BTC'], seed=1) as simulator:
+        client = CoinspotClient(base_url=simulator.base_url)
+        latest = client.get_latest_price('BTC')
 
     # Test response structure matches API documentation
-    assert isinstance(response, dict)
-    assert 'status' in response
-    assert 'message' in response
-    assert 'prices' in response
+    assert isinstance(latest, dict)
+    assert 'status' in latest
+    assert 'message' in latest
+    assert 'prices' in latest
 
     # Test prices object structure
-    assert 'bid' in response['prices']
-    assert 'ask' in response['prices']
-    assert 'last' in response['prices']
+    assert 'bid' in latest['prices']
+    assert 'ask' in latest['prices']
+    assert 'last' in latest['prices']
 
 def test_invalid_coin_handling():
     client = CoinspotClient()
     with pytest.raises(ValueError):
-        client.get_latest_price('') # Empty string should raise error
\ No newline at end of file
+        client.get_latest_price('') # Empty string should raise error
+
+def _price_response(bid, ask, last):
+    return {'status': 'ok', 'message': 'ok', 'prices': {'bid': str(bid), 'ask': str(ask), 'last': str(last)}}
+
+def test_price_history_ring_buffer():
+    client = CoinspotClient(max_history=3)
+    for i in range(5):
+        client.add_price_to_history('BTC', _price_response(100 + i, 101 + i, 100.5 + i))
+
+    df = client.get_price_history('BTC')
+    assert len(df) == 3
+    assert df.index.name == 'timestamp'
+    assert df['bid'].tolist() == [102, 103, 104]
+    assert df['spread_absolute'].tolist() == [1, 1, 1]
+
+    # Frame is reused until new data arrives
+    assert client.get_price_history('BTC') is df
+    client.add_price_to_history('BTC', _price_response(200, 202, 201))
+    assert client.get_price_history('BTC')['bid'].tolist() == [103, 104, 200]
+
+    arrays = client.get_price_arrays('BTC')
+    assert arrays['last'].tolist() == [103.5, 104.5, 201]
+    assert client.get_price_history('ETH').empty
+
+def test_split_latest_prices():
+    client = CoinspotClient()
+    response = {
+        'status': 'ok',
+        'message': 'ok',
+        'prices': {
+            'btc': {'bid': '100', 'ask': '101', 'last': '100.5'},
+            'eth': {'bid': '10', 'ask': '11', 'last': '10.5'},
+            'xrp/usdt': {'bid': '1', 'ask': '1.1', 'last': '1.05'}
+        }
+    }
+
+    split = client.split_latest_prices(response)
+    assert sorted(split) == ['BTC', 'ETH']
+    client.add_price_to_history('ETH', split['ETH'])
+    assert client.get_price_history('ETH')['last'].tolist() == [10.5]
+
+    split = client.split_latest_prices(response, ['btc', 'DOGE'])
+    assert split['BTC']['prices']['bid'] == '100'
+    assert split['DOGE']['status'] == 'error'
+
+def test_get_order_books_concurrently(monkeypatch):
+    client = CoinspotClient()
+
+    def fake_order_book(coin):
+        if coin == 'BAD':
+            raise requests.RequestException("boom")
+        return {'status': 'ok', 'buyorders': [{'amount': '1', 'rate': coin}], 'sellorders': []}
+
+    monkeypatch.setattr(client, 'get_order_book', fake_order_book)
+    books = client.get_order_books(['BTC', 'ETH', 'BAD'], max_workers=2)
+
+    assert books['BTC']['buyorders'][0]['rate'] == 'BTC'
+    assert books['ETH']['status'] == 'ok'
+    assert books['BAD']['status'] == 'error'
+
+    # One pool serves every call until the client is closed
+    pool = client._pool
+    assert client.get_order_books(['BTC'], max_workers=2)['BTC']['status'] == 'ok'
+    assert client._pool is pool
+    client.close()
+    assert client._pool is None and pool._shutdown
+
+def test_add_price_to_history_logs_instead_of_printing(capsys, caplog):
+    client = CoinspotClient()
+    with caplog.at_level(logging.DEBUG, logger='crypto_monitor.market_data.coinspot'):
+        client.add_price_to_history('BTC', _price_response(100, 101, 100.5))
+
+    assert capsys.readouterr().out == ''
+    events = [record for record in caplog.records if getattr(record, 'event', None) == SPREAD_EVENT]
+    assert len(events) == 1
+    assert events[0].coin == 'BTC'
+    assert events[0].spread_percentage == pytest.approx(1.0)
+
+def test_add_prices_to_history_matches_single_ticks():
+    responses = [_price_response(100 + i, 101 + i * 1.5, 100.5 + i) for i in range(5)]
+    timestamps = [datetime(2024, 1, 1, 0, 0, i) for i in range(5)]
+
+    single = CoinspotClient(max_history=3)
+    for response, timestamp in zip(responses, timestamps):
+        single.add_price_to_history('BTC', response, timestamp=timestamp)
+
+    bulk = CoinspotClient(max_history=3)
+    assert bulk.add_prices_to_history('BTC', responses, timestamps) == 5
+    pd.testing.assert_frame_equal(bulk.get_price_history('BTC'), single.get_price_history('BTC'))
+
+    # The whole batch is rejected if one response is bad
+    with pytest.raises(ValueError):
+        bulk.add_prices_to_history('ETH', [responses[0], {'status': 'error', 'message': 'down'}])
+    with pytest.raises(ValueError):
+        bulk.add_prices_to_history('ETH', responses, timestamps[:2])
+    with pytest.raises(ValueError):
+        bulk.add_price_to_history('ETH', {'status': 'error', 'message': 'down'})
+    assert bulk.get_price_history('ETH').empty
+    # No history was created, so nothing was warm-loaded either
+    assert bulk.get_price_arrays('ETH') == {}
+
+@pytest.mark.parametrize('precision', ['float64', 'float32', 'int64'])
+def test_compact_history_matches_full_history(precision):
+    responses = [_price_response(100 + i * 0.25, 100.5 + i * 0.3, 100.2 + i * 0.25) for i in range(8)]
+    timestamps = [datetime(2024, 1, 1, 0, 0, i) for i in range(8)]
+
+    full = CoinspotClient(max_history=5)
+    compact = CoinspotClient(max_history=5, history_precision=precision)
+    for client in (full, compact):
+        client.add_prices_to_history('BTC', responses[:3], timestamps[:3])
+        for response, timestamp in zip(responses[3:], timestamps[3:]):
+            client.add_price_to_history('BTC', response, timestamp=timestamp)
+
+    expected = full.get_price_history('BTC')
+    history = compact.get_price_history('BTC')
+    # float32 keeps about 7 significant digits, so small spreads lose a few
+    pd.testing.assert_frame_equal(history, expected, check_exact=False, rtol=1e-4 if precision == 'float32' else 1e-9)
+    assert compact.get_price_history('BTC') is history
+    assert compact.get_price_arrays('BTC')['last'] == pytest.approx(expected['last'])
+    # The newest point alone, without deriving the columns
+    latest = compact.get_latest_point('BTC')
+    assert list(latest) == list(full.get_latest_point('BTC'))
+    assert latest['timestamp'] == expected.index[-1]
+    for name in expected:
+        assert latest[name] == pytest.approx(expected[name].iloc[-1], rel=1e-4 if precision == 'float32' else 1e-9)
+
+    # Columns are derived one at a time, only when read
+    compact.add_price_to_history('BTC', responses[0], timestamp=datetime(2024, 1, 1, 0, 1))
+    assert compact.get_latest_point('BTC')['spread_percentage'] == pytest.approx(0.5)
+    assert compact.get_price_arrays('BTC')['spread_percentage'][-1] == pytest.approx(0.5)
+    assert set(compact._price_history['BTC']._derived) == {'bid', 'ask', 'spread_absolute', 'spread_percentage'}
+    assert compact._price_history['BTC'].nbytes < full._price_history['BTC'].nbytes / 2
+
+    with pytest.raises(ValueError):
+        CoinspotClient(history_precision='float16')
+
+def _candle_ticks(n, step_seconds=20, seed=3):
+    rng = np.random.default_rng(seed)
+    last = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    timestamps = np.datetime64('2024-01-01T00:00:00', 'ns') + np.arange(n) * np.timedelta64(step_seconds, 's')
+    return {'timestamp': timestamps, 'bid': last - 0.5, 'ask': last + 0.5, 'last': last}
+
+def test_candle_series_builds_ohlc_bars():
+    series = CandleSeries('1m', capacity=10)
+    minute = 60_000_000_000
+    closed = [
+        series.update(0, 99, 101, 100),
+        series.update(10_000_000_000, 101, 103, 102),
+        series.update(20_000_000_000, 97, 99, 98),
+        series.update(50_000_000_000, 100, 102, 101),
+        series.update(minute + 5, 104, 106, 105)
+    ]
+
+    assert closed[:4] == [None] * 4
+    bar = closed[4]
+    assert (bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']) == (100, 102, 98, 101, 4)
+    assert bar['spread_absolute'] == 2
+
+    # Late ticks for a closed bucket are dropped
+    assert series.update(30_000_000_000, 1, 2, 1.5) is None
+    assert series.late == 1
+
+    frame = series.to_frame(include_partial=True)
+    assert frame['open'].tolist() == [100, 105]
+    assert frame.index[1].value == minute
+
+def test_candle_extend_matches_streaming_updates():
+    ticks = _candle_ticks(500)
+    streamed = CandleAggregator(('1m', '5m', '1h'), capacity=100)
+    for timestamp, bid, ask, last in zip(ticks['timestamp'], ticks['bid'], ticks['ask'], ticks['last']):
+        streamed.update('BTC', timestamp.astype('int64'), bid, ask, last)
+
+    # Bulk load in two chunks so the forming bar is continued across them
+    bulk = CandleAggregator(('1m', '5m', '1h'), capacity=100)
+    bulk.extend('BTC', {name: values[:137] for name, values in ticks.items()})
+    bulk.extend('BTC', {name: values[137:] for name, values in ticks.items()})
+
+    for timeframe in ('1m', '5m', '1h'):
+        pd.testing.assert_frame_equal(
+            bulk.frame('BTC', timeframe, include_partial=True),
+            streamed.frame('BTC', timeframe, include_partial=True)
+        )
+    # 500 ticks 20s apart: 166 full minutes plus the forming one, 33 5m bars
+    assert len(streamed.series('BTC', '1m')) == 100 # Bounded by capacity
+    assert len(streamed.series('BTC', '5m')) == 33
+    assert streamed.frame('BTC', '5m')['volume'].iloc[0] == 15
+
+def test_parse_timeframe():
+    assert parse_timeframe('5m') == 300 * 1_000_000_000
+    assert parse_timeframe('1H') == 3600 * 1_000_000_000
+    with pytest.raises(ValueError):
+        parse_timeframe('5x')
+
+def book(bids, asks):
+    return {
+        'status': 'ok',
+        'buyorders': [{'rate': rate, 'amount': amount} for rate, amount in bids],
+        'sellorders': [{'rate': rate, 'amount': amount} for rate, amount in asks]
+    }
+
+def test_order_book_tracker_diffs_levels():
+    tracker = OrderBookTracker()
+    first = tracker.update('btc', book([('100', '1'), ('99', '2')], [('101', '1.5')]))
+    assert not first['unchanged']
+    assert first['bids']['added'] == {100.0: 1.0, 99.0: 2.0}
+
+    second = tracker.update('BTC', book([('100', '3'), ('98', '1'), ('98', '0.5')], [('101', '1.5')]))
+    assert second['bids'] == {'added': {98.0: 1.5}, 'removed': [99.0], 'changed': {100.0: 3.0}}
+    assert second['asks'] == {'added': {}, 'removed': [], 'changed': {}}
+    assert second['buy_volume'] == pytest.approx(300 + 98 * 1.5)
+    assert second['sell_volume'] == pytest.approx(151.5)
+    assert (second['bid_levels'], second['ask_levels']) == (2, 1)
+
+    # Same payload again: no diff at all
+    third = tracker.update('BTC', book([('100', '3'), ('98', '1'), ('98', '0.5')], [('101', '1.5')]))
+    assert third['unchanged'] and 'bids' not in third
+    assert third['buy_volume'] == second['buy_volume']
+
+    # A failed fetch keeps the last snapshot, flagged as stale
+    failed = tracker.update('BTC', {'status': 'error', 'message': 'down'})
+    assert failed['stale'] and not third['stale']
+    assert tracker.volumes('BTC') == (second['buy_volume'], second['sell_volume'])
+
+def test_order_book_tracker_totals_match_full_analysis():
+    rng = np.random.default_rng(3)
+    tracker = OrderBookTracker(resync_every=7)
+    analyzer = VolumeAnalyzer()
+    rates = [f"{rate:.2f}" for rate in np.arange(90, 110, 0.5)]
+    for _ in range(40):
+        bids = [(rate, f"{rng.uniform(0, 2):.4f}") for rate in rates[:20] if rng.random() < 0.8]
+        asks = [(rate, f"{rng.uniform(0, 2):.4f}") for rate in rates[20:] if rng.random() < 0.8]
+        payload = book(bids, asks)
+        diff = tracker.update('ETH', payload)
+        expected = analyzer.analyze_order_book(payload['buyorders'], payload['sellorders'])
+        assert diff['buy_volume'] == pytest.approx(expected['buy_volume'])
+        assert diff['sell_volume'] == pytest.approx(expected['sell_volume'])
+        assert analyzer.analyze_order_book_volumes(diff['buy_volume'], diff['sell_volume']) == pytest.approx(expected)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import io
+import json
+import urllib.request
+import pytest
+import requests
+from crypto_monitor.engine.pipeline import TickPipeline
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.transport import FakeTransport, HTTPTransport, endpoint_label
+from crypto_monitor.metrics.registry import Metrics, NULL_METRICS, render_prometheus
+from crypto_monitor.metrics.sinks import JSONLogSink, PrometheusFileSink, PrometheusHTTPSink
+from test_transport import StubResponse, StubSession
+
+def series(snapshot, kind, name):
+    return {tuple(sorted(labels.items())): value for labels, value in snapshot[kind].get(name, [])}
+
+def test_registry_counters_gauges_histograms():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc('errors_total', reason='Timeout')
+    metrics.inc('errors_total', 2, reason='Timeout')
+    metrics.set_gauge('drift_seconds', 0.5)
+    for value in (0.05, 0.5, 5.0):
+        metrics.observe('latency_seconds', value, endpoint='/latest')
+
+    snapshot = metrics.snapshot()
+    assert series(snapshot, 'counters', 'errors_total') == {(('reason', 'Timeout'),): 3}
+    assert series(snapshot, 'gauges', 'drift_seconds') == {(): 0.5}
+    histogram = series(snapshot, 'histograms', 'latency_seconds')[(('endpoint', '/latest'),)]
+    assert histogram['counts'] == [1, 1, 1]
+    assert histogram['sum'] == pytest.approx(5.55)
+
+    text = render_prometheus(snapshot)
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{endpoint="/latest",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="/latest",le="+Inf"} 3' in text
+    assert 'errors_total{reason="Timeout"} 3.0' in text
+
+def test_null_metrics_records_nothing():
+    NULL_METRICS.inc('x')
+    NULL_METRICS.observe('y', 1.0)
+    with NULL_METRICS.timer('z'):
+        pass
+    assert NULL_METRICS.snapshot()['histograms'] == {}
+
+    pipeline = TickPipeline(CoinspotClient(transport=FakeTransport()))
+    assert pipeline.timer._observe is None
+
+def test_endpoint_label():
+    assert endpoint_label('https://x/pubapi/v2/latest') == '/latest'
+    assert endpoint_label('https://x/pubapi/v2/latest/BTC') == '/latest/{coin}'
+    assert endpoint_label('https://x/pubapi/v2/orders/open/ETH') == '/orders/open/{coin}'
+
+def test_http_transport_records_latency_retries_and_errors():
+    metrics = Metrics()
+    session = StubSession([
+        StubResponse(503),
+        requests.ConnectionError("reset"),
+        StubResponse(200, {'status': 'ok'}),
+        StubResponse(404)
+    ])
+    transport = HTTPTransport(session=session, sleep=lambda s: None, metrics=metrics)
+
+    transport.get_json('http://x/latest/BTC')
+    with pytest.raises(requests.HTTPError):
+        transport.get_json('http://x/latest/ETH')
+
+    snapshot = metrics.snapshot()
+    retries = series(snapshot, 'counters', 'coinspot_http_retries_total')
+    assert retries[(('endpoint', '/latest/{coin}'), ('reason', '503'))] == 1
+    assert retries[(('endpoint', '/latest/{coin}'), ('reason', 'ConnectionError'))] == 1
+    errors = series(snapshot, 'counters', 'coinspot_http_errors_total')
+    assert errors == {(('endpoint', '/latest/{coin}'), ('reason', '404')): 1}
+    latency = series(snapshot, 'histograms', 'coinspot_http_request_seconds')
+    assert latency[(('endpoint', '/latest/{coin}'),)]['count'] == 4
+
+def test_pipeline_stages_feed_metrics():
+    metrics = Metrics()
+    pipeline = TickPipeline(CoinspotClient(transport=FakeTransport()), metrics=metrics)
+    response = {'status': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+    for _ in range(3):
+        pipeline.process('BTC', response)
+
+    stages = series(metrics.snapshot(), 'histograms', 'crypto_monitor_stage_seconds')
+    assert stages[(('stage', 'ingest'),)]['count'] == 3
+    assert stages[(('stage', 'signals'),)]['count'] == 3
+
+def test_file_and_json_sinks(tmp_path):
+    stream = io.StringIO()
+    path = tmp_path / 'monitor.prom'
+    metrics = Metrics([PrometheusFileSink(str(path)), JSONLogSink(stream=stream)])
+    metrics.inc('ticks_total')
+    metrics.export()
+    metrics.inc('ticks_total')
+    metrics.close()
+
+    assert 'ticks_total 2.0' in path.read_text()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record['counters']['ticks_total'][0][1] for record in records] == [1, 2]
+
+def test_http_sink_serves_live_metrics():
+    sink = PrometheusHTTPSink(port=0)
+    metrics = Metrics([sink])
+    try:
+        metrics.set_gauge('crypto_monitor_tick_drift_seconds', 0.25)
+        with urllib.request.urlopen(f"http://127.0.0.1:{sink.port}/metrics") as response:
+            body = response.read().decode()
+        assert 'crypto_monitor_tick_drift_seconds 0.25' in body
+    finally:
+        metrics.close()
@@ -0,0 +1,68 @@
+import pytest
+import requests
+from crypto_monitor.engine.pipeline import TickPipeline
+from crypto_monitor.market_data import lite
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.simulator import CoinspotSimulator
+from crypto_monitor.market_data.transport import HTTPTransport
+
+@pytest.fixture
+def simulator():
+    with CoinspotSimulator(coins=['BTC', 'ETH'], book_depth=5, seed=1) as simulator:
+        yield simulator
+
+def test_client_reads_prices_and_books_from_simulator(simulator):
+    client = CoinspotClient(base_url=simulator.base_url)
+    latest = client.get_latest_prices()
+    assert set(latest['prices']) == {'btc', 'eth'}
+
+    price = client.format_price_data(client.get_latest_price('BTC'))
+    assert price['bid'] < price['ask']
+    book = client.get_order_book('ETH')
+    assert len(book['buyorders']) == len(book['sellorders']) == 5
+
+    assert client.get_latest_price('NOPE')['status'] == 'error'
+    assert simulator.requests[('/latest', 200)] == 1
+    assert simulator.requests[('/latest/{coin}', 200)] == 2
+
+def test_monitor_pipeline_runs_against_simulator(simulator):
+    client = CoinspotClient(base_url=simulator.base_url)
+    pipeline = TickPipeline(client)
+    for _ in range(5):
+        responses = client.split_latest_prices(client.get_latest_prices())
+        books = client.get_order_books(list(responses))
+        results = {coin: pipeline.process(coin, responses[coin], books[coin]) for coin in responses}
+    assert len(client.get_price_history('BTC')) == 5
+    assert results['ETH']['order_book_analysis']['buy_volume'] > 0
+
+def test_simulated_faults_exercise_retries():
+    sleeps = []
+    with CoinspotSimulator(coins=3, error_rate=0.3, rate_limit_rate=0.3, retry_after=0.5, seed=7) as simulator:
+        transport = HTTPTransport(max_retries=10, sleep=sleeps.append)
+        client = CoinspotClient(transport=transport, base_url=simulator.base_url)
+        for _ in range(10):
+            assert client.get_latest_prices()['status'] == 'ok'
+
+    assert simulator.requests[('/latest', 200)] == 10
+    assert simulator.requests[('/latest', 500)] > 0
+    assert simulator.requests[('/latest', 429)] > 0
+    # 429s tell the client how long to wait
+    assert 0.5 in sleeps
+
+def test_simulator_is_reproducible_and_sized():
+    first = CoinspotSimulator(coins=8, seed=3)
+    second = CoinspotSimulator(coins=8, seed=3)
+    try:
+        assert first.handle('/pubapi/v2/latest') == second.handle('/pubapi/v2/latest')
+        assert len(first.handle('/pubapi/v2/latest')[1]['prices']) == 8
+        assert first.handle('/pubapi/v2/nothing')[0] == 404
+    finally:
+        first.server.server_close()
+        second.server.server_close()
+
+def test_base_url_from_environment(monkeypatch):
+    monkeypatch.setenv(lite.BASE_URL_ENV, 'http://localhost:9/pubapi/v2/')
+    assert CoinspotClient().base_url == 'http://localhost:9/pubapi/v2'
+    assert CoinspotClient(base_url='http://other/api').base_url == 'http://other/api'
+    monkeypatch.delenv(lite.BASE_URL_ENV)
+    assert CoinspotClient().base_url == lite.BASE_URL
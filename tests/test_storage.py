@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.storage.tick_store import TickStore
+
+def _tick(timestamp, bid):
+    return {
+        'timestamp': timestamp,
+        'bid': bid,
+        'ask': bid + 1,
+        'last': bid + 0.5,
+        'spread_absolute': 1.0,
+        'spread_percentage': 100 / bid
+    }
+
+def test_tick_store_range_queries(tmp_path):
+    start = datetime(2024, 1, 1, 23, 58)
+    with TickStore(str(tmp_path), buffer_rows=4) as store:
+        for i in range(6):
+            store.append('btc', _tick(start + timedelta(minutes=i), 100.0 + i))
+
+    store = TickStore(str(tmp_path))
+    assert store.coins() == ['BTC']
+    assert store.partitions('BTC') == ['2024-01-01', '2024-01-02']
+    # Columnar layout: one file per column
+    assert os.path.exists(tmp_path / 'BTC' / '2024-01-02' / 'bid.bin')
+
+    everything = store.read('BTC')
+    assert everything['bid'].tolist() == [100, 101, 102, 103, 104, 105]
+
+    # Only the second day's partition and the requested column are read
+    window = store.read('BTC', start=datetime(2024, 1, 2, 0, 1), end=datetime(2024, 1, 2, 0, 2), columns=['ask'])
+    assert sorted(window) == ['ask', 'timestamp']
+    assert window['ask'].tolist() == [104, 105]
+
+    assert store.tail('BTC', 3, columns=['bid'])['bid'].tolist() == [103, 104, 105]
+    assert store.read_frame('BTC').index[0] == start
+
+def test_tick_store_ignores_torn_writes(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append('ETH', _tick(datetime(2024, 1, 1), 10.0))
+    store.append('ETH', _tick(datetime(2024, 1, 1, 0, 1), 11.0))
+
+    # Simulate a crash that wrote one column but not the others
+    with open(tmp_path / 'ETH' / '2024-01-01' / 'bid.bin', 'ab') as f:
+        f.write(np.float64(12.0).tobytes())
+
+    assert store.read('ETH')['bid'].tolist() == [10, 11]
+
+def test_tick_store_repairs_torn_writes_before_appending(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append('ETH', _tick(datetime(2024, 1, 1), 10.0))
+    with open(tmp_path / 'ETH' / '2024-01-01' / 'bid.bin', 'ab') as f:
+        f.write(np.float64(99.0).tobytes() + b'\x00\x01\x02')
+
+    # A restarted process cuts bid.bin back before its first append
+    restarted = TickStore(str(tmp_path))
+    restarted.append('ETH', _tick(datetime(2024, 1, 1, 0, 1), 11.0))
+    restarted.append('ETH', _tick(datetime(2024, 1, 1, 0, 2), 12.0))
+
+    data = restarted.read('ETH')
+    assert data['bid'].tolist() == [10, 11, 12]
+    assert data['ask'].tolist() == [11, 12, 13]
+    assert os.path.getsize(tmp_path / 'ETH' / '2024-01-01' / 'bid.bin') == 3 * 8
+
+def test_client_persists_and_warm_starts(tmp_path):
+    response = {'status': 'ok', 'message': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+
+    client = CoinspotClient(store=TickStore(str(tmp_path)))
+    for _ in range(5):
+        client.add_price_to_history('BTC', response)
+
+    restarted = CoinspotClient(max_history=3, store=TickStore(str(tmp_path)))
+    restarted.add_price_to_history('BTC', response)
+
+    df = restarted.get_price_history('BTC')
+    assert len(df) == 3
+    assert df['high'].tolist() == [101, 101, 101]
+    assert len(restarted.store.read('BTC')['bid']) == 6
+
+    assert client.load_history('ETH') == 0
+
+def test_tick_store_bulk_extend(tmp_path):
+    start = datetime(2024, 1, 1, 23, 59)
+    store = TickStore(str(tmp_path), buffer_rows=10)
+    store.append('BTC', _tick(start - timedelta(minutes=1), 99.0))
+
+    ticks = [_tick(start + timedelta(minutes=i), 100.0 + i) for i in range(3)]
+    store.extend('BTC', {name: [tick[name] for tick in ticks] for name in ticks[0]})
+
+    assert store.partitions('BTC') == ['2024-01-01', '2024-01-02']
+    assert store.read('BTC')['bid'].tolist() == [99, 100, 101, 102]
+
+def test_client_bulk_ingest_persists(tmp_path):
+    response = {'status': 'ok', 'message': 'ok', 'prices': {'bid': '100', 'ask': '101', 'last': '100.5'}}
+    timestamps = [datetime(2024, 1, 1) + timedelta(seconds=i) for i in range(4)]
+
+    client = CoinspotClient(store=TickStore(str(tmp_path)))
+    client.add_prices_to_history('BTC', [response] * 4, timestamps)
+
+    stored = TickStore(str(tmp_path)).read_frame('BTC')
+    assert stored.index.tolist() == timestamps
+    assert stored['spread_absolute'].tolist() == [1, 1, 1, 1]
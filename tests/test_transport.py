@@ -0,0 +1,121 @@
+import threading
+import time
+import pytest
+import requests
+from crypto_monitor.market_data.coinspot import CoinspotClient
+from crypto_monitor.market_data.transport import FakeTransport, HTTPTransport
+
+class StubResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+class StubSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, dict(headers or {}), timeout))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def test_http_transport_retries_with_backoff():
+    session = StubSession([
+        StubResponse(503),
+        requests.ConnectionError("reset"),
+        StubResponse(429, headers={'Retry-After': '2'}),
+        StubResponse(200, {'status': 'ok'})
+    ])
+    sleeps = []
+    transport = HTTPTransport(session=session, max_retries=3, sleep=sleeps.append,
+                              connect_timeout=1, read_timeout=2)
+
+    assert transport.get_json('http://x/latest') == {'status': 'ok'}
+    assert len(session.requests) == 4
+    assert session.requests[0][2] == (1, 2)
+    assert sleeps[2] == 2 # Retry-After honoured
+    assert all(0 <= s <= transport.backoff_max for s in sleeps)
+
+def test_http_transport_gives_up_after_max_retries():
+    session = StubSession([StubResponse(500), StubResponse(500)])
+    transport = HTTPTransport(session=session, max_retries=1, sleep=lambda s: None)
+
+    with pytest.raises(requests.HTTPError):
+        transport.get_json('http://x/latest')
+
+def test_http_transport_cache_and_revalidation():
+    now = [0.0]
+    session = StubSession([
+        StubResponse(200, {'n': 1}, headers={'ETag': '"v1"'}),
+        StubResponse(304)
+    ])
+    transport = HTTPTransport(session=session, cache_ttl=1.0, clock=lambda: now[0])
+
+    assert transport.get_json('http://x/latest') == {'n': 1}
+    assert transport.get_json('http://x/latest') == {'n': 1}
+    assert len(session.requests) == 1
+
+    # Expired entry is revalidated with its ETag
+    now[0] = 5.0
+    assert transport.get_json('http://x/latest') == {'n': 1}
+    assert session.requests[1][1]['If-None-Match'] == '"v1"'
+
+def test_http_transport_shares_requests_in_flight_without_cache():
+    release = threading.Event()
+
+    class SlowSession(StubSession):
+        def get(self, url, headers=None, timeout=None):
+            release.wait(5)
+            return super().get(url, headers, timeout)
+
+    session = SlowSession([StubResponse(200, {'n': 1}), StubResponse(200, {'n': 2})])
+    transport = HTTPTransport(session=session)
+    assert transport.cache_ttl == 0
+
+    results = []
+    started = threading.Barrier(5)
+
+    def call():
+        started.wait()
+        results.append(transport.get_json('http://x/latest'))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    # Let every caller reach the request in flight before it completes
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{'n': 1}] * 4
+    assert len(session.requests) == 1
+    # Nothing is cached: the next call is a new request
+    assert transport.get_json('http://x/latest') == {'n': 2}
+
+def test_client_with_fake_transport():
+    transport = FakeTransport({
+        '/latest/BTC': {'status': 'ok', 'message': 'ok', 'prices': {'bid': '1', 'ask': '2', 'last': '1.5'}},
+        '/orders/open/ETH': (503, None)
+    })
+    client = CoinspotClient(transport=transport)
+
+    assert client.get_latest_price('btc')['prices']['last'] == '1.5'
+    assert transport.calls == ['https://www.coinspot.com.au/pubapi/v2/latest/BTC']
+
+    with pytest.raises(requests.RequestException, match="order book for ETH"):
+        client.get_order_book('ETH')
+    with pytest.raises(requests.RequestException):
+        client.get_latest_price('DOGE')